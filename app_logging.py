@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+# --- 日志 ---
+# 所有模块通过 get_logger("模块名") 取得 classmatch.* 下的 logger。请求处理线程只把日志记录放进内存队列
+# （QueueHandler），由后台线程（QueueListener）统一写到 stderr，写入慢或阻塞时不会拖慢界面事件。
+# 结构化字段通过 extra=fields(student=..., stage=..., duration=...) 传入，文本格式下以 key=value 附在行尾，
+# CLASSMATCH_LOG_FORMAT=json 时每行输出一个 JSON 对象。
+# 同一条警告/错误（按 logger、级别与消息模板区分）在 _RATE_LIMIT_WINDOW_SECONDS 秒内最多输出 _RATE_LIMIT_BURST 次，
+# 其余被丢弃，下一个时间窗口的第一条记录带上被丢弃的条数（suppressed 字段）。
+
+LOG_LEVEL_ENV = "CLASSMATCH_LOG_LEVEL"
+LOG_FORMAT_ENV = "CLASSMATCH_LOG_FORMAT"
+
+_ROOT_LOGGER_NAME = "classmatch"
+_RATE_LIMIT_WINDOW_SECONDS = 60
+_RATE_LIMIT_BURST = 5
+
+_setup_lock = threading.Lock()
+_queue_handler = None
+_output_handler = None
+_listener = None
+
+
+def fields(**values):
+    """结构化字段，用作 logger.info(..., extra=fields(student=..., stage=...))。"""
+    return {"fields": values}
+
+
+def _structured_fields(record):
+    values = dict(getattr(record, "fields", None) or {})
+    if "duration" in values and isinstance(values["duration"], float):
+        values["duration"] = round(values["duration"], 4)
+    suppressed = getattr(record, "suppressed", 0)
+    if suppressed:
+        values["suppressed"] = suppressed
+    return values
+
+
+class _TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        values = _structured_fields(record)
+        if values:
+            line += " " + " ".join(f"{key}={value}" for key, value in values.items())
+        return line
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        entry.update(_structured_fields(record))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """限制重复的 WARNING 及以上记录；INFO 及以下不限制。"""
+
+    def __init__(self, window_seconds=_RATE_LIMIT_WINDOW_SECONDS, burst=_RATE_LIMIT_BURST):
+        super().__init__()
+        self._window_seconds = window_seconds
+        self._burst = burst
+        self._lock = threading.Lock()
+        # (logger, 级别, 消息模板) -> [窗口开始时间, 已输出条数, 已丢弃条数]
+        self._windows = {}
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self._window_seconds:
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                self._windows[key] = [now, 1, 0]
+                return True
+            if window[1] < self._burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def _start_listener():
+    global _listener
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, _output_handler)
+    _listener.start()
+
+
+def _restart_listener_after_fork():
+    # fork 出的子进程（serve.py 的 worker、渲染进程）不继承写日志的线程，换用新的队列与线程
+    global _setup_lock
+    _setup_lock = threading.Lock()
+    if _queue_handler is not None:
+        _start_listener()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def setup_logging():
+    """配置 classmatch.* 的日志输出；可重复调用，只在第一次生效。"""
+    global _queue_handler, _output_handler
+    with _setup_lock:
+        if _queue_handler is not None:
+            return
+
+        _output_handler = logging.StreamHandler(sys.stderr)
+        log_format = os.environ.get(LOG_FORMAT_ENV, "text").lower()
+        _output_handler.setFormatter(_JsonFormatter() if log_format == "json" else _TextFormatter())
+
+        _queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        _queue_handler.addFilter(RateLimitFilter())
+
+        root_logger = logging.getLogger(_ROOT_LOGGER_NAME)
+        level_name = os.environ.get(LOG_LEVEL_ENV, "INFO").upper()
+        level_valid = isinstance(logging.getLevelName(level_name), int)
+        root_logger.setLevel(level_name if level_valid else logging.INFO)
+        root_logger.addHandler(_queue_handler)
+        root_logger.propagate = False
+
+        _start_listener()
+        atexit.register(_stop_listener)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+    if not level_valid:
+        root_logger.warning("Invalid %s=%r, using INFO.", LOG_LEVEL_ENV, level_name)
+    if log_format not in ("text", "json"):
+        root_logger.warning("Invalid %s=%r, using text.", LOG_FORMAT_ENV, log_format)
+
+
+def get_logger(name):
+    setup_logging()
+    return logging.getLogger(f"{_ROOT_LOGGER_NAME}.{name}")
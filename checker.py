@@ -1,9 +1,11 @@
-import io
 import sys
 import os
-import pandas as pd
 from collections import defaultdict
 
+from app_logging import get_logger, fields
+
+logger = get_logger("checker")
+
 # --- 静态标签定义 (用于生成输出字符串，确保与主文件界面上的标签一致) ---
 _SUBNET_ID_LABEL = "子网编号："
 _NETWORK_NAME_LABEL = "网络名称："
@@ -110,6 +112,13 @@ _KBP_MAPPING = {
 }
 
 
+# --- 辅助函数：判断表格输入是否为 DataFrame ---
+# pandas 只用于类型判断，不在模块导入时加载：若 pandas 尚未被导入，输入不可能是 DataFrame。
+def _is_dataframe(value):
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+
 # --- 函数 1: 捕获用户输入并格式化为字符串 (用于下载，功能不变) ---
 def capture_paper_data_string(
         subnet_id_value, network_name_value,
@@ -124,61 +133,55 @@ def capture_paper_data_string(
 ):
     """
     捕获所有用户输入数据，并将其格式化为可读的字符串，用于下载保存。
+    直接拼接字符串而不重定向 sys.stdout：并发请求时其他线程的输出不会混进答卷文件。
     """
-    old_stdout = sys.stdout
-    redirected_output = io.StringIO()
-    sys.stdout = redirected_output
+    lines = []
 
-    try:
-        print("--- 试卷填写结果 ---")
-
-        print(f"\n(1) xx参数")
-        print(f"{_SUBNET_ID_LABEL} {subnet_id_value}")
-        print(f"{_NETWORK_NAME_LABEL} {network_name_value}")
-
-        print(f"\n(2) Xxx站配置参数:")
-        print("Headers:", station_config_headers)
-        station_config_list = station_config_value.values.tolist() if isinstance(station_config_value,
-                                                                                 pd.DataFrame) else station_config_value
-        print("Data:", station_config_list)
-
-        print(f"\n(3) 信道段参数:")
-        print("Headers:", channel_segment_headers)
-        channel_segment_list = channel_segment_value.values.tolist() if isinstance(channel_segment_value,
-                                                                                   pd.DataFrame) else channel_segment_value
-        print("Data:", channel_segment_list)
-        print(f"{_CHANNEL_TYPE_LABEL} {channel_type_value}")
-
-        print(f"\n(4) 信道套参数:")
-        print("Headers:", channel_suite_headers) # 这里会使用更新后的表头
-        channel_suite_list = channel_suite_value.values.tolist() if isinstance(channel_suite_value,
-                                                                               pd.DataFrame) else channel_suite_value
-        print("Data:", channel_suite_list)
-
-        print(f"\n1.组网参数分析:")
-        print("Headers:", network_analysis_headers)
-        network_analysis_list = network_analysis_value.values.tolist() if isinstance(network_analysis_value,
-                                                                                     pd.DataFrame) else network_analysis_value
-        print("Data:", network_analysis_list)
-
-        print(f"\n2.点对点通信参数:")
-        print(f"{_LOCAL_CC_ADDRESS_LABEL} {local_cc_address_value}")
-        print(f"{_REMOTE_XX_ADDRESS_LABEL} {remote_xx_address_value}")
-        print("\n点对点通信参数表:")
-        p2p_list = p2p_value.values.tolist() if isinstance(p2p_value, pd.DataFrame) else p2p_value
-        print("Data:", p2p_list)
-
-        print(f"\n3.虚拟子网参数:")
-        print("Headers:", virtual_subnet_headers)
-        virtual_subnet_list = virtual_subnet_value.values.tolist() if isinstance(virtual_subnet_value,
-                                                                                 pd.DataFrame) else virtual_subnet_value
-        print("Data:", virtual_subnet_list)
-
-        print("\n--- 捕获结束 ---")
-
-    finally:
-        sys.stdout = old_stdout
-    return redirected_output.getvalue()
+    def _line(*parts):
+        # 与 print(*parts) 的输出格式一致
+        lines.append(" ".join(str(part) for part in parts))
+
+    _line("--- 试卷填写结果 ---")
+
+    _line(f"\n(1) xx参数")
+    _line(f"{_SUBNET_ID_LABEL} {subnet_id_value}")
+    _line(f"{_NETWORK_NAME_LABEL} {network_name_value}")
+
+    _line(f"\n(2) Xxx站配置参数:")
+    _line("Headers:", station_config_headers)
+    station_config_list = station_config_value.values.tolist() if _is_dataframe(station_config_value) else station_config_value
+    _line("Data:", station_config_list)
+
+    _line(f"\n(3) 信道段参数:")
+    _line("Headers:", channel_segment_headers)
+    channel_segment_list = channel_segment_value.values.tolist() if _is_dataframe(channel_segment_value) else channel_segment_value
+    _line("Data:", channel_segment_list)
+    _line(f"{_CHANNEL_TYPE_LABEL} {channel_type_value}")
+
+    _line(f"\n(4) 信道套参数:")
+    _line("Headers:", channel_suite_headers) # 这里会使用更新后的表头
+    channel_suite_list = channel_suite_value.values.tolist() if _is_dataframe(channel_suite_value) else channel_suite_value
+    _line("Data:", channel_suite_list)
+
+    _line(f"\n1.组网参数分析:")
+    _line("Headers:", network_analysis_headers)
+    network_analysis_list = network_analysis_value.values.tolist() if _is_dataframe(network_analysis_value) else network_analysis_value
+    _line("Data:", network_analysis_list)
+
+    _line(f"\n2.点对点通信参数:")
+    _line(f"{_LOCAL_CC_ADDRESS_LABEL} {local_cc_address_value}")
+    _line(f"{_REMOTE_XX_ADDRESS_LABEL} {remote_xx_address_value}")
+    _line("\n点对点通信参数表:")
+    p2p_list = p2p_value.values.tolist() if _is_dataframe(p2p_value) else p2p_value
+    _line("Data:", p2p_list)
+
+    _line(f"\n3.虚拟子网参数:")
+    _line("Headers:", virtual_subnet_headers)
+    virtual_subnet_list = virtual_subnet_value.values.tolist() if _is_dataframe(virtual_subnet_value) else virtual_subnet_value
+    _line("Data:", virtual_subnet_list)
+
+    _line("\n--- 捕获结束 ---")
+    return "\n".join(lines) + "\n"
 
 
 # --- 辅助函数：检查上行终止频率是否大于下行起始频率 ---
@@ -196,6 +199,7 @@ def _check_uplink_downlink_frequency_rule(section_title, user_row_index,
             errors.append({
                 'section_title': section_title,
                 'type': 'frequency_logic_error',
+                'code': "freq.ul_end_above_dl_start",
                 'row': user_row_index,
                 'col_header_ul_end': uplink_end_col_header,
                 'col_header_dl_start': downlink_start_col_header,
@@ -208,6 +212,7 @@ def _check_uplink_downlink_frequency_rule(section_title, user_row_index,
         errors.append({
             'section_title': section_title,
             'type': 'data_type_error',
+            'code': "freq.pair_not_numeric",
             'row': user_row_index,
             'message': f"频率值 '{downlink_start_freq_val}' 或 '{uplink_end_freq_val}' 应为有效数字，无法进行频点逻辑校验。"
         })
@@ -229,6 +234,7 @@ def _check_bandwidth_vs_rate_rule(section_title, user_row_index, user_rate_val,
             errors.append({
                 'section_title': section_title,
                 'type': 'bandwidth_rate_mismatch',
+                'code': "bandwidth.rate_unmapped",
                 'row': user_row_index,
                 'col_header_rate': rate_col_header,
                 'col_header_bandwidth': bandwidth_col_header,
@@ -243,6 +249,7 @@ def _check_bandwidth_vs_rate_rule(section_title, user_row_index, user_rate_val,
                 errors.append({
                     'section_title': section_title,
                     'type': 'bandwidth_rate_mismatch',
+                    'code': "bandwidth.below_required",
                     'row': user_row_index,
                     'col_header_rate': rate_col_header,
                     'col_header_bandwidth': bandwidth_col_header,
@@ -256,6 +263,7 @@ def _check_bandwidth_vs_rate_rule(section_title, user_row_index, user_rate_val,
         errors.append({
             'section_title': section_title,
             'type': 'data_type_error',
+            'code': "bandwidth.not_numeric",
             'row': user_row_index,
             'message': f"速率 '{user_rate_val}' 或带宽 '{user_bandwidth_val}' 应为有效数字，无法进行带宽速率校验。"
         })
@@ -264,6 +272,7 @@ def _check_bandwidth_vs_rate_rule(section_title, user_row_index, user_rate_val,
         errors.append({
             'section_title': section_title,
             'type': 'bandwidth_rate_mismatch',
+            'code': "bandwidth.internal_error",
             'row': user_row_index,
             'message': f"带宽与速率对应关系检查时发生内部错误: {e}"
         })
@@ -288,6 +297,7 @@ def _check_frequency_overlap_rule(section_title, user_row_index,
             errors.append({
                 'section_title': section_title,
                 'type': 'frequency_logic_error',
+                'code': "freq.dl_range_inverted",
                 'row': user_row_index,
                 'message': f"下行起始频率({dl_start_f})不能大于下行终止频率({dl_end_f})。"
             })
@@ -296,6 +306,7 @@ def _check_frequency_overlap_rule(section_title, user_row_index,
             errors.append({
                 'section_title': section_title,
                 'type': 'frequency_logic_error',
+                'code': "freq.ul_range_inverted",
                 'row': user_row_index,
                 'message': f"上行起始频率({ul_start_f})不能大于上行终止频率({ul_end_f})。"
             })
@@ -308,6 +319,7 @@ def _check_frequency_overlap_rule(section_title, user_row_index,
             errors.append({
                 'section_title': section_title,
                 'type': 'frequency_logic_error',
+                'code': "freq.overlap",
                 'row': user_row_index,
                 'message': f"频率范围重叠：下行频率范围[{dl_start_f:.2f}-{dl_end_f:.2f}]与上行频率范围[{ul_start_f:.2f}-{ul_end_f:.2f}]重叠，不允许。",
                 'user_value_dl_start': f"{dl_start_f:.2f}",
@@ -325,6 +337,7 @@ def _check_frequency_overlap_rule(section_title, user_row_index,
         errors.append({
             'section_title': section_title,
             'type': 'data_type_error',
+            'code': "freq.not_numeric",
             'row': user_row_index,
             'message': f"频率值应为数字，无法进行频率重叠校验。"
         })
@@ -366,7 +379,7 @@ def check_paper(
     }
 
     def _df_to_lol(df_value):
-        if isinstance(df_value, pd.DataFrame):
+        if _is_dataframe(df_value):
             return df_value.values.tolist()
         return df_value
 
@@ -389,6 +402,7 @@ def check_paper(
                 current_section_detailed_errors.append({
                     'section_title': friendly_title,
                     'type': 'dataframe_format_error',
+                    'code': "network.format",
                     'message': "组网参数分析表格格式错误或无法解析。请确保输入为有效数据。"
                 })
 
@@ -410,6 +424,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'column_count_mismatch',
+                            'code': "network.missing_cc_column",
                             'row': r + 1,
                             'message': f"第 {r + 1} 行列数不足，缺少CC地址列，无法进行重复性校验。"
                         })
@@ -424,6 +439,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'dataframe_duplicate',
+                            'code': "network.duplicate_cc",
                             'row': dup_r + 1,
                             'col': col_to_check_idx + 1,
                             'col_header': col_header_display,
@@ -460,6 +476,7 @@ def check_paper(
                 current_section_detailed_errors.append({
                     'section_title': friendly_title,
                     'type': 'dataframe_format_error',
+                    'code': "segment.format",
                     'message': "信道段参数表格格式错误或为空。无法解析频率数据。"
                 })
 
@@ -472,6 +489,7 @@ def check_paper(
                     current_section_detailed_errors.append({
                         'section_title': friendly_title,
                         'type': 'column_count_mismatch',
+                        'code': "segment.column_count",
                         'row': 1,
                         'message': f"信道段参数表格第一行列数不足，应至少包含 {expected_cols} 列。",
                         'user_value': str(len(user_row)),
@@ -489,6 +507,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'data_type_error',
+                            'code': "segment.not_numeric",
                             'message': "频率值应为数字，请检查输入。"
                         })
 
@@ -507,6 +526,7 @@ def check_paper(
                     current_section_detailed_errors.append({
                         'section_title': friendly_title,
                         'type': 'logic_check_failed',
+                        'code': "segment.unsupported_channel_type",
                         'message': f"无法对信道类型 '{user_channel_type}' 执行频率逻辑检查。请选择 'uu' 或 'aa'。"
                     })
                     frequencies_parsed = False  # Prevent subsequent frequency logic checks that rely on type
@@ -517,6 +537,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'dataframe_cell', 'row': 1, 'col': 2,
+                            'code': "segment.dl_start_range",
                             'col_header': report_headers[1],
                             'user_value': f"{user_downlink_start}",
                             'answer_value': f"{user_channel_type} 模式下，下行起始频率应在 {downlink_min}-{downlink_max} 范围内",
@@ -526,6 +547,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'dataframe_cell', 'row': 1, 'col': 3,
+                            'code': "segment.dl_end_range",
                             'col_header': report_headers[2],
                             'user_value': f"{user_downlink_end}",
                             'answer_value': f"{user_channel_type} 模式下，下行终止频率应在 {downlink_min}-{downlink_max} 范围内",
@@ -536,6 +558,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'dataframe_cell', 'row': 1, 'col': 4,
+                            'code': "segment.ul_start_range",
                             'col_header': report_headers[3],
                             'user_value': f"{user_uplink_start}",
                             'answer_value': f"{user_channel_type} 模式下，上行起始频率应在 {uplink_min}-{uplink_max} 范围内",
@@ -545,6 +568,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'dataframe_cell', 'row': 1, 'col': 5,
+                            'code': "segment.ul_end_range",
                             'col_header': report_headers[4],
                             'user_value': f"{user_uplink_end}",
                             'answer_value': f"{user_channel_type} 模式下，上行终止频率应在 {uplink_min}-{uplink_max} 范围内",
@@ -556,6 +580,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'logic_check_failed', 'row': 1, 'col': 4,
+                            'code': "segment.ul_start_offset",
                             'col_header': report_headers[3],
                             'user_value': f"{user_uplink_start}",
                             'answer_value': f"{user_channel_type} 模式下应为 下行起始频率+{offset:.2f}",
@@ -565,6 +590,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'logic_check_failed', 'row': 1, 'col': 5,
+                            'code': "segment.ul_end_offset",
                             'col_header': report_headers[4],
                             'user_value': f"{user_uplink_end}",
                             'answer_value': f"{user_channel_type} 模式下应为 下行终止频率+{offset:.2f}",
@@ -604,6 +630,7 @@ def check_paper(
                 current_section_detailed_errors.append({
                     'section_title': friendly_title,
                     'type': 'dataframe_format_error',
+                    'code': "suite.format",
                     'message': f"信道套参数表格格式错误或行/列数不匹配。应为 {expected_rows} 行 {expected_cols} 列。"
                 })
 
@@ -620,6 +647,7 @@ def check_paper(
                     current_section_detailed_errors.append({
                         'section_title': friendly_title,
                         'type': 'logic_check_failed',
+                        'code': "suite.segment_unavailable",
                         'message': "无法获取信道段参数中的频率数据，请检查信道段参数表格格式及内容是否完整。"
                     })
                 else:
@@ -633,6 +661,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'data_type_error',
+                            'code': "suite.segment_not_numeric",
                             'message': "信道段参数中的频率值应为数字，无法进行信道套参数的频点逻辑校验。"
                         })
 
@@ -648,6 +677,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'dataframe_cell',
+                            'code': "suite.rate_value",
                             'row': TDM_ROW_IDX + 1, 'col': RATE_COL_IDX + 1,
                             'col_header': report_headers[RATE_COL_IDX],
                             'user_value': user_rate_tdm_val,
@@ -658,6 +688,7 @@ def check_paper(
                     current_section_error_count += 1
                     current_section_detailed_errors.append({
                         'section_title': friendly_title, 'type': 'data_type_error',
+                        'code': "suite.rate_not_numeric",
                         'row': TDM_ROW_IDX + 1, 'col': RATE_COL_IDX + 1,
                         'col_header': report_headers[RATE_COL_IDX],
                         'message': f"TDM速率 '{user_rate_tdm_val}' 应为数字。"
@@ -671,6 +702,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'dataframe_cell',
+                            'code': "suite.bandwidth_value",
                             'row': TDM_ROW_IDX + 1, 'col': BANDWIDTH_COL_IDX + 1,
                             'col_header': report_headers[BANDWIDTH_COL_IDX],
                             'user_value': user_bandwidth_tdm_val,
@@ -681,6 +713,7 @@ def check_paper(
                     current_section_error_count += 1
                     current_section_detailed_errors.append({
                         'section_title': friendly_title, 'type': 'data_type_error',
+                        'code': "suite.bandwidth_not_numeric",
                         'row': TDM_ROW_IDX + 1, 'col': BANDWIDTH_COL_IDX + 1,
                         'col_header': report_headers[BANDWIDTH_COL_IDX],
                         'message': f"TDM带宽 '{user_bandwidth_tdm_val}' 应为数字。"
@@ -696,6 +729,7 @@ def check_paper(
                             current_section_detailed_errors.append({
                                 'section_title': friendly_title,
                                 'type': 'dataframe_cell',
+                                'code': "suite.uplink_center_value",
                                 'row': TDM_ROW_IDX + 1, 'col': UPLINK_CENTER_FREQ_COL_IDX + 1,
                                 'col_header': report_headers[UPLINK_CENTER_FREQ_COL_IDX],
                                 'user_value': user_tdm_uplink_center_freq_val,
@@ -706,6 +740,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'data_type_error',
+                            'code': "suite.uplink_center_not_numeric",
                             'row': TDM_ROW_IDX + 1, 'col': UPLINK_CENTER_FREQ_COL_IDX + 1,
                             'col_header': report_headers[UPLINK_CENTER_FREQ_COL_IDX],
                             'message': f"TDM上行中心频点 '{user_tdm_uplink_center_freq_val}' 应为数字。"
@@ -720,6 +755,7 @@ def check_paper(
                             current_section_detailed_errors.append({
                                 'section_title': friendly_title,
                                 'type': 'dataframe_cell',
+                                'code': "suite.downlink_center_value",
                                 'row': TDM_ROW_IDX + 1, 'col': DOWNLINK_CENTER_FREQ_COL_IDX + 1,
                                 'col_header': report_headers[DOWNLINK_CENTER_FREQ_COL_IDX],
                                 'user_value': user_tdm_downlink_center_freq_val,
@@ -730,6 +766,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'data_type_error',
+                            'code': "suite.downlink_center_not_numeric",
                             'row': TDM_ROW_IDX + 1, 'col': DOWNLINK_CENTER_FREQ_COL_IDX + 1,
                             'col_header': report_headers[DOWNLINK_CENTER_FREQ_COL_IDX],
                             'message': f"TDM下行中心频点 '{user_tdm_downlink_center_freq_val}' 应为数字。"
@@ -739,6 +776,7 @@ def check_paper(
                     current_section_detailed_errors.append({
                         'section_title': friendly_title,
                         'type': 'logic_check_failed',
+                        'code': "suite.tdm_center_unchecked",
                         'message': "因信道段频率数据缺失或格式错误，无法校验TDM中心频点。请先修正信道段参数。"
                     })
 
@@ -752,6 +790,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'dataframe_cell',
+                            'code': "suite.rate_value",
                             'row': ALOHA_ROW_IDX + 1, 'col': RATE_COL_IDX + 1,
                             'col_header': report_headers[RATE_COL_IDX],
                             'user_value': user_rate_aloha_val,
@@ -762,6 +801,7 @@ def check_paper(
                     current_section_error_count += 1
                     current_section_detailed_errors.append({
                         'section_title': friendly_title, 'type': 'data_type_error',
+                        'code': "suite.rate_not_numeric",
                         'row': ALOHA_ROW_IDX + 1, 'col': RATE_COL_IDX + 1,
                         'col_header': report_headers[RATE_COL_IDX],
                         'message': f"ALOHA速率 '{user_rate_aloha_val}' 应为数字。"
@@ -775,6 +815,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'dataframe_cell',
+                            'code': "suite.bandwidth_value",
                             'row': ALOHA_ROW_IDX + 1, 'col': BANDWIDTH_COL_IDX + 1,
                             'col_header': report_headers[BANDWIDTH_COL_IDX],
                             'user_value': user_bandwidth_aloha_val,
@@ -785,6 +826,7 @@ def check_paper(
                     current_section_error_count += 1
                     current_section_detailed_errors.append({
                         'section_title': friendly_title, 'type': 'data_type_error',
+                        'code': "suite.bandwidth_not_numeric",
                         'row': ALOHA_ROW_IDX + 1, 'col': BANDWIDTH_COL_IDX + 1,
                         'col_header': report_headers[BANDWIDTH_COL_IDX],
                         'message': f"ALOHA带宽 '{user_bandwidth_aloha_val}' 应为数字。"
@@ -800,6 +842,7 @@ def check_paper(
                             current_section_detailed_errors.append({
                                 'section_title': friendly_title,
                                 'type': 'dataframe_cell',
+                                'code': "suite.uplink_center_value",
                                 'row': ALOHA_ROW_IDX + 1, 'col': UPLINK_CENTER_FREQ_COL_IDX + 1,
                                 'col_header': report_headers[UPLINK_CENTER_FREQ_COL_IDX],
                                 'user_value': user_aloha_uplink_center_freq_val,
@@ -810,6 +853,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'data_type_error',
+                            'code': "suite.uplink_center_not_numeric",
                             'row': ALOHA_ROW_IDX + 1, 'col': UPLINK_CENTER_FREQ_COL_IDX + 1,
                             'col_header': report_headers[UPLINK_CENTER_FREQ_COL_IDX],
                             'message': f"ALOHA上行中心频点 '{user_aloha_uplink_center_freq_val}' 应为数字。"
@@ -824,6 +868,7 @@ def check_paper(
                             current_section_detailed_errors.append({
                                 'section_title': friendly_title,
                                 'type': 'dataframe_cell',
+                                'code': "suite.downlink_center_value",
                                 'row': ALOHA_ROW_IDX + 1, 'col': DOWNLINK_CENTER_FREQ_COL_IDX + 1,
                                 'col_header': report_headers[DOWNLINK_CENTER_FREQ_COL_IDX],
                                 'user_value': user_aloha_downlink_center_freq_val,
@@ -834,6 +879,7 @@ def check_paper(
                         current_section_error_count += 1
                         current_section_detailed_errors.append({
                             'section_title': friendly_title, 'type': 'data_type_error',
+                            'code': "suite.downlink_center_not_numeric",
                             'row': ALOHA_ROW_IDX + 1, 'col': DOWNLINK_CENTER_FREQ_COL_IDX + 1,
                             'col_header': report_headers[DOWNLINK_CENTER_FREQ_COL_IDX],
                             'message': f"ALOHA下行中心频点 '{user_aloha_downlink_center_freq_val}' 应为数字。"
@@ -843,6 +889,7 @@ def check_paper(
                     current_section_detailed_errors.append({
                         'section_title': friendly_title,
                         'type': 'logic_check_failed',
+                        'code': "suite.aloha_center_unchecked",
                         'message': "因信道段频率数据缺失或格式错误，无法校验ALOHA中心频点。请先修正信道段参数。"
                     })
 
@@ -861,6 +908,7 @@ def check_paper(
                 current_section_detailed_errors.append({
                     'section_title': friendly_title,
                     'type': 'dataframe_format_error',
+                    'code': "virtual_subnet.format",
                     'message': f"虚拟子网参数表格格式错误或行/列数不匹配。应为 {expected_rows} 行 {expected_cols} 列。"
                 })
 
@@ -884,6 +932,7 @@ def check_paper(
                     current_section_detailed_errors.append({
                         'section_title': friendly_title,
                         'type': 'logic_check_failed',
+                        'code': "virtual_subnet.rate_not_selected",
                         'message': "请选择一个虚拟子网速率，以便校验带宽。"
                     })
                 else:
@@ -917,6 +966,7 @@ def check_paper(
                 current_section_detailed_errors.append({
                     'section_title': friendly_title,
                     'type': 'dataframe_format_error',
+                    'code': "p2p.format",
                     'message': "点对点通信参数表格格式错误或无法解析。请确保输入为有效数据。"
                 })
 
@@ -930,6 +980,7 @@ def check_paper(
                     current_section_detailed_errors.append({
                         'section_title': friendly_title,
                         'type': 'row_count_mismatch',
+                        'code': "p2p.row_count",
                         'message': f"表格行数不匹配: 您的表格有 {user_rows} 行，应有 {expected_rows} 行。",
                         'user_value': str(user_rows),
                         'answer_value': str(expected_rows)
@@ -950,6 +1001,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'column_count_mismatch',
+                            'code': "p2p.column_count",
                             'row': r + 1,
                             'message': f"第 {r + 1} 行列数不足，缺少必要的频率或带宽/速率列，无法进行校验。"
                         })
@@ -972,6 +1024,7 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'column_count_mismatch',
+                            'code': "p2p.missing_frequency_columns",
                             'row': r + 1,
                             'message': f"第 {r + 1} 行频率列缺失，无法进行上行/下行频点逻辑校验。"
                         })
@@ -993,16 +1046,18 @@ def check_paper(
                         current_section_detailed_errors.append({
                             'section_title': friendly_title,
                             'type': 'column_count_mismatch',
+                            'code': "p2p.missing_rate_bandwidth_columns",
                             'row': r + 1,
                             'message': f"第 {r + 1} 行速率或带宽列缺失，无法进行带宽速率校验。"
                         })
 
         else:
-            print(
-                f"Warning: Unsupported check type '{config['check_type']}' for section '{friendly_title}'. Cannot count errors.")
+            logger.warning("Unsupported check type %r for section %r. Cannot count errors.",
+                           config['check_type'], friendly_title, extra=fields(stage="check_paper"))
             current_section_detailed_errors.append({
                 'section_title': friendly_title,
                 'type': 'unsupported_check_type',
+                'code': "check.unsupported_type",
                 'message': f"此部分使用了不支持的检查类型 '{config['check_type']}'。"
             })
 
@@ -0,0 +1,187 @@
+import os
+import time
+import pickle
+import atexit
+import tempfile
+import threading
+
+from app_logging import get_logger, fields
+from config import env_number
+
+logger = get_logger("checkpoint")
+
+# --- 进程内状态的定期检查点 ---
+# 单进程部署时学生数据与随堂测试统计只保存在内存中。后台线程每隔 CLASSMATCH_CHECKPOINT_INTERVAL_SECONDS 秒
+# 把两者写入 CLASSMATCH_CHECKPOINT_PATH，进程启动时（开始接受请求之前）读回最近一次的检查点。
+#   * 两个存储各有版本号，自上次保存以来都没有写入时跳过本轮，空闲时不产生磁盘写入；
+#   * 成绩历史按能力维度堆叠为 float32 数组后用 pickle 最高协议保存，数千名学生的检查点只有几 MB，
+#     读回时直接复用数组内存，不逐条解析；
+#   * 先写同目录下的临时文件并 fsync，再用 os.replace 原子替换，进程中途退出也不会留下半个检查点；
+#   * 进程正常退出时再保存一次。
+# 检查点由本服务自己写入、从本地路径读回，不要指向不受信任的文件（pickle 反序列化可执行任意代码）。
+# 多进程部署（serve.py）使用 SQLite 共享存储，数据已经持久化，不启用检查点。
+# 默认路径是程序目录下的 classmatch_state.ckpt，与启动时的工作目录无关；压测等临时实例应另设路径或设为空字符串。
+
+CHECKPOINT_PATH_ENV = "CLASSMATCH_CHECKPOINT_PATH"
+CHECKPOINT_INTERVAL_ENV = "CLASSMATCH_CHECKPOINT_INTERVAL_SECONDS"
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classmatch_state.ckpt")
+_DEFAULT_INTERVAL_SECONDS = 5
+_FORMAT_VERSION = 1
+
+
+def write_atomically(path, data):
+    """把 data（bytes）写入 path：先写同目录临时文件并 fsync，再原子替换。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    # 让目录项的替换也落盘；部分文件系统不支持对目录 fsync
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class Checkpointer:
+    """
+    学生存储与测试统计的检查点。两者需提供 state_version()、export_state() 与 restore_state(state)，
+    即 state_store 中的进程内存储。restore() 在启动时调用一次，start() 启动后台保存线程。
+    """
+
+    def __init__(self, student_store, quiz_stats, path, metrics, interval_seconds=None):
+        self._student_store = student_store
+        self._quiz_stats = quiz_stats
+        self._path = path
+        self._metrics = metrics
+        self._interval_seconds = (env_number(CHECKPOINT_INTERVAL_ENV, _DEFAULT_INTERVAL_SECONDS)
+                                  if interval_seconds is None else interval_seconds)
+        self._lock = threading.Lock()
+        self._saved_versions = None
+        self._thread_pid = None
+
+    @property
+    def path(self):
+        return self._path
+
+    def _versions(self):
+        return self._student_store.state_version(), self._quiz_stats.state_version()
+
+    def restore(self):
+        """读回检查点，返回恢复的学生数；文件不存在时返回 0。文件损坏时改名为 *.corrupt 并从空状态启动。"""
+        started_at = time.perf_counter()
+        try:
+            with open(self._path, "rb") as checkpoint_file:
+                checkpoint = pickle.load(checkpoint_file)
+            if checkpoint.get("format") != _FORMAT_VERSION:
+                raise ValueError(f"unsupported checkpoint format {checkpoint.get('format')!r}")
+            self._student_store.restore_state(checkpoint["students"])
+            self._quiz_stats.restore_state(checkpoint["quiz"])
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            corrupt_path = self._path + ".corrupt"
+            logger.error("Could not restore checkpoint %s: %s; moved it to %s and starting empty.",
+                         self._path, e, corrupt_path)
+            try:
+                os.replace(self._path, corrupt_path)
+            except OSError:
+                pass
+            return 0
+        duration = time.perf_counter() - started_at
+        # 刚读回的状态与磁盘一致，数据没有变化前无需再次保存
+        self._saved_versions = self._versions()
+        student_count = len(checkpoint["students"]["names"])
+        self._metrics.set_gauge("classmatch_checkpoint_restore_seconds", duration,
+                                "Time spent restoring the state checkpoint at startup.", pid=os.getpid())
+        logger.info("Restored %d students from checkpoint in %.1f ms.", student_count, duration * 1000,
+                    extra=fields(stage="checkpoint_restore", duration=duration, path=self._path,
+                                 saved_at=checkpoint.get("saved_at")))
+        return student_count
+
+    def save(self, force=False):
+        """保存一次检查点；数据自上次保存以来没有变化且未指定 force 时跳过。返回是否写入了文件。"""
+        with self._lock:
+            versions = self._versions()
+            if not force and versions == self._saved_versions:
+                return False
+            started_at = time.perf_counter()
+            checkpoint = {
+                "format": _FORMAT_VERSION,
+                "saved_at": time.time(),
+                "students": self._student_store.export_state(),
+                "quiz": self._quiz_stats.export_state(),
+            }
+            exported_at = time.perf_counter()
+            data = pickle.dumps(checkpoint, protocol=pickle.HIGHEST_PROTOCOL)
+            write_atomically(self._path, data)
+            finished_at = time.perf_counter()
+            # 记录导出时读到的版本号：导出过程中的新写入会让版本号不同，下一轮再保存
+            self._saved_versions = (checkpoint["students"]["version"], checkpoint["quiz"]["version"])
+        self._metrics.observe("checkpoint", "export", exported_at - started_at)
+        self._metrics.observe("checkpoint", "write", finished_at - exported_at)
+        self._metrics.set_gauge("classmatch_checkpoint_bytes", len(data),
+                                "Size of the last state checkpoint written.", pid=os.getpid())
+        self._metrics.set_gauge("classmatch_checkpoint_last_saved_timestamp_seconds", checkpoint["saved_at"],
+                                "Unix time of the last state checkpoint written.", pid=os.getpid())
+        return True
+
+    def start(self):
+        """启动后台保存线程（每个进程一个），并在进程退出时保存最后一次；间隔设为 0 时只在退出时保存。"""
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        atexit.register(self._save_quietly)
+        if self._interval_seconds:
+            threading.Thread(target=self._run, name="state-checkpoint", daemon=True).start()
+        logger.info("State checkpoints enabled.", extra=fields(path=self._path, interval=self._interval_seconds))
+
+    def _run(self):
+        while True:
+            time.sleep(self._interval_seconds)
+            self._save_quietly()
+
+    def _save_quietly(self):
+        try:
+            self.save()
+        except Exception as e:
+            logger.error("Writing checkpoint %s failed: %s", self._path, e)
+
+    def format_markdown(self):
+        """管理页的检查点概况。"""
+        interval = f"每 {self._interval_seconds:g} 秒（有变化时）" if self._interval_seconds else "仅在退出时"
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return f"检查点 `{self._path}`：尚未写入；{interval}保存。"
+        saved_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stat.st_mtime))
+        return f"检查点 `{self._path}`：{stat.st_size / 1024:.1f} KB，最近保存于 {saved_at}；{interval}保存。"
+
+
+def create_checkpointer(student_store, quiz_stats, metrics):
+    """
+    进程内存储时返回 Checkpointer，路径取 CLASSMATCH_CHECKPOINT_PATH（设为空字符串可关闭）；
+    使用 SQLite 共享存储或关闭检查点时返回 None。
+    """
+    path = os.environ.get(CHECKPOINT_PATH_ENV, _DEFAULT_PATH)
+    if not path or not hasattr(student_store, "export_state"):
+        return None
+    return Checkpointer(student_store, quiz_stats, path, metrics)
@@ -0,0 +1,118 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# --- 全班能力统计的增量聚合 ---
+# 统计对象是每位学生最近一次提交的成绩。每次保存提交时，先减去该学生上一次的成绩再加上新成绩，
+# 因此人数、均值、方差、最值与分位数都能在常数时间内查询，与班级人数无关。
+# 分位数、最小/最大值来自固定分辨率的直方图（成绩取值 0-100），精度为 _BIN_WIDTH 分。
+
+_SCORE_MIN = 0.0
+_SCORE_MAX = 100.0
+_BIN_WIDTH = 0.1
+_NUM_BINS = int(round((_SCORE_MAX - _SCORE_MIN) / _BIN_WIDTH)) + 1
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+# attributes: 能力维度元组；count: 参与统计的学生数；其余字段均为按能力维度排列的数组，
+# quantiles 为 {分位点: 数组}
+ClassSummary = namedtuple("ClassSummary",
+                          ["attributes", "count", "mean", "variance", "minimum", "maximum", "quantiles"])
+
+
+def _bin_index(scores):
+    clipped = np.clip(scores, _SCORE_MIN, _SCORE_MAX)
+    return np.rint((clipped - _SCORE_MIN) / _BIN_WIDTH).astype(np.intp)
+
+
+def _bin_value(indices):
+    return _SCORE_MIN + indices * _BIN_WIDTH
+
+
+class _SchemaAggregate:
+    def __init__(self, num_attributes):
+        self.count = 0
+        self.sum = np.zeros(num_attributes)
+        self.sum_sq = np.zeros(num_attributes)
+        self.histogram = np.zeros((num_attributes, _NUM_BINS), dtype=np.int64)
+        self._rows = np.arange(num_attributes)
+
+    def add(self, scores, sign):
+        scores = np.asarray(scores, dtype=np.float64)
+        self.count += sign
+        self.sum += sign * scores
+        self.sum_sq += sign * scores * scores
+        self.histogram[self._rows, _bin_index(scores)] += sign
+
+    def add_many(self, scores):
+        """一次加入多名学生的成绩（学生数 × 能力维度），结果与逐行 add(..., +1) 相同。"""
+        scores = np.asarray(scores, dtype=np.float64)
+        self.count += len(scores)
+        self.sum += scores.sum(axis=0)
+        self.sum_sq += (scores * scores).sum(axis=0)
+        np.add.at(self.histogram, (np.broadcast_to(self._rows, scores.shape), _bin_index(scores)), 1)
+
+    def summarize(self, attributes, quantiles):
+        count = self.count
+        mean = self.sum / count
+        variance = np.maximum(self.sum_sq / count - mean * mean, 0.0)
+
+        occupied = self.histogram > 0
+        minimum = _bin_value(np.argmax(occupied, axis=1))
+        maximum = _bin_value(_NUM_BINS - 1 - np.argmax(occupied[:, ::-1], axis=1))
+
+        cumulative = np.cumsum(self.histogram, axis=1)
+        quantile_values = {}
+        for q in quantiles:
+            # 第一个累计人数达到 q × count 的直方图分箱
+            target = max(1, int(np.ceil(q * count)))
+            quantile_values[q] = _bin_value(np.argmax(cumulative >= target, axis=1))
+
+        return ClassSummary(attributes, count, mean, variance, minimum, maximum, quantile_values)
+
+
+class ClassAggregates:
+    """按能力维度元组分别维护的全班聚合统计，线程安全。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_schema = {}
+
+    def record(self, attributes, scores, previous=None):
+        """
+        记录某位学生的最新成绩。previous 为该学生上一次计入统计的 (attributes, scores)，
+        首次提交时为 None。
+        """
+        with self._lock:
+            if previous is not None:
+                previous_attributes, previous_scores = previous
+                self._by_schema[previous_attributes].add(previous_scores, -1)
+            aggregate = self._by_schema.get(attributes)
+            if aggregate is None:
+                aggregate = self._by_schema[attributes] = _SchemaAggregate(len(attributes))
+            aggregate.add(scores, +1)
+
+    def record_many(self, attributes, scores):
+        """批量记录同一组能力维度下多名学生的首次成绩（学生数 × 能力维度），用于从检查点恢复。"""
+        with self._lock:
+            aggregate = self._by_schema.get(attributes)
+            if aggregate is None:
+                aggregate = self._by_schema[attributes] = _SchemaAggregate(len(attributes))
+            aggregate.add_many(scores)
+
+    def summary(self, attributes=None, quantiles=DEFAULT_QUANTILES):
+        """
+        返回 ClassSummary；attributes 为 None 时使用学生人数最多的一组能力维度。
+        没有任何数据时返回 None。
+        """
+        with self._lock:
+            if attributes is None:
+                populated = [(agg.count, attrs) for attrs, agg in self._by_schema.items() if agg.count > 0]
+                if not populated:
+                    return None
+                attributes = max(populated, key=lambda item: item[0])[1]
+            aggregate = self._by_schema.get(attributes)
+            if aggregate is None or aggregate.count <= 0:
+                return None
+            return aggregate.summarize(attributes, quantiles)
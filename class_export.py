@@ -0,0 +1,226 @@
+import re
+import html
+import json
+import time
+import zipfile
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import as_completed
+
+from render_service import RENDER_SERVICE
+from recommendations import build_study_route, format_study_route_html
+from error_report import format_detailed_errors_markdown
+from svg_radar import attribute_radar_svg, history_radar_svg
+from app_logging import get_logger, fields
+
+logger = get_logger("class_export")
+
+# --- 整班报告导出 ---
+# 把每位学生的检查摘要、最新能力雷达图、成长图与学习路线打包成一个 zip。
+# 雷达图与成长图和教师查看界面一样输出 SVG（svg_radar.py，每张不到 1 毫秒，直接在当前进程生成）；
+# 需要 matplotlib 的学习路线思维导图一次性投递到渲染进程池并行绘制，按完成顺序写入压缩包，
+# 输入未变化的思维导图直接复用之前渲染过的 PNG（进程内 LRU 缓存），再次导出时只绘制有新提交的学生。
+
+# 每张思维导图 PNG 约 100-200 KB
+_CHART_CACHE_SIZE = 512
+_chart_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+
+# 压缩包内的目录名不能包含的字符
+_UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+_MINDMAP_SAVEFIG_KWARGS = {'dpi': 150}
+
+
+def _chart_cache_key(plot_name, savefig_kwargs, plot_kwargs):
+    payload = json.dumps([plot_name, savefig_kwargs, plot_kwargs], sort_keys=True, ensure_ascii=False,
+                         default=lambda value: value.tolist())
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _cached_chart(cache_key):
+    with _chart_cache_lock:
+        png_bytes = _chart_cache.get(cache_key)
+        if png_bytes is not None:
+            _chart_cache.move_to_end(cache_key)
+        return png_bytes
+
+
+def _store_chart(cache_key, png_bytes):
+    with _chart_cache_lock:
+        _chart_cache[cache_key] = png_bytes
+        _chart_cache.move_to_end(cache_key)
+        while len(_chart_cache) > _CHART_CACHE_SIZE:
+            _chart_cache.popitem(last=False)
+
+
+def clear_chart_cache():
+    """清空思维导图 PNG 缓存（内存看门狗在内存超限时调用），返回清除的条目数。"""
+    with _chart_cache_lock:
+        cleared = len(_chart_cache)
+        _chart_cache.clear()
+    return cleared
+
+
+def _archive_folder_names(student_names):
+    """学生姓名 -> 压缩包内唯一的目录名。"""
+    folders = {}
+    used = set()
+    for student_name in student_names:
+        base = _UNSAFE_NAME_CHARS.sub("_", str(student_name)).strip(" .") or "student"
+        folder, suffix = base, 2
+        while folder in used:
+            folder, suffix = f"{base}_{suffix}", suffix + 1
+        used.add(folder)
+        folders[student_name] = folder
+    return folders
+
+
+def _svg_charts(student_name, history):
+    """返回 [(文件名, 标题, SVG 文本)]：最新能力雷达图，以及两次以上提交时的成长图。"""
+    if history is None or len(history.scores) == 0 or len(history.attributes) < 3:
+        return []
+    charts = [("radar.svg", "最新能力雷达图", attribute_radar_svg(
+        character_name=student_name, attributes=history.attributes, values=history.scores[-1],
+        max_value=100, color='dodgerblue'))]
+    if len(history.scores) > 1:
+        charts.append(("growth.svg", "能力成长情况", history_radar_svg(
+            student_name=student_name, attributes=history.attributes, score_history=history.scores, max_value=100)))
+    return charts
+
+
+def _mindmap_kwargs(student_name, check_result):
+    return dict(student_name=student_name, detailed_errors=check_result.get("detailed_errors") or [])
+
+
+def _student_report_html(student_name, check_result, charts, failed_charts):
+    title = html.escape(f"{student_name} 的答卷报告")
+    parts = [f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title></head><body>",
+             f"<h2>{title}</h2>", "<p><a href=\"../index.html\">返回全班列表</a></p>"]
+
+    if check_result is not None:
+        detailed_errors = check_result.get("detailed_errors") or []
+        summary_md = "\n\n".join((
+            check_result.get("check_message", ""),
+            check_result.get("analysis_report", ""),
+            format_detailed_errors_markdown(detailed_errors, check_result.get("error_sections_with_counts") or []),
+        ))
+        parts.append("<h3>检查结果</h3>")
+        parts.append(f"<pre style=\"white-space: pre-wrap;\">{html.escape(summary_md)}</pre>")
+        parts.append(format_study_route_html(student_name, build_study_route(detailed_errors)))
+    else:
+        parts.append("<p>没有保存的检查结果（该学生的答卷在本次服务启动前提交）。</p>")
+
+    for file_name, chart_title in charts:
+        parts.append(f"<h3>{html.escape(chart_title)}</h3><img src=\"{file_name}\" alt=\"{html.escape(chart_title)}\">")
+    for chart_title, error in failed_charts:
+        parts.append(f"<h3>{html.escape(chart_title)}</h3><p>图表生成失败：{html.escape(str(error))}</p>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _index_html(folders, chart_counts):
+    rows = "".join(
+        f"<li><a href=\"{html.escape(folder)}/report.html\">{html.escape(str(student_name))}</a>"
+        f"（{chart_counts.get(student_name, 0)} 张图表）</li>"
+        for student_name, folder in folders.items())
+    return ("<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>全班报告</title></head><body>"
+            f"<h2>全班报告（{len(folders)} 名学生）</h2><ul>{rows}</ul></body></html>")
+
+
+def export_class_reports(student_store, include_mindmaps=False, progress=None):
+    """
+    导出全班报告，返回 (zip 文件路径, 统计信息 dict)。
+    progress(已完成数, 总数) 在每位学生的图表与报告写入后调用，可用于界面进度显示。
+    """
+    started_at = time.perf_counter()
+    student_names = student_store.keys()
+    folders = _archive_folder_names(student_names)
+    check_results = {student_name: student_store.latest_check_result(student_name) for student_name in student_names}
+    mindmap_students = [student_name for student_name in student_names
+                        if include_mindmaps and check_results[student_name] is not None]
+
+    total = len(student_names) + len(mindmap_students) + 1
+    done = 0
+    stats = {"students": len(student_names), "charts": 0, "cached_charts": 0, "failed_charts": 0}
+
+    def _advance():
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, total)
+
+    with tempfile.NamedTemporaryFile(prefix="classmatch_class_report_", suffix=".zip", delete=False) as tmpfile:
+        zip_path = tmpfile.name
+
+    charts_by_student = {student_name: [] for student_name in student_names}
+    failures_by_student = {student_name: [] for student_name in student_names}
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        # 先把所有未命中缓存的思维导图作为批量任务投递（渲染服务按窗口分批送入进程池，不挤占学生提交的渲染），
+        # 进程池绘制期间在当前线程生成 SVG 图表
+        pending = {}
+        cached_mindmaps = []
+        for student_name in mindmap_students:
+            plot_kwargs = _mindmap_kwargs(student_name, check_results[student_name])
+            cache_key = _chart_cache_key("plot_study_route_mindmap", _MINDMAP_SAVEFIG_KWARGS, plot_kwargs)
+            png_bytes = _cached_chart(cache_key)
+            if png_bytes is not None:
+                cached_mindmaps.append((student_name, png_bytes))
+                continue
+            future = RENDER_SERVICE.submit("plot_study_route_mindmap", savefig_kwargs=_MINDMAP_SAVEFIG_KWARGS,
+                                           bulk=True, **plot_kwargs)
+            pending[future] = (student_name, plot_kwargs, cache_key)
+
+        for student_name in student_names:
+            for file_name, chart_title, svg in _svg_charts(student_name, student_store.get_history(student_name)):
+                archive.writestr(f"{folders[student_name]}/{file_name}", svg)
+                charts_by_student[student_name].append((file_name, chart_title))
+                stats["charts"] += 1
+
+        def _write_mindmap(student_name, png_bytes):
+            # PNG 本身已压缩，不再 deflate
+            archive.writestr(f"{folders[student_name]}/study_route.png", png_bytes,
+                             compress_type=zipfile.ZIP_STORED)
+            charts_by_student[student_name].append(("study_route.png", "学习路线思维导图"))
+            stats["charts"] += 1
+
+        for student_name, png_bytes in cached_mindmaps:
+            _write_mindmap(student_name, png_bytes)
+            stats["cached_charts"] += 1
+            _advance()
+
+        for future in as_completed(pending):
+            student_name, plot_kwargs, cache_key = pending[future]
+            try:
+                try:
+                    png_bytes = future.result()
+                except Exception as e:
+                    # 进程池在导出过程中崩溃时逐张重试（render() 会退回到当前进程渲染）
+                    logger.warning("Rendering the study route in the pool failed (%s). Retrying.", e,
+                                   extra=fields(student=student_name, stage="mindmap_render"))
+                    png_bytes = RENDER_SERVICE.render("plot_study_route_mindmap",
+                                                      savefig_kwargs=_MINDMAP_SAVEFIG_KWARGS, **plot_kwargs)
+            except Exception as e:
+                logger.error("Error rendering the study route mindmap: %s", e,
+                             extra=fields(student=student_name, stage="mindmap_render"))
+                failures_by_student[student_name].append(("学习路线思维导图", e))
+                stats["failed_charts"] += 1
+            else:
+                _store_chart(cache_key, png_bytes)
+                _write_mindmap(student_name, png_bytes)
+            _advance()
+
+        for student_name in student_names:
+            archive.writestr(f"{folders[student_name]}/report.html",
+                             _student_report_html(student_name, check_results[student_name],
+                                                  charts_by_student[student_name], failures_by_student[student_name]))
+            _advance()
+
+        archive.writestr("index.html", _index_html(
+            folders, {student_name: len(charts) for student_name, charts in charts_by_student.items()}))
+        _advance()
+
+    stats["seconds"] = time.perf_counter() - started_at
+    return zip_path, stats
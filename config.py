@@ -0,0 +1,21 @@
+import os
+
+from app_logging import get_logger
+
+logger = get_logger("config")
+
+# --- 环境变量中的数值配置 ---
+# 各模块的 CLASSMATCH_* 数值配置（并发上限、阈值、间隔秒数等）统一由 env_number 读取：
+# 未设置时使用默认值；无法解析时记录警告并使用默认值，不让一个写错的变量阻止服务启动。
+
+
+def env_number(name, default, minimum=0, cast=float):
+    """读取数值环境变量 name，按 cast（int 或 float）解析，结果不小于 minimum；未设置或无效时返回 default。"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return max(minimum, cast(value))
+    except ValueError:
+        logger.warning("Invalid %s=%r, using %s.", name, value, default)
+        return default
@@ -0,0 +1,96 @@
+# --- 详细错误报告 ---
+# 把 checker.check_paper 输出的详细错误列表整理成 Markdown。每种错误类型对应一个格式化函数（模块级表，
+# 批量生成报告时共用），各行先收集到列表里最后一次性 join，报告耗时与错误条数成线性关系。
+
+
+def _format_textbox(err, message):
+    field_label = err.get('field_label', '未知字段').strip('：')
+    return f"- **'{field_label}'** 填写错误: 您的答案是 `{err['user_value']}`，标准答案是 `{err['answer_value']}`"
+
+
+def _format_dataframe_cell(err, message):
+    col_header = err.get('col_header', f"列 {err.get('col', -1)}")
+    return (f"- **表格错误** (行 {err.get('row', -1)}, {col_header}): {message} "
+            f"您的答案是 `{err['user_value']}`，标准答案是 `{err['answer_value']}`")
+
+
+def _format_dataframe_duplicate(err, message):
+    col_header = err.get('col_header', f"列 {err.get('col', -1)}")
+    return f"- **表格错误** (行 {err.get('row', -1)}, {col_header}): 值 `{err.get('user_value', 'N/A')}` {message}"
+
+
+def _format_dropdown(err, message):
+    field_label = err.get('field_label', '未知下拉项').strip('：')
+    return f"- **'{field_label}'** 选择错误: 您的选择是 `{err['user_value']}`，标准答案是 `{err['answer_value']}`"
+
+
+def _format_row_count_mismatch(err, message):
+    return f"- **表格行数错误**: {message} (您的行数: {err['user_value']}, 正确行数: {err['answer_value']})"
+
+
+def _format_column_count_mismatch(err, message):
+    return f"- **表格列数错误** (行 {err.get('row', -1)}): {message}"
+
+
+def _format_frequency_logic_error(err, message):
+    row_idx = err.get('row', -1)
+    if 'user_value_ul_end' not in err:
+        return f"- **频率逻辑错误** (行 {row_idx}): {message}"
+    ul_end_header = err.get('col_header_ul_end', '上行终止频率')
+    dl_start_header = err.get('col_header_dl_start', '下行起始频率')
+    return (f"- **频率逻辑错误** (行 {row_idx}, {ul_end_header} vs {dl_start_header}): {message} "
+            f"(您的上行终止频率: `{err.get('user_value_ul_end', 'N/A')}`, "
+            f"下行起始频率: `{err.get('user_value_dl_start', 'N/A')}`)")
+
+
+def _format_bandwidth_rate_mismatch(err, message):
+    return (f"- **带宽与速率不匹配错误** (行 {err.get('row', -1)}, 速率: `{err.get('user_value_rate', 'N/A')}`, "
+            f"带宽: `{err.get('user_value_bandwidth', 'N/A')}`): {message}")
+
+
+def _message_only(prefix):
+    def _format(err, message):
+        return f"- **{prefix}**: {message}"
+    return _format
+
+
+# 错误类型 -> 格式化函数 (err, message) -> 一行 Markdown；未登记的类型不输出
+ERROR_FORMATTERS = {
+    'textbox': _format_textbox,
+    'dataframe_cell': _format_dataframe_cell,
+    'dataframe_duplicate': _format_dataframe_duplicate,
+    'dropdown': _format_dropdown,
+    'row_count_mismatch': _format_row_count_mismatch,
+    'column_count_mismatch': _format_column_count_mismatch,
+    'dataframe_format_error': _message_only("表格格式错误"),
+    'data_type_error': _message_only("数据类型错误"),
+    'logic_check_failed': _message_only("逻辑检查失败"),
+    'frequency_logic_error': _format_frequency_logic_error,
+    'bandwidth_rate_mismatch': _format_bandwidth_rate_mismatch,
+    'kbp_load_error': _message_only("配置错误"),
+    'unsupported_check_type': _message_only("不支持的检查类型"),
+}
+
+
+def format_detailed_errors_markdown(detailed_errors, error_sections_with_counts):
+    """生成“详细错误列表” Markdown，按部分分组，部分顺序与错误首次出现的顺序一致。"""
+    if not detailed_errors:
+        if not any(isinstance(count, int) and count > 0 for _, count in error_sections_with_counts):
+            return "### 详细错误列表\n\n恭喜，答卷主要内容正确，没有详细错误信息需要列出。"
+        return "### 详细错误列表\n\n未能获取详细错误信息（可能由于答卷格式错误导致无法解析或无需提供）。"
+
+    lines_by_section = {}
+    for err in detailed_errors:
+        section_lines = lines_by_section.setdefault(err.get('section_title', '未知部分'), [])
+        formatter = ERROR_FORMATTERS.get(err.get('type'))
+        if formatter is not None:
+            section_lines.append(formatter(err, err.get('message', '无具体错误描述。')))
+
+    parts = ["### 详细错误列表\n\n"]
+    for section_title, section_lines in lines_by_section.items():
+        parts.append(f"#### {section_title}\n\n")
+        if section_lines:
+            parts.append("\n".join(section_lines))
+            parts.append("\n")
+        parts.append("\n")
+    return "".join(parts)
@@ -0,0 +1,121 @@
+import html
+import threading
+from collections import Counter, namedtuple
+
+from recommendations import get_study_recommendation
+
+# --- 全班错误趋势 ---
+# 按 (答卷部分, 错误类型, 错误代码) 统计“最近一次检查中出现该错误的学生人数”。
+# 每次保存检查结果时先减去该学生上一次的错误集合再加上新的集合，更新代价只与本次错误条数有关；
+# 计数有变化时版本号加一，轮询的看板发现版本号未变即可跳过重新渲染。
+
+# version: 单调递增的版本号；student_count: 有检查结果的学生数；counts: {(部分, 类型, 代码): 学生人数}
+ErrorTrendSnapshot = namedtuple("ErrorTrendSnapshot", ["version", "student_count", "counts"])
+
+ERROR_TYPE_LABELS = {
+    'dataframe_cell': "取值错误",
+    'dataframe_duplicate': "重复值",
+    'dataframe_format_error': "表格格式",
+    'data_type_error': "数据类型",
+    'logic_check_failed': "逻辑检查",
+    'frequency_logic_error': "频率逻辑",
+    'bandwidth_rate_mismatch': "带宽速率",
+    'row_count_mismatch': "行数",
+    'column_count_mismatch': "列数",
+    'textbox': "填空",
+    'dropdown': "选择",
+    'kbp_load_error': "配置",
+    'unsupported_check_type': "检查类型",
+}
+
+_TOP_ERRORS_LIMIT = 10
+
+
+def error_keys(detailed_errors):
+    """一次检查结果中出现的错误键集合；没有错误代码的旧版错误以空字符串作为代码。"""
+    return frozenset((err.get('section_title') or "", err.get('type') or "", err.get('code') or "")
+                     for err in detailed_errors)
+
+
+class ErrorTrends:
+    """进程内的错误趋势计数器，线程安全。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys_by_student = {}
+        self._counts = Counter()
+        self._version = 0
+
+    def record(self, student_name, detailed_errors):
+        keys = error_keys(detailed_errors)
+        with self._lock:
+            previous = self._keys_by_student.get(student_name)
+            self._keys_by_student[student_name] = keys
+            if previous == keys:
+                return
+            for key in previous or ():
+                self._counts[key] -= 1
+                if self._counts[key] <= 0:
+                    del self._counts[key]
+            self._counts.update(keys)
+            self._version += 1
+
+    def version(self):
+        return self._version
+
+    def snapshot(self):
+        with self._lock:
+            return ErrorTrendSnapshot(self._version, len(self._keys_by_student), dict(self._counts))
+
+
+def format_error_heatmap_html(snapshot):
+    """答卷部分 × 错误类型的热力表（单元格为出错学生人数），以及出错人数最多的具体错误。"""
+    if not snapshot.counts:
+        return (f"<p>共 {snapshot.student_count} 名学生有检查结果，"
+                "目前没有学生存在错误。</p>" if snapshot.student_count else "<p>暂无检查结果。</p>")
+
+    cells = Counter()
+    codes_by_cell = {}
+    for (section, error_type, code), students in snapshot.counts.items():
+        # 同一类型下的多个错误代码可能来自同一批学生，单元格取其中出错人数最多的一项，不重复累加
+        cells[(section, error_type)] = max(cells[(section, error_type)], students)
+        codes_by_cell.setdefault((section, error_type), []).append((students, code))
+
+    sections = sorted({section for section, _ in cells})
+    type_totals = Counter()
+    for (_, error_type), students in cells.items():
+        type_totals[error_type] += students
+    error_types = [error_type for error_type, _ in type_totals.most_common()]
+    peak = max(cells.values())
+
+    parts = [f"<p>共 {snapshot.student_count} 名学生有检查结果；单元格为最近一次检查中出现该类错误的学生人数，"
+             "悬停可查看具体错误代码。</p>",
+             "<table style=\"border-collapse: collapse; text-align: center;\"><tr><th></th>"]
+    parts.extend(f"<th style=\"padding: 4px 8px;\">{html.escape(ERROR_TYPE_LABELS.get(t, t))}</th>"
+                 for t in error_types)
+    parts.append("</tr>")
+    for section in sections:
+        parts.append(f"<tr><th style=\"padding: 4px 8px; text-align: left;\">{html.escape(section)}</th>")
+        for error_type in error_types:
+            students = cells.get((section, error_type), 0)
+            if not students:
+                parts.append("<td style=\"padding: 4px 8px; border: 1px solid #ddd;\"></td>")
+                continue
+            tooltip = "\n".join(f"{code or '（无代码）'}: {count} 人"
+                                for count, code in sorted(codes_by_cell[(section, error_type)], reverse=True))
+            alpha = 0.15 + 0.85 * students / peak
+            parts.append(f"<td title=\"{html.escape(tooltip)}\" style=\"padding: 4px 8px; border: 1px solid #ddd; "
+                         f"background: rgba(220, 53, 69, {alpha:.2f});\">{students}</td>")
+        parts.append("</tr>")
+    parts.append("</table>")
+
+    top_errors = sorted(snapshot.counts.items(), key=lambda item: (-item[1], item[0]))[:_TOP_ERRORS_LIMIT]
+    parts.append("<h4>出错人数最多的错误</h4><ol>")
+    for (section, error_type, code), students in top_errors:
+        label = f"<b>{students} 人</b> · {html.escape(section)} · {html.escape(ERROR_TYPE_LABELS.get(error_type, error_type))}"
+        if code:
+            recommendation = get_study_recommendation({'section_title': section, 'type': error_type, 'code': code})
+            label += f" · <code>{html.escape(code)}</code><br>{html.escape(recommendation)}"
+        parts.append(f"<li>{label}</li>")
+    parts.append("</ol>")
+    return "".join(parts)
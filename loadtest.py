@@ -0,0 +1,490 @@
+"""
+本地压测：启动 classMatch 服务，模拟整班学生通过 Gradio 客户端接口并发作答，
+统计各事件的响应时间分位数（p50 / p95 / p99）以及服务端 CPU 与内存占用，用于课前估算硬件与发现性能回退。
+
+    python loadtest.py --students 40                    # 单进程启动 paper.py
+    python loadtest.py --students 40 --workers 4        # 通过 serve.py 多进程启动
+    python loadtest.py --url http://127.0.0.1:7860/     # 压测已在运行的服务（不采集服务端资源）
+    python loadtest.py --students 40 --json result.json # 另存结果，便于与之前的结果对比
+
+每位学生的流程（每轮）：填写答卷（思考时间）-> 提交答卷（process_submission，随后界面自动刷新该生雷达图）
+-> 切换下拉框查看一位已提交同学（提交时下拉框中的名单）的雷达图（view_student_radar）-> 查看总体能力对比图（view_overall_radar）
+-> 完成随堂测试（submit_quiz）。两步之间的思考时间服从指数分布，平均值由 --think-time 指定。
+客户端不下载服务端生成的图片文件，统计的是服务端处理事件的耗时。
+结束时读取服务端 /metrics 中的降级响应计数（提交高峰时跳过图片的响应数，见 paper._admit_chart），
+例如 --think-time 0 --fill-time 0 --ramp-up 0 的集中提交应当触发降级；多进程时只反映其中一个 worker。
+
+服务端资源按进程树（含多进程模式下的 worker 与渲染进程）每 --sample-interval 秒从 /proc 采样一次，仅支持 Linux；
+fork 出的进程共享部分内存页，多进程时 RSS 之和会高于实际占用。
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+
+import httpx
+import numpy as np
+from gradio_client import Client
+
+# 统计的事件 -> 对应的 Gradio 接口名称（由事件函数名自动生成，同名函数的第二个事件带 _1 后缀）
+EVENT_ENDPOINTS = {
+    "process_submission": "/process_submission",
+    "view_student_radar": "/view_student_radar",        # 提交后界面自动刷新
+    "switch_student_radar": "/view_student_radar_1",    # 学生切换下拉框
+    "view_overall_radar": "/view_overall_radar",
+    "submit_quiz": "/submit_quiz",
+}
+# 自动刷新与切换下拉框调用的是同一个函数，合并统计
+_EVENT_REPORT_NAMES = {"switch_student_radar": "view_student_radar"}
+REPORTED_EVENTS = ["process_submission", "view_student_radar", "view_overall_radar", "submit_quiz"]
+
+_PERCENTILES = (50, 95, 99)
+# process_submission 的输出中学生下拉框的位置
+_STUDENT_DROPDOWN_OUTPUT = 6
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="模拟整班学生并发作答，压测 classMatch 服务")
+    parser.add_argument("--students", type=int, default=30, help="并发学生数")
+    parser.add_argument("--rounds", type=int, default=1, help="每位学生完整作答的轮数")
+    parser.add_argument("--think-time", type=float, default=2.0, help="两步操作之间的平均思考时间（秒），0 表示不等待")
+    parser.add_argument("--fill-time", type=float, default=10.0, help="填写一份答卷的平均时间（秒）")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="所有学生在这段时间内陆续开始（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="答卷中每个数值单元格填错的概率")
+    parser.add_argument("--url", help="压测已在运行的服务，不再启动本地服务")
+    parser.add_argument("--workers", type=int, default=1, help="本地服务的 worker 进程数，大于 1 时通过 serve.py 启动")
+    parser.add_argument("--startup-timeout", type=float, default=180.0, help="等待本地服务启动的最长时间（秒）")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="服务端资源采样间隔（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，固定后每次生成相同的答卷与操作间隔")
+    parser.add_argument("--json", dest="json_path", help="把结果另存为 JSON 文件")
+    return parser.parse_args()
+
+
+# --- 本地服务 ---
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers, state_dir):
+    """在空闲端口上启动本地服务，返回 (进程, URL, 日志文件路径)。"""
+    port = _free_port()
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    log_path = os.path.join(state_dir, "server.log")
+    env = dict(os.environ)
+    # 服务的状态（SQLite 数据库或检查点）都放在本次压测的临时目录，不覆盖正式部署的数据
+    env["CLASSMATCH_CHECKPOINT_PATH"] = os.path.join(state_dir, "state.ckpt")
+    if workers > 1:
+        command = [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1",
+                   "--port", str(port), "--state-db", os.path.join(state_dir, "state.db")]
+    else:
+        command = [sys.executable, "paper.py"]
+        env["GRADIO_SERVER_NAME"] = "127.0.0.1"
+        env["GRADIO_SERVER_PORT"] = str(port)
+    with open(log_path, "wb") as log_file:
+        # 单独的进程组，结束时连同 worker 与渲染进程一起终止
+        process = subprocess.Popen(command, cwd=repo_dir, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+                                   start_new_session=True)
+    return process, f"http://127.0.0.1:{port}/", log_path
+
+
+def _wait_until_ready(url, process, timeout):
+    # 等待 /readyz 返回 200（服务完成启动预热）；没有该接口的旧版本服务以首页可访问为准
+    readyz_url = url.rstrip("/") + "/readyz"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"服务启动失败（退出码 {process.returncode}）")
+        try:
+            with urllib.request.urlopen(readyz_url, timeout=2):
+                return
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                readyz_url = url
+            time.sleep(0.5)
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"服务在 {timeout:.0f} 秒内未就绪")
+
+
+def _stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=15)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+# --- 服务端资源采样 ---
+
+class ResourceSampler:
+    """后台线程按进程树采样 CPU 占用（百分比，100% 为一个核）与 RSS（MB）。"""
+
+    def __init__(self, root_pid, interval):
+        self._root_pid = root_pid
+        self._interval = interval
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self.cpu_percent = []
+        self.rss_mb = []
+
+    def _process_tree(self):
+        children = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as stat_file:
+                    # comm 字段可能含空格，从最后一个右括号之后开始解析
+                    fields = stat_file.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        pids, stack = [], [self._root_pid]
+        while stack:
+            pid = stack.pop()
+            pids.append(pid)
+            stack.extend(children.get(pid, ()))
+        return pids
+
+    def _totals(self):
+        cpu_ticks, rss_pages = 0, 0
+        for pid in self._process_tree():
+            try:
+                with open(f"/proc/{pid}/stat") as stat_file:
+                    fields = stat_file.read().rsplit(")", 1)[1].split()
+                with open(f"/proc/{pid}/statm") as statm_file:
+                    rss_pages += int(statm_file.read().split()[1])
+            except OSError:
+                continue
+            # utime 与 stime（stat 的第 14、15 个字段）
+            cpu_ticks += int(fields[11]) + int(fields[12])
+        return cpu_ticks / self._clock_ticks, rss_pages * self._page_size / 1024 / 1024
+
+    def _run(self):
+        last_cpu, _ = self._totals()
+        last_time = time.monotonic()
+        while not self._stop.wait(self._interval):
+            cpu_seconds, rss_mb = self._totals()
+            now = time.monotonic()
+            # 两次采样之间退出的子进程的 CPU 时间无法计入，此时差值可能为负
+            self.cpu_percent.append(max(0.0, (cpu_seconds - last_cpu) / (now - last_time) * 100))
+            self.rss_mb.append(rss_mb)
+            last_cpu, last_time = cpu_seconds, now
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        if not self.cpu_percent:
+            return None
+        return {
+            "cpu_percent_mean": float(np.mean(self.cpu_percent)),
+            "cpu_percent_peak": float(np.max(self.cpu_percent)),
+            "rss_mb_mean": float(np.mean(self.rss_mb)),
+            "rss_mb_peak": float(np.max(self.rss_mb)),
+            "samples": len(self.cpu_percent),
+        }
+
+
+# --- 模拟学生 ---
+
+class LatencyRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {event: [] for event in REPORTED_EVENTS}
+        self.errors = {event: 0 for event in REPORTED_EVENTS}
+        self.error_samples = {}
+
+    def record(self, event, seconds, error=None):
+        event = _EVENT_REPORT_NAMES.get(event, event)
+        with self._lock:
+            if error is None:
+                self.latencies[event].append(seconds)
+            else:
+                self.errors[event] += 1
+                self.error_samples.setdefault(event, repr(error))
+
+
+def _maybe_wrong(rng, value, error_rate):
+    return "x" if rng.random() < error_rate else value
+
+
+def _fill_table(default_value, rows):
+    """按界面中的表头与预填的名称列填写表格。"""
+    data = [list(row) for row in default_value["data"]]
+    for row, values in zip(data, rows):
+        row[len(row) - len(values):] = values
+    return {"headers": default_value["headers"], "data": data, "metadata": None}
+
+
+def _submission_args(rng, student_name, defaults, error_rate):
+    """生成一份答卷：以标准答案为基础，每个数值单元格以 error_rate 的概率填错。"""
+    def wrong(value):
+        return _maybe_wrong(rng, value, error_rate)
+
+    args = list(defaults)
+    args[0] = student_name
+    args[1] = str(rng.randint(1, 20))
+    args[2] = f"网络{rng.randint(1, 5)}"
+    stations = [[f"单位{i}", f"站{i}", "固定站", f"地址{i}", "北京", f"{i}" * 4]
+                for i in range(1, len(defaults[3]["data"]) + 1)]
+    args[3] = _fill_table(defaults[3], stations)
+    args[4] = _fill_table(defaults[4], [["卫星1", wrong("12.3"), wrong("12.5"), wrong("14.05"), wrong("14.25")]])
+    args[5] = _fill_table(defaults[5], [[wrong("9.6"), wrong("100"), wrong("14.1"), wrong("12.35")],
+                                        [wrong("9.6"), wrong("100"), wrong("14.2"), wrong("12.45")]])
+    args[6] = _fill_table(defaults[6], [["固定站", f"地址{i}", wrong(str(i)), f"1380000000{i}", f"{i}" * 4]
+                                        for i in range(1, len(defaults[6]["data"]) + 1)])
+    args[7] = "1"
+    args[8] = "2"
+    args[9] = _fill_table(defaults[9], [[wrong("64"), wrong("84"), "12.3", "12.35", "14.05", "14.1"],
+                                        [wrong("128"), wrong("168"), "12.4", "12.45", "14.15", "14.2"]])
+    args[10] = _fill_table(defaults[10], [[wrong("100"), "12.3", "12.4", "14.05", "14.15"]])
+    args[11] = "uu"
+    for i in range(12, len(args)):
+        args[i] = rng.choice([None, rng.randint(60, 100)])
+    return args
+
+
+def _dropdown_choices(submission_result):
+    """提交后下拉框更新为当时已提交的学生名单；浏览器中的学生只能从这份名单中选择。"""
+    try:
+        return [value for _, value in submission_result[_STUDENT_DROPDOWN_OUTPUT]["choices"]]
+    except (TypeError, KeyError, IndexError, ValueError):
+        return []
+
+
+def _think(rng, mean_seconds):
+    if mean_seconds > 0:
+        time.sleep(min(rng.expovariate(1 / mean_seconds), mean_seconds * 5))
+
+
+class StudentSession:
+    """
+    一位学生的浏览器会话。事件按浏览器的方式调用：启用队列的事件经 Gradio 客户端的队列协议，
+    未启用队列的事件（多进程模式）直接 POST /run/<接口名>——队列协议的加入与结果流是两个请求，
+    多进程时可能落到不同 worker 上。
+    """
+
+    def __init__(self, url):
+        self.client = Client(url, verbose=False, download_files=False)
+        self._queued = {f"/{dependency['api_name']}" for dependency in self.client.config["dependencies"]
+                        if dependency.get("api_name") and dependency.get("queue") is not False}
+        self._run_url = url.rstrip("/") + self.client.config.get("api_prefix", "") + "/run"
+        self._http = httpx.Client(timeout=300)
+
+    def predict(self, api_name, *args):
+        if api_name in self._queued:
+            return self.client.predict(*args, api_name=api_name)
+        response = self._http.post(self._run_url + api_name,
+                                   json={"data": list(args), "session_hash": self.client.session_hash})
+        body = response.json()
+        if response.status_code != 200 or "error" in body:
+            raise RuntimeError(f"HTTP {response.status_code}: {body.get('error') or body}")
+        return tuple(body["data"])
+
+    def close(self):
+        self._http.close()
+
+
+def _call(session, recorder, event, *args):
+    started_at = time.perf_counter()
+    try:
+        result = session.predict(EVENT_ENDPOINTS[event], *args)
+    except Exception as e:
+        recorder.record(event, time.perf_counter() - started_at, error=e)
+        return None
+    recorder.record(event, time.perf_counter() - started_at)
+    return result
+
+
+def _simulate_student(index, url, args, api_info, recorder):
+    rng = random.Random(args.seed * 100003 + index)
+    student_name = f"压测学生{index + 1:03d}"
+    time.sleep(rng.uniform(0, args.ramp_up) if args.ramp_up > 0 else 0)
+    try:
+        session = StudentSession(url)
+    except Exception as e:
+        print(f"Warning: Student {student_name} could not connect: {e}")
+        return
+
+    submission_defaults = [p.get("parameter_default")
+                           for p in api_info["named_endpoints"][EVENT_ENDPOINTS["process_submission"]]["parameters"]]
+    quiz_choices = [p["type"]["enum"]
+                    for p in api_info["named_endpoints"][EVENT_ENDPOINTS["submit_quiz"]]["parameters"]]
+
+    try:
+        _run_rounds(rng, session, args, student_name, submission_defaults, quiz_choices, recorder)
+    finally:
+        session.close()
+
+
+def _run_rounds(rng, session, args, student_name, submission_defaults, quiz_choices, recorder):
+    student_choices = []
+    for _ in range(args.rounds):
+        _think(rng, args.fill_time)
+        submission_result = _call(session, recorder, "process_submission",
+                                  *_submission_args(rng, student_name, submission_defaults, args.error_rate))
+        if submission_result is not None:
+            student_choices = _dropdown_choices(submission_result) or [student_name]
+            _call(session, recorder, "view_student_radar", student_name)
+
+        if student_choices:
+            _think(rng, args.think_time)
+            _call(session, recorder, "switch_student_radar", rng.choice(student_choices))
+
+        _think(rng, args.think_time)
+        _call(session, recorder, "view_overall_radar", student_name)
+
+        _think(rng, args.think_time)
+        _call(session, recorder, "submit_quiz", *[rng.choice(choices) for choices in quiz_choices])
+
+
+def _check_endpoints(api_info):
+    missing = [api_name for api_name in EVENT_ENDPOINTS.values() if api_name not in api_info["named_endpoints"]]
+    if missing:
+        raise RuntimeError(f"服务缺少以下接口（paper.py 中的事件名称可能已变化）: {', '.join(missing)}")
+
+
+# --- 结果汇总 ---
+
+_DEGRADED_SAMPLE = re.compile(r'^classmatch_degraded_responses_total\{(?P<labels>[^}]*)\} (?P<value>\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def _fetch_degraded_responses(url):
+    """读取服务端 /metrics 中的降级响应计数，返回 {"事件/原因": 次数}；服务没有 /metrics 时返回 None。"""
+    try:
+        with urllib.request.urlopen(url.rstrip("/") + "/metrics", timeout=5) as response:
+            text = response.read().decode("utf-8")
+    except OSError:
+        return None
+    degraded = {}
+    for line in text.splitlines():
+        match = _DEGRADED_SAMPLE.match(line)
+        if match:
+            labels = dict(_LABEL.findall(match.group("labels")))
+            degraded[f"{labels.get('event', '')}/{labels.get('reason', '')}"] = int(float(match.group("value")))
+    return degraded
+
+
+def _summarize(recorder, elapsed_seconds, resources):
+    events = {}
+    for event in REPORTED_EVENTS:
+        latencies = np.array(recorder.latencies[event]) * 1000
+        summary = {"count": int(latencies.size), "errors": recorder.errors[event],
+                   "throughput_per_second": latencies.size / elapsed_seconds if elapsed_seconds > 0 else 0.0}
+        if latencies.size:
+            summary.update({f"p{p}_ms": float(v) for p, v in zip(_PERCENTILES, np.percentile(latencies, _PERCENTILES))})
+            summary["max_ms"] = float(latencies.max())
+        if event in recorder.error_samples:
+            summary["error_sample"] = recorder.error_samples[event]
+        events[event] = summary
+    return {"elapsed_seconds": elapsed_seconds, "events": events, "server": resources}
+
+
+def _print_summary(result, args):
+    print(f"\n{args.students} 名学生 × {args.rounds} 轮，耗时 {result['elapsed_seconds']:.1f} 秒")
+    print(f"{'事件':<22}{'次数':>6}{'失败':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'次/秒':>8}")
+    for event, summary in result["events"].items():
+        percentiles = "".join(f"{summary.get(key, float('nan')):>10.0f}"
+                              for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"))
+        print(f"{event:<22}{summary['count']:>6}{summary['errors']:>6}{percentiles}"
+              f"{summary['throughput_per_second']:>8.2f}")
+    for event, summary in result["events"].items():
+        if "error_sample" in summary:
+            print(f"  {event} 失败示例: {summary['error_sample'][:300]}")
+
+    degraded = result.get("degraded_responses")
+    if degraded is not None:
+        counts = "，".join(f"{key} {count}" for key, count in sorted(degraded.items()))
+        print(f"降级响应（跳过图片）: {counts or '无'}")
+
+    server = result["server"]
+    if server:
+        print(f"服务端 CPU: 平均 {server['cpu_percent_mean']:.0f}%，峰值 {server['cpu_percent_peak']:.0f}%"
+              f"（100% 为一个核，共 {os.cpu_count()} 核）；"
+              f"RSS: 平均 {server['rss_mb_mean']:.0f} MB，峰值 {server['rss_mb_peak']:.0f} MB")
+    else:
+        print("未采集服务端资源（压测外部服务或非 Linux 平台）。")
+
+
+def main():
+    args = _parse_args()
+    process = None
+    sampler = None
+    state_dir = tempfile.mkdtemp(prefix="classmatch_loadtest_")
+    completed = False
+    try:
+        if args.url:
+            url = args.url
+        else:
+            process, url, log_path = _start_server(args.workers, state_dir)
+            print(f"Starting local server at {url} (log: {log_path})")
+        started_at = time.monotonic()
+        _wait_until_ready(url, process, args.startup_timeout)
+        print(f"Server ready after {time.monotonic() - started_at:.1f}s")
+
+        api_info = Client(url, verbose=False, download_files=False).view_api(return_format="dict", print_info=False)
+        _check_endpoints(api_info)
+
+        if process is not None and os.path.isdir("/proc"):
+            sampler = ResourceSampler(process.pid, args.sample_interval)
+            sampler.start()
+
+        recorder = LatencyRecorder()
+        threads = [threading.Thread(target=_simulate_student,
+                                    args=(i, url, args, api_info, recorder), daemon=True)
+                   for i in range(args.students)]
+        load_started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed_seconds = time.perf_counter() - load_started_at
+
+        if sampler is not None:
+            sampler.stop()
+        result = _summarize(recorder, elapsed_seconds, sampler.summary() if sampler is not None else None)
+        result["degraded_responses"] = _fetch_degraded_responses(url)
+        result["config"] = {key: value for key, value in vars(args).items() if key != "json_path"}
+        _print_summary(result, args)
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as json_file:
+                json.dump(result, json_file, ensure_ascii=False, indent=2)
+            print(f"Results saved to {args.json_path}")
+        completed = True
+    finally:
+        if process is not None:
+            _stop_server(process)
+        # 临时目录存放服务日志、检查点与 SQLite 数据库：压测正常结束时删除，出错时保留以便查看服务日志
+        if completed or args.url:
+            shutil.rmtree(state_dir, ignore_errors=True)
+        else:
+            print(f"Server log and state kept in {state_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import gc
+import os
+import sys
+import time
+import ctypes
+import threading
+
+from app_logging import get_logger, fields
+from config import env_number
+
+logger = get_logger("memory_watchdog")
+
+# --- 内存看门狗 ---
+# 服务要连续运行数天，后台线程每隔 CLASSMATCH_WATCHDOG_INTERVAL_SECONDS 秒采样一次：
+#   * 本进程的常驻内存（RSS）与 pyplot 图形管理器中打开的图形数；
+#   * 渲染进程池各子进程的 RSS。
+# 采样结果作为 gauge 写入 /metrics，并在管理页展示。超出阈值时：
+#   * 打开的图形超过 CLASSMATCH_OPEN_FIGURES_LIMIT：全部关闭（绘图函数不经过 pyplot 创建图形，
+#     出现在 pyplot 中的图形都是别处遗留的）；
+#   * 本进程 RSS 超过 CLASSMATCH_RSS_LIMIT_MB：依次调用注册的缓存清理函数，回收循环引用，
+#     并让 glibc 把空闲内存归还给操作系统（malloc_trim）；
+#   * 渲染子进程 RSS 超过 CLASSMATCH_RENDER_WORKER_RSS_LIMIT_MB：换用新的渲染进程池。
+# 清理后 _TRIM_COOLDOWN_SECONDS 秒内不再重复清理，避免常驻数据本身超限时每次采样都清空缓存。
+# RSS 读取 /proc，仅在 Linux 上可用；其他平台只检查打开的图形数。
+
+WATCHDOG_INTERVAL_ENV = "CLASSMATCH_WATCHDOG_INTERVAL_SECONDS"
+RSS_LIMIT_ENV = "CLASSMATCH_RSS_LIMIT_MB"
+RENDER_WORKER_RSS_LIMIT_ENV = "CLASSMATCH_RENDER_WORKER_RSS_LIMIT_MB"
+OPEN_FIGURES_LIMIT_ENV = "CLASSMATCH_OPEN_FIGURES_LIMIT"
+
+_DEFAULT_INTERVAL_SECONDS = 60
+_DEFAULT_RSS_LIMIT_MB = 1024
+_DEFAULT_RENDER_WORKER_RSS_LIMIT_MB = 512
+_DEFAULT_OPEN_FIGURES_LIMIT = 10
+_TRIM_COOLDOWN_SECONDS = 300
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_libc = None
+
+
+def read_rss_bytes(pid="self"):
+    """进程的常驻内存字节数；无法读取（非 Linux 或进程已退出）时返回 None。"""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def open_figure_count():
+    """pyplot 图形管理器中打开的图形数；本进程未导入 pyplot 时为 0。"""
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    return len(pyplot.get_fignums()) if pyplot is not None else 0
+
+
+def _close_open_figures():
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is None:
+        return 0
+    count = len(pyplot.get_fignums())
+    pyplot.close("all")
+    return count
+
+
+def _release_free_heap():
+    """让 glibc 把空闲的堆内存归还给操作系统；其他 C 库上什么也不做。"""
+    global _libc
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL("libc.so.6")
+        _libc.malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _mb(value):
+    return "-" if value is None else f"{value / 1024 / 1024:.1f}"
+
+
+class MemoryWatchdog:
+    """
+    定期采样内存与打开的图形数并在超限时清理。register_trimmer(name, fn) 注册缓存清理函数，
+    fn() 返回清除的条目数（可为 None）。后台线程在 start() 时启动；fork 出的子进程中需再次调用 start()。
+    """
+
+    def __init__(self, metrics, render_service=None):
+        self._metrics = metrics
+        self._render_service = render_service
+        self._interval_seconds = env_number(WATCHDOG_INTERVAL_ENV, _DEFAULT_INTERVAL_SECONDS)
+        self._rss_limit_bytes = env_number(RSS_LIMIT_ENV, _DEFAULT_RSS_LIMIT_MB) * 1024 * 1024
+        self._worker_rss_limit_bytes = (env_number(RENDER_WORKER_RSS_LIMIT_ENV, _DEFAULT_RENDER_WORKER_RSS_LIMIT_MB)
+                                        * 1024 * 1024)
+        self._open_figures_limit = env_number(OPEN_FIGURES_LIMIT_ENV, _DEFAULT_OPEN_FIGURES_LIMIT)
+        self._trimmers = []
+        self._lock = threading.Lock()
+        self._thread_pid = None
+        self._last_trim_at = None
+        self._last_worker_recycle_at = None
+
+    def register_trimmer(self, name, trim_fn):
+        self._trimmers.append((name, trim_fn))
+
+    def start(self):
+        """启动后台采样线程（每个进程一个）；间隔设为 0 时不启动。"""
+        if not self._interval_seconds:
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="memory-watchdog", daemon=True).start()
+        logger.info("Memory watchdog started.", extra=fields(
+            interval=self._interval_seconds, rss_limit_mb=_mb(self._rss_limit_bytes),
+            open_figures_limit=int(self._open_figures_limit)))
+
+    def _run(self):
+        while True:
+            time.sleep(self._interval_seconds)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error("Memory watchdog check failed: %s", e)
+
+    def sample(self):
+        """{rss_bytes, open_figures, render_workers: {pid: rss_bytes}}，并更新 /metrics 中的 gauge。"""
+        worker_pids = self._render_service.worker_pids() if self._render_service is not None else []
+        sample = {
+            "rss_bytes": read_rss_bytes(),
+            "open_figures": open_figure_count(),
+            "render_workers": {pid: read_rss_bytes(pid) for pid in worker_pids},
+        }
+        if sample["rss_bytes"] is not None:
+            self._metrics.set_gauge("classmatch_memory_rss_bytes", sample["rss_bytes"],
+                                    "Resident memory of this server process.", pid=os.getpid())
+        self._metrics.set_gauge("classmatch_open_figures", sample["open_figures"],
+                                "Figures open in the pyplot figure manager of this process.", pid=os.getpid())
+        self._metrics.replace_gauges("classmatch_render_worker_rss_bytes",
+                                     "Resident memory of each render worker process.",
+                                     [({"pid": pid}, rss) for pid, rss in sample["render_workers"].items()
+                                      if rss is not None])
+        return sample
+
+    def check(self):
+        """采样一次并在超出阈值时清理，返回采样结果。"""
+        sample = self.sample()
+        now = time.monotonic()
+
+        if self._open_figures_limit and sample["open_figures"] > self._open_figures_limit:
+            closed = _close_open_figures()
+            self._metrics.inc_counter("classmatch_leaked_figures_closed_total",
+                                      "Figures left open in pyplot and closed by the memory watchdog.", closed)
+            logger.warning("Closed %d figures left open in pyplot.", closed)
+
+        rss = sample["rss_bytes"]
+        if (self._rss_limit_bytes and rss is not None and rss > self._rss_limit_bytes
+                and self._cooled_down(self._last_trim_at, now)):
+            self._last_trim_at = now
+            self.trim(reason="rss_limit")
+
+        oversized = [pid for pid, worker_rss in sample["render_workers"].items()
+                     if worker_rss is not None and worker_rss > self._worker_rss_limit_bytes]
+        if (self._worker_rss_limit_bytes and oversized
+                and self._cooled_down(self._last_worker_recycle_at, now)):
+            self._last_worker_recycle_at = now
+            logger.warning("Recycling render workers over the memory limit.", extra=fields(
+                pids=",".join(map(str, oversized)), limit_mb=_mb(self._worker_rss_limit_bytes)))
+            self._render_service.recycle()
+            self._metrics.inc_counter("classmatch_render_worker_recycles_total",
+                                      "Render process pools replaced by the memory watchdog.")
+        return sample
+
+    @staticmethod
+    def _cooled_down(last_at, now):
+        return last_at is None or now - last_at >= _TRIM_COOLDOWN_SECONDS
+
+    def trim(self, reason="manual"):
+        """调用全部缓存清理函数，回收循环引用并归还空闲堆内存，返回 {清理函数名: 清除条目数}。"""
+        rss_before = read_rss_bytes()
+        trimmed = {}
+        for name, trim_fn in self._trimmers:
+            try:
+                trimmed[name] = trim_fn()
+            except Exception as e:
+                logger.error("Cache trimmer %s failed: %s", name, e)
+        gc.collect()
+        _release_free_heap()
+        rss_after = read_rss_bytes()
+        self._metrics.inc_counter("classmatch_memory_trims_total", "Cache trims run by the memory watchdog.",
+                                  reason=reason)
+        logger.warning("Trimmed caches (%s).", reason, extra=fields(
+            rss_before_mb=_mb(rss_before), rss_after_mb=_mb(rss_after),
+            **{f"trimmed_{name}": count for name, count in trimmed.items()}))
+        return trimmed
+
+    def format_markdown(self):
+        """管理页的内存概况。"""
+        sample = self.sample()
+        lines = ["| 进程 | 常驻内存 MB | 阈值 MB |", "|---|---:|---:|",
+                 f"| 服务进程 {os.getpid()} | {_mb(sample['rss_bytes'])} | {_mb(self._rss_limit_bytes)} |"]
+        for pid, rss in sorted(sample["render_workers"].items()):
+            lines.append(f"| 渲染进程 {pid} | {_mb(rss)} | {_mb(self._worker_rss_limit_bytes)} |")
+        lines.append("")
+        lines.append(f"pyplot 中打开的图形：{sample['open_figures']}（超过 {int(self._open_figures_limit)} 时全部关闭）。")
+        if not self._interval_seconds:
+            lines.append(f"后台采样已关闭（{WATCHDOG_INTERVAL_ENV}=0）。")
+        return "\n".join(lines)
@@ -0,0 +1,215 @@
+import os
+import math
+import time
+import bisect
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+# --- 分阶段耗时统计 ---
+# 每个事件（如 process_submission）按阶段计时：耗时记入 Prometheus 风格的直方图（累计分桶 + 总和 + 次数），
+# 阶段内抛出或被捕获的异常记入失败计数。/metrics 以 Prometheus 文本格式输出，管理页展示最近的分位数。
+# 其他模块（如内存看门狗）可通过 set_gauge / inc_counter 附加瞬时值与计数，随 /metrics 一并输出。
+# 统计保存在当前进程内；多进程部署（serve.py）时每个 worker 各自统计，/metrics 返回处理该请求的 worker 的数据。
+
+METRICS_PATH = "/metrics"
+# 默认只允许本机访问 /metrics；设置为 1 时允许任意地址访问（如由其他机器上的 Prometheus 抓取）
+METRICS_ALLOW_REMOTE_ENV = "CLASSMATCH_METRICS_ALLOW_REMOTE"
+
+# 直方图分桶上界（秒）
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 管理页分位数基于每个阶段最近的这么多次耗时
+_RECENT_SAMPLES = 1024
+
+_LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+class _StageStats:
+    def __init__(self):
+        self.bucket_counts = [0] * len(_BUCKETS)
+        self.total_seconds = 0.0
+        self.count = 0
+        self.errors = 0
+        self.recent = deque(maxlen=_RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(_BUCKETS, seconds)
+        if index < len(_BUCKETS):
+            self.bucket_counts[index] += 1
+        self.total_seconds += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+
+def _percentile(sorted_values, percent):
+    """最近邻秩法分位数。"""
+    return sorted_values[max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)]
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class StageMetrics:
+    """按 (事件, 阶段) 统计耗时与失败次数，线程安全。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        # 指标名 -> (类型, 说明, {标签元组: 值})
+        self._series = {}
+        self._started_at = time.time()
+
+    def _stats(self, event, stage):
+        stats = self._stages.get((event, stage))
+        if stats is None:
+            stats = self._stages[(event, stage)] = _StageStats()
+        return stats
+
+    def observe(self, event, stage, seconds):
+        with self._lock:
+            self._stats(event, stage).observe(seconds)
+
+    def count_error(self, event, stage):
+        """记录一次阶段失败；用于阶段内捕获异常后继续执行（只打印错误）的情况。"""
+        with self._lock:
+            self._stats(event, stage).errors += 1
+
+    def _series_values(self, name, kind, help_text):
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = (kind, help_text, {})
+        return series[2]
+
+    def set_gauge(self, name, value, help_text, **labels):
+        """记录瞬时值（如内存占用）；同名指标按标签分别保存。"""
+        with self._lock:
+            self._series_values(name, "gauge", help_text)[tuple(sorted(labels.items()))] = value
+
+    def replace_gauges(self, name, help_text, labelled_values):
+        """用 [(标签 dict, 值)] 整体替换一个指标的全部取值，用于成员会变化的一组进程。"""
+        with self._lock:
+            values = self._series_values(name, "gauge", help_text)
+            values.clear()
+            for labels, value in labelled_values:
+                values[tuple(sorted(labels.items()))] = value
+
+    def inc_counter(self, name, help_text, amount=1, **labels):
+        with self._lock:
+            values = self._series_values(name, "counter", help_text)
+            key = tuple(sorted(labels.items()))
+            values[key] = values.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, event, stage):
+        """为 with 块计时；块内抛出的异常记为一次失败后继续抛出。"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.count_error(event, stage)
+            raise
+        finally:
+            self.observe(event, stage, time.perf_counter() - started_at)
+
+    def timed(self, event, stage="total"):
+        """装饰器：为整个函数计时（保留原函数签名，Gradio 据此识别输入与 gr.Progress 参数）。"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(event, stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary_rows(self):
+        """[(事件, 阶段, 次数, 失败, 平均秒, p50, p95, p99, 最大)]，分位数基于最近的耗时。"""
+        with self._lock:
+            snapshot = [(event, stage, stats.count, stats.errors, stats.total_seconds, sorted(stats.recent))
+                        for (event, stage), stats in self._stages.items()]
+        rows = []
+        for event, stage, count, errors, total_seconds, recent in sorted(snapshot):
+            if recent:
+                percentiles = tuple(_percentile(recent, p) for p in (50, 95, 99)) + (recent[-1],)  # 已排序，末项为最大值
+            else:
+                percentiles = (None, None, None, None)
+            rows.append((event, stage, count, errors, total_seconds / count if count else None) + percentiles)
+        return rows
+
+    def render_prometheus(self):
+        """Prometheus 文本格式（version 0.0.4）。"""
+        with self._lock:
+            snapshot = [(event, stage, list(stats.bucket_counts), stats.total_seconds, stats.count, stats.errors)
+                        for (event, stage), stats in sorted(self._stages.items())]
+            series = [(name, kind, help_text, sorted(values.items()))
+                      for name, (kind, help_text, values) in sorted(self._series.items())]
+
+        lines = ["# HELP classmatch_stage_seconds Time spent in each stage of a UI or API event.",
+                 "# TYPE classmatch_stage_seconds histogram"]
+        for event, stage, bucket_counts, total_seconds, count, _ in snapshot:
+            labels = f"event=\"{_label_value(event)}\",stage=\"{_label_value(stage)}\""
+            cumulative = 0
+            for upper_bound, bucket_count in zip(_BUCKETS, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"classmatch_stage_seconds_bucket{{{labels},le=\"{upper_bound}\"}} {cumulative}")
+            lines.append(f"classmatch_stage_seconds_bucket{{{labels},le=\"+Inf\"}} {count}")
+            lines.append(f"classmatch_stage_seconds_sum{{{labels}}} {total_seconds}")
+            lines.append(f"classmatch_stage_seconds_count{{{labels}}} {count}")
+
+        lines.append("# HELP classmatch_stage_errors_total Failures raised or caught inside each stage.")
+        lines.append("# TYPE classmatch_stage_errors_total counter")
+        for event, stage, _, _, _, errors in snapshot:
+            lines.append(f"classmatch_stage_errors_total{{event=\"{_label_value(event)}\","
+                         f"stage=\"{_label_value(stage)}\"}} {errors}")
+
+        lines.append("# HELP classmatch_process_start_time_seconds Start time of this process since the epoch.")
+        lines.append("# TYPE classmatch_process_start_time_seconds gauge")
+        lines.append(f"classmatch_process_start_time_seconds{{pid=\"{os.getpid()}\"}} {self._started_at}")
+
+        for name, kind, help_text, values in series:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in values:
+                label_text = ",".join(f"{key}=\"{_label_value(label)}\"" for key, label in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def format_metrics_markdown(metrics):
+    """管理页的耗时表（毫秒）。"""
+    rows = metrics.summary_rows()
+    if not rows:
+        return "暂无统计数据。"
+
+    def _ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+    lines = [f"进程 {os.getpid()} 的统计；分位数基于每个阶段最近 {_RECENT_SAMPLES} 次。", "",
+             "| 事件 | 阶段 | 次数 | 失败 | 平均 ms | p50 ms | p95 ms | p99 ms | 最大 ms |",
+             "|---|---|---:|---:|---:|---:|---:|---:|---:|"]
+    for event, stage, count, errors, mean, p50, p95, p99, peak in rows:
+        lines.append(f"| {event} | {stage} | {count} | {errors} | {_ms(mean)} | {_ms(p50)} | {_ms(p95)} | "
+                     f"{_ms(p99)} | {_ms(peak)} |")
+    return "\n".join(lines)
+
+
+def create_metrics_router(metrics):
+    """GET /metrics：Prometheus 文本格式，默认只允许本机访问。"""
+    router = APIRouter()
+    allow_remote = os.environ.get(METRICS_ALLOW_REMOTE_ENV, "0") == "1"
+
+    @router.get(METRICS_PATH, response_class=PlainTextResponse)
+    def get_metrics(request: Request):
+        client_host = request.client.host if request.client else None
+        if not allow_remote and client_host not in _LOOPBACK_HOSTS:
+            raise HTTPException(status_code=403, detail=f"只允许本机访问；设置 {METRICS_ALLOW_REMOTE_ENV}=1 以允许远程抓取。")
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return router
+
+
+METRICS = StageMetrics()
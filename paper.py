@@ -1,32 +1,48 @@
+import time
+
+# 记录本模块的导入耗时，与文件末尾的启动预算比较。gradio 自身的导入（数秒，且不受本项目控制）单独计时，不计入预算
+_IMPORT_STARTED_AT = time.perf_counter()
+
 import gradio as gr
-import pandas as pd
+
+_GRADIO_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED_AT
 import tempfile
 import os
+import threading
 import numpy as np
-import os
 
-print("当前工作目录:", os.getcwd())
-print("文件是否存在:", os.path.exists("static/slide.html"))
-# Import checker.py and analyzer.py functions
+# Import checker.py functions
+# matplotlib、pandas 与中文字体不在此处导入：图表由 render_service 在渲染进程（或后台预热线程）中生成
 from checker import capture_paper_data_string, check_paper, _SUBNET_ID_LABEL, _NETWORK_NAME_LABEL, \
     _LOCAL_CC_ADDRESS_LABEL, _REMOTE_XX_ADDRESS_LABEL, _CHANNEL_TYPE_LABEL, _KBP_MAPPING, _CHANNEL_SUITE_HEADERS
 
-from analyzer import \
-    perform_analysis_and_plot_radar
+from state_store import create_state_stores, STATE_DB_ENV
+from checkpoint import create_checkpointer
+from render_service import RENDER_SERVICE, trim_local_caches
+from recommendations import build_study_route, format_study_route_html
+from error_report import format_detailed_errors_markdown
+from class_export import export_class_reports, clear_chart_cache
+from error_trends import format_error_heatmap_html
+from submission_api import MicroBatcher, create_submission_router
+from metrics import METRICS, create_metrics_router, format_metrics_markdown
+from memory_watchdog import MemoryWatchdog
+from readiness import READINESS, create_readiness_router
+from scheduler import PriorityScheduler, GRADING, QUIZ, ANALYTICS
+from app_logging import get_logger, fields
+from config import env_number
+from svg_radar import attribute_radar_svg, history_radar_svg, comparison_radar_svg, cohort_radar_svg
+
+logger = get_logger("paper")
 
-from person_status import plot_attribute_radar, plot_history_radar, plot_study_route_mindmap, plot_comparison_radar
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
+MAX_SUBMISSIONS_HISTORY = 5
+# 学生人数达到此值时，总体对比图改用分位带概括全班（tab10 配色超过10人即开始重复）
+COHORT_RADAR_MIN_STUDENTS = 11
 
-try:
-    from matplotlib import colormaps as cmaps
-    _use_new_cmaps = True
-except (ImportError, AttributeError):
-    _use_new_cmaps = True
-    print("Warning: Could not import matplotlib.colormaps directly. Falling back to matplotlib.cm or default cycle.")
+# 教师看板仅在打开时轮询，版本号未变时不重新渲染
+DASHBOARD_REFRESH_SECONDS = 5
 
-STUDENT_DATA = {}
-MAX_SUBMISSIONS_HISTORY = 5
+# 多进程部署（serve.py）时各 worker 不共享 Gradio 队列会话，界面事件改为普通请求/响应处理
+EVENT_QUEUE_ENABLED = env_number("CLASSMATCH_WORKERS", 1, minimum=1, cast=int) <= 1
 
 QUIZ_QUESTIONS = [
     {
@@ -61,27 +77,27 @@ QUIZ_QUESTIONS = [
     }
 ]
 
-quiz_stats = {
-    q["id"]: {"correct_count": 0, "total_attempts": 0} for q in QUIZ_QUESTIONS
-}
+STUDENT_DATA, quiz_stats = create_state_stores(MAX_SUBMISSIONS_HISTORY, [q["id"] for q in QUIZ_QUESTIONS])
+# 进程内存储时定期保存检查点，启动时在 start_serving_process 中读回；SQLite 共享存储时为 None
+CHECKPOINTER = create_checkpointer(STUDENT_DATA, quiz_stats, METRICS)
 
 
+@METRICS.timed("submit_quiz")
 def submit_quiz(*user_answers):
-    global quiz_stats
     score = 0
     results_md = "### 随堂测试结果\n\n"
     detailed_feedback = []
+    results_by_question = {}
 
     for i, question_data in enumerate(QUIZ_QUESTIONS):
         q_id = question_data["id"]
         correct_answer = question_data["correct_answer"]
         user_answer = user_answers[i]
 
-        quiz_stats[q_id]["total_attempts"] += 1
+        results_by_question[q_id] = user_answer == correct_answer
 
         if user_answer == correct_answer:
             score += 1
-            quiz_stats[q_id]["correct_count"] += 1
             detailed_feedback.append(f"Q{i + 1}. **正确!** 您的答案: `{user_answer}`")
         else:
             detailed_feedback.append(f"Q{i + 1}. 错误. 您的答案: `{user_answer}` (正确答案: `{correct_answer}`)")
@@ -90,6 +106,7 @@ def submit_quiz(*user_answers):
     results_md += "#### 详细反馈：\n"
     results_md += "\n".join(detailed_feedback)
 
+    quiz_stats.record_attempt(results_by_question)
     stats_md = display_quiz_stats()
 
     return gr.update(value=results_md, visible=True), gr.update(value=stats_md, visible=True)
@@ -97,11 +114,13 @@ def submit_quiz(*user_answers):
 
 def display_quiz_stats():
     stats_md = "### 题目统计\n\n"
-    stats_md += "（统计数据会随每次提交更新，应用重启后重置）\n\n"
+    stats_md += ("（统计数据会随每次提交更新，应用重启后重置）\n\n" if CHECKPOINTER is None and
+                 not os.environ.get(STATE_DB_ENV) else "（统计数据会随每次提交更新）\n\n")
+    stats_snapshot = quiz_stats.snapshot()
     for i, question_data in enumerate(QUIZ_QUESTIONS):
         q_id = question_data["id"]
-        correct = quiz_stats[q_id]["correct_count"]
-        total = quiz_stats[q_id]["total_attempts"]
+        correct = stats_snapshot[q_id]["correct_count"]
+        total = stats_snapshot[q_id]["total_attempts"]
 
         correct_percentage = (correct / total * 100) if total > 0 else 0
 
@@ -163,56 +182,60 @@ virtual_subnet_data = [
 ]
 
 
-def _calculate_radar_data(error_sections_with_counts, peer_review_score):
-    capability_definitions = {
-        # "信道频率规划" 的 total_items is 7 (4 range checks + 2 offset checks + 1 new rule check (UL_End > DL_Start))
-        "信道频率规划": {"full_title": "信道频率规划（下行、上行起始/终止频率）", "total_items": 7,
-                         "original_titles": ["（3）信道段参数"]},
-        # 信道业务参数现在有2行数据，每行4个可填写单元格（速率、带宽、上行频点、下行频点），总计8个可校验点
-        "信道业务参数": {"full_title": "信道业务参数配置（TDM/ALOHA参数、速率、中心频点、带宽）", "total_items": 8,
-                         "original_titles": ["（4）信道套参数"]},
-        "组网信息分析": {"full_title": "组网信息分析（站型、站地址、CC地址、电话号码）", "total_items": len(network_analysis_data), # Updated: reflects the 12 rows checked for CC address duplication
-                         "original_titles": ["1.组网参数分析"]},
-        "点对点业务参数": {"full_title": "点对点业务参数配置（本端/对端地址、速率、带宽、频率）", "total_items": 4, # 2 rows * (1 freq rule + 1 bandwidth rule) = 4
-                           "original_titles": ["2.点对点通信参数"]},
-        "虚拟子网参数": {"full_title": "虚拟子网参数配置（带宽、频率、速率选择）", "total_items": 2, # 1 bandwidth rule + 1 frequency overlap rule
-                         "original_titles": ["3.虚拟子网参数"]}
-    }
+_CAPABILITY_DEFINITIONS = {
+    # "信道频率规划" 的 total_items is 7 (4 range checks + 2 offset checks + 1 new rule check (UL_End > DL_Start))
+    "信道频率规划": {"full_title": "信道频率规划（下行、上行起始/终止频率）", "total_items": 7,
+                     "original_titles": ["（3）信道段参数"]},
+    # 信道业务参数现在有2行数据，每行4个可填写单元格（速率、带宽、上行频点、下行频点），总计8个可校验点
+    "信道业务参数": {"full_title": "信道业务参数配置（TDM/ALOHA参数、速率、中心频点、带宽）", "total_items": 8,
+                     "original_titles": ["（4）信道套参数"]},
+    "组网信息分析": {"full_title": "组网信息分析（站型、站地址、CC地址、电话号码）", "total_items": len(network_analysis_data), # Updated: reflects the 12 rows checked for CC address duplication
+                     "original_titles": ["1.组网参数分析"]},
+    "点对点业务参数": {"full_title": "点对点业务参数配置（本端/对端地址、速率、带宽、频率）", "total_items": 4, # 2 rows * (1 freq rule + 1 bandwidth rule) = 4
+                       "original_titles": ["2.点对点通信参数"]},
+    "虚拟子网参数": {"full_title": "虚拟子网参数配置（带宽、频率、速率选择）", "total_items": 2, # 1 bandwidth rule + 1 frequency overlap rule
+                     "original_titles": ["3.虚拟子网参数"]}
+}
 
-    radar_attributes = []
-    radar_scores = []
+# 雷达图维度（各能力 + 组内评价）、各能力的可校验项数，以及答卷部分标题 -> 能力列号
+_RADAR_ATTRIBUTES = [definition["full_title"].split("（")[0] for definition in _CAPABILITY_DEFINITIONS.values()] + \
+                    ["组内评价"]
+_CAPABILITY_TOTAL_ITEMS = np.array([definition.get("total_items", 0) for definition in _CAPABILITY_DEFINITIONS.values()],
+                                   dtype=float)
+_CAPABILITY_COLUMN_BY_TITLE = {title: i for i, definition in enumerate(_CAPABILITY_DEFINITIONS.values())
+                               for title in definition["original_titles"]}
 
-    for radar_key, definition in capability_definitions.items():
-        radar_attributes.append(definition["full_title"].split("（")[0])
-        total_items = definition.get("total_items", 0)
 
-        if total_items == 0:
-            score = 0
-        else:
-            error_count_value_from_checker = 0
-            for error_title_from_checker, error_count_value in error_sections_with_counts:
-                if error_title_from_checker in definition["original_titles"]:
-                    if isinstance(error_count_value, int):
-                        error_count_value_from_checker = error_count_value
-                    else:
-                        # Fallback if error count is not an int (e.g., format error)
-                        error_count_value_from_checker = total_items
-                    break
-
-            correct_items = total_items - error_count_value_from_checker
-            score = (correct_items / total_items) * 100
-            score = max(0, min(score, 100))
-
-        radar_scores.append(score)
-
-    radar_attributes.append("组内评价")
-    if peer_review_score is not None:
-        radar_scores.append(max(0, min(peer_review_score, 100)))
-    else:
-        radar_scores.append(0)
+def _calculate_radar_scores_batch(error_sections_list, peer_review_scores):
+    """
+    一批答卷的雷达分数：返回 (能力维度列表, 分数矩阵 (答卷数 × 维度数))。
+    错误计数不是整数（格式错误等）时按该能力全部出错计算，与单份计算一致。
+    """
+    error_counts = np.zeros((len(error_sections_list), len(_CAPABILITY_TOTAL_ITEMS)))
+    for row, error_sections_with_counts in enumerate(error_sections_list):
+        for error_title_from_checker, error_count_value in error_sections_with_counts:
+            column = _CAPABILITY_COLUMN_BY_TITLE.get(error_title_from_checker)
+            if column is None:
+                continue
+            # Fallback if error count is not an int (e.g., format error)
+            error_counts[row, column] = error_count_value if isinstance(error_count_value, int) else \
+                _CAPABILITY_TOTAL_ITEMS[column]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        capability_scores = np.where(_CAPABILITY_TOTAL_ITEMS > 0,
+                                     (_CAPABILITY_TOTAL_ITEMS - error_counts) / _CAPABILITY_TOTAL_ITEMS * 100, 0)
+    peer_column = np.array([0 if score is None else score for score in peer_review_scores], dtype=float)
+    scores = np.column_stack((capability_scores, peer_column)) if len(peer_column) else \
+        np.zeros((0, len(_RADAR_ATTRIBUTES)))
+    return list(_RADAR_ATTRIBUTES), np.clip(scores, 0, 100)
+
+
+def _calculate_radar_data(error_sections_with_counts, peer_review_score):
+    radar_attributes, radar_scores = _calculate_radar_scores_batch([error_sections_with_counts], [peer_review_score])
+    radar_scores = radar_scores[0].tolist()
 
     if len(radar_attributes) < 3 or not radar_scores or len(radar_attributes) != len(radar_scores):
-        print("Warning: Calculated radar data is insufficient or inconsistent.")
+        logger.warning("Calculated radar data is insufficient or inconsistent.")
         return [], []
 
     return radar_attributes, radar_scores
@@ -262,78 +285,43 @@ def _generate_analysis_report(error_sections_with_counts, average_peer_score):
     return "\n".join(analysis_message_parts)
 
 
-def _format_detailed_errors_markdown(detailed_errors, error_sections_with_counts):
-    detailed_errors_md_string = "### 详细错误列表\n\n"
-    if not detailed_errors:
-        if not any(isinstance(count, int) and count > 0 for _, count in
-                   error_sections_with_counts):
-            detailed_errors_md_string += "恭喜，答卷主要内容正确，没有详细错误信息需要列出。"
-        else:
-            detailed_errors_md_string += "未能获取详细错误信息（可能由于答卷格式错误导致无法解析或无需提供）。"
-    else:
-        errors_by_section = {}
-        for err in detailed_errors:
-            section_title = err.get('section_title', '未知部分')
-            if section_title not in errors_by_section:
-                errors_by_section[section_title] = []
-            errors_by_section[section_title].append(err)
-
-        for section_title, errors in errors_by_section.items():
-            detailed_errors_md_string += f"#### {section_title}\n\n"
-            for err in errors:
-                error_type = err.get('type')
-                error_message = err.get('message', '无具体错误描述。')
-
-                if error_type == 'textbox':
-                    field_label = err.get('field_label', '未知字段').strip('：')
-                    detailed_errors_md_string += f"- **'{field_label}'** 填写错误: 您的答案是 `{err['user_value']}`，标准答案是 `{err['answer_value']}`\n"
-                elif error_type == 'dataframe_cell':
-                    row_idx = err.get('row', -1)
-                    col_header = err.get('col_header', f"列 {err.get('col', -1)}")
-                    detailed_errors_md_string += f"- **表格错误** (行 {row_idx}, {col_header}): {error_message} 您的答案是 `{err['user_value']}`，标准答案是 `{err['answer_value']}`\n"
-                elif error_type == 'dataframe_duplicate':
-                    row_idx = err.get('row', -1)
-                    col_header = err.get('col_header', f"列 {err.get('col', -1)}")
-                    user_value = err.get('user_value', 'N/A')
-                    detailed_errors_md_string += f"- **表格错误** (行 {row_idx}, {col_header}): 值 `{user_value}` {error_message}\n"
-                elif error_type == 'dropdown':
-                    field_label = err.get('field_label', '未知下拉项').strip('：')
-                    detailed_errors_md_string += f"- **'{field_label}'** 选择错误: 您的选择是 `{err['user_value']}`，标准答案是 `{err['answer_value']}`\n"
-                elif error_type == 'row_count_mismatch':
-                    detailed_errors_md_string += f"- **表格行数错误**: {error_message} (您的行数: {err['user_value']}, 正确行数: {err['answer_value']})\n"
-                elif error_type == 'column_count_mismatch':
-                    row_idx = err.get('row', -1)
-                    detailed_errors_md_string += f"- **表格列数错误** (行 {row_idx}): {error_message}\n"
-                elif error_type == 'dataframe_format_error':
-                    detailed_errors_md_string += f"- **表格格式错误**: {error_message}\n"
-                elif error_type == 'data_type_error':
-                    detailed_errors_md_string += f"- **数据类型错误**: {error_message}\n"
-                elif error_type == 'logic_check_failed':
-                    detailed_errors_md_string += f"- **逻辑检查失败**: {error_message}\n"
-                elif error_type == 'frequency_logic_error':
-                    row_idx = err.get('row', -1)
-                    if 'user_value_ul_end' in err:
-                        user_ul_end = err.get('user_value_ul_end', 'N/A')
-                        user_dl_start = err.get('user_value_dl_start', 'N/A')
-                        ul_end_header = err.get('col_header_ul_end', '上行终止频率')
-                        dl_start_header = err.get('col_header_dl_start', '下行起始频率')
-                        detailed_errors_md_string += f"- **频率逻辑错误** (行 {row_idx}, {ul_end_header} vs {dl_start_header}): {error_message} (您的上行终止频率: `{user_ul_end}`, 下行起始频率: `{user_dl_start}`)\n"
-                    else:
-                        detailed_errors_md_string += f"- **频率逻辑错误** (行 {row_idx}): {error_message}\n"
-                elif error_type == 'bandwidth_rate_mismatch':
-                    row_idx = err.get('row', -1)
-                    user_rate = err.get('user_value_rate', 'N/A')
-                    user_bandwidth = err.get('user_value_bandwidth', 'N/A')
-                    detailed_errors_md_string += f"- **带宽与速率不匹配错误** (行 {row_idx}, 速率: `{user_rate}`, 带宽: `{user_bandwidth}`): {error_message}\n"
-                elif error_type == 'kbp_load_error':
-                    detailed_errors_md_string += f"- **配置错误**: {error_message}\n"
-                elif error_type == 'unsupported_check_type':
-                     detailed_errors_md_string += f"- **不支持的检查类型**: {error_message}\n"
-
-            detailed_errors_md_string += "\n"
-    return detailed_errors_md_string
+def _format_class_summary_markdown(class_summary):
+    if class_summary is None:
+        return ""
+    lines = [f"#### 全班能力统计（{class_summary.count} 人，按各自最近一次提交）\n",
+             "| 能力 | 平均分 | 标准差 | 中位数 | 四分位区间 | 最低 / 最高 |",
+             "| --- | --- | --- | --- | --- | --- |"]
+    q1, median, q3 = (class_summary.quantiles[q] for q in (0.25, 0.5, 0.75))
+    for i, attribute in enumerate(class_summary.attributes):
+        lines.append(f"| {attribute} | {class_summary.mean[i]:.1f} | {np.sqrt(class_summary.variance[i]):.1f} | "
+                     f"{median[i]:.1f} | {q1[i]:.1f} - {q3[i]:.1f} | "
+                     f"{class_summary.minimum[i]:.1f} / {class_summary.maximum[i]:.1f} |")
+    return "\n".join(lines)
 
 
+def _admit_chart(event):
+    """
+    图片渲染的准入控制：判分请求排队过多（见 scheduler.PriorityScheduler.overloaded）或界面渲染积压超过阈值
+    （见 render_service）时进入降级模式，返回 False 并计数，调用方只返回文字结果，跳过或推迟图片。
+    """
+    grading_overloaded = SCHEDULER.overloaded(GRADING)
+    render_admitted = RENDER_SERVICE.admit()
+    METRICS.set_gauge("classmatch_grading_queue", SCHEDULER.queued(GRADING),
+                      "Grading requests waiting to start in this process.")
+    METRICS.set_gauge("classmatch_render_backlog", RENDER_SERVICE.backlog,
+                      "Interactive render jobs submitted and not yet finished in this process.")
+    METRICS.set_gauge("classmatch_render_bulk_backlog", RENDER_SERVICE.bulk_backlog,
+                      "Bulk render jobs (class exports) not yet finished in this process.")
+    if grading_overloaded or not render_admitted:
+        METRICS.inc_counter("classmatch_degraded_responses_total",
+                            "Responses that skipped a chart because grading requests were queueing "
+                            "or the render backlog was too long.",
+                            event=event, reason="grading_queue" if grading_overloaded else "render_backlog")
+        return False
+    return True
+
+
+@METRICS.timed("process_submission")
 def process_submission(
         student_name_value,
         subnet_id_value, network_name_value, station_config_value, channel_segment_value,
@@ -353,6 +341,9 @@ def process_submission(
     single_student_radar_display_update = gr.update(value=None, visible=False)
     detailed_errors_output_update = gr.update(value="等待提交...")
     study_route_mindmap_display_update = gr.update(value=None, visible=False)
+    study_route_html_update = gr.update(value="等待提交...")
+    study_route_errors_update = gr.update(value=None)
+    study_route_image_button_update = gr.update(visible=False)
     student_list_choices_update = gr.update(choices=list(STUDENT_DATA.keys()), value=None, interactive=True)
     overall_radar_visibility_update = gr.update(visible=False, interactive=True)
     growth_radar_visibility_update = gr.update(visible=False, interactive=True)
@@ -364,6 +355,7 @@ def process_submission(
     network_analysis_error_md_update = gr.update(value="", visible=False)
     ### 结束新增
 
+    submission_started_at = time.perf_counter()
     student_name = student_name_value.strip()
     if not student_name:
         check_result_md_output_update = gr.update(value="**错误：请先输入您的姓名！**")
@@ -373,31 +365,35 @@ def process_submission(
                 student_list_choices_update, overall_radar_visibility_update, growth_radar_visibility_update,
                 selected_student_info_md_update, comparison_radar_display_update,
                 final_eval_student_name_display_update,
-                network_analysis_error_md_update) # 更新返回
+                network_analysis_error_md_update, # 更新返回
+                study_route_html_update, study_route_errors_update, study_route_image_button_update)
 
 
     temp_file_path = None
-    try:
-        user_output_string = capture_paper_data_string(
-            subnet_id_value, network_name_value, station_config_headers, station_config_value,
-            channel_segment_headers, channel_segment_value, channel_suite_headers, channel_suite_value,
-            network_analysis_headers, network_analysis_value, local_cc_address_value,
-            remote_xx_address_value, p2p_headers, p2p_value, virtual_subnet_headers, virtual_subnet_value,
-            channel_type_value
+    with METRICS.span("process_submission", "capture_export"):
+        try:
+            user_output_string = capture_paper_data_string(
+                subnet_id_value, network_name_value, station_config_headers, station_config_value,
+                channel_segment_headers, channel_segment_value, channel_suite_headers, channel_suite_value,
+                network_analysis_headers, network_analysis_value, local_cc_address_value,
+                remote_xx_address_value, p2p_headers, p2p_value, virtual_subnet_headers, virtual_subnet_value,
+                channel_type_value
+            )
+            with tempfile.NamedTemporaryFile(mode='w+', suffix=".txt", delete=False, encoding='utf-8') as tmp_file:
+                tmp_file.write(user_output_string)
+                temp_file_path = tmp_file.name
+            download_file_output_update = gr.update(value=temp_file_path, label="下载答卷结果", visible=True)
+        except Exception as e:
+            METRICS.count_error("process_submission", "capture_export")
+            logger.error("Error saving file: %s", e, extra=fields(student=student_name, stage="capture_export"))
+            download_file_output_update = gr.update(label=f"保存文件失败: {e}", visible=True, value=None)
+
+    with METRICS.span("process_submission", "check_paper"):
+        check_message_string, error_sections_with_counts, _, detailed_errors = check_paper(
+            subnet_id_value, network_name_value, station_config_value, channel_segment_value, channel_type_value,
+            channel_suite_value, network_analysis_value, local_cc_address_value, remote_xx_address_value,
+            p2p_value, virtual_subnet_value, virtual_subnet_rate_value
         )
-        with tempfile.NamedTemporaryFile(mode='w+', suffix=".txt", delete=False, encoding='utf-8') as tmp_file:
-            tmp_file.write(user_output_string)
-            temp_file_path = tmp_file.name
-        download_file_output_update = gr.update(value=temp_file_path, label="下载答卷结果", visible=True)
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        download_file_output_update = gr.update(label=f"保存文件失败: {e}", visible=True, value=None)
-
-    check_message_string, error_sections_with_counts, _, detailed_errors = check_paper(
-        subnet_id_value, network_name_value, station_config_value, channel_segment_value, channel_type_value,
-        channel_suite_value, network_analysis_value, local_cc_address_value, remote_xx_address_value,
-        p2p_value, virtual_subnet_value, virtual_subnet_rate_value
-    )
 
     ### 新增：检查CC地址重复错误
     cc_address_duplicate_found = False
@@ -414,73 +410,87 @@ def process_submission(
         network_analysis_error_md_update = gr.update(value="", visible=False) # 如果没有错误，则隐藏
     ### 结束新增
 
-    average_peer_score = _process_peer_review_scores(
-        [score1_value, score2_value, score3_value, score4_value, score5_value])
+    with METRICS.span("process_submission", "peer_scores"):
+        average_peer_score = _process_peer_review_scores(
+            [score1_value, score2_value, score3_value, score4_value, score5_value])
 
-    radar_attributes, radar_scores = _calculate_radar_data(error_sections_with_counts, average_peer_score)
+        radar_attributes, radar_scores = _calculate_radar_data(error_sections_with_counts, average_peer_score)
 
-    analysis_report_str = _generate_analysis_report(error_sections_with_counts, average_peer_score)
+    with METRICS.span("process_submission", "report"):
+        analysis_report_str = _generate_analysis_report(error_sections_with_counts, average_peer_score)
 
-    detailed_errors_md_string = _format_detailed_errors_markdown(detailed_errors, error_sections_with_counts)
+        detailed_errors_md_string = format_detailed_errors_markdown(detailed_errors, error_sections_with_counts)
 
     check_result_md_output_update = gr.update(value=check_message_string)
     analysis_output_md_update = gr.update(value=analysis_report_str)
     detailed_errors_output_update = gr.update(value=detailed_errors_md_string)
 
     single_plot_image_update = gr.update(value=None, visible=False)
-    if radar_attributes and radar_scores and len(radar_attributes) >= 3 and len(radar_attributes) == len(radar_scores):
-        try:
-            fig, ax = plot_attribute_radar(
-                character_name=student_name, attributes=radar_attributes, values=radar_scores,
-                max_value=100, color='dodgerblue'
-            )
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-                fig.savefig(tmpfile.name)
-                plot_path = tmpfile.name
-            plt.close(fig)
-            single_student_radar_display_update = gr.update(value=plot_path, visible=True,
-                                                            label=f"{student_name} 本次能力雷达图")
-        except Exception as e:
-            print(f"Error plotting single radar chart for {student_name}: {e}")
+    with METRICS.span("process_submission", "radar_render"):
+        radar_data_valid = (radar_attributes and radar_scores and len(radar_attributes) >= 3
+                            and len(radar_attributes) == len(radar_scores))
+        if radar_data_valid and not _admit_chart("process_submission"):
+            # 降级模式：不排队等待渲染，检查结果先返回；右侧“已保存学生能力分析”随后以 SVG 显示同一张雷达图
+            single_student_radar_display_update = gr.update(value=None, visible=False)
+            analysis_output_md_update["value"] += ("\n\n**提示:** 当前提交人数较多，本次能力雷达图图片已跳过，"
+                                                   "可在右侧“已保存学生能力分析”中查看。")
+        elif radar_data_valid:
+            try:
+                plot_path = RENDER_SERVICE.render_to_file(
+                    "plot_attribute_radar",
+                    character_name=student_name, attributes=radar_attributes, values=radar_scores,
+                    max_value=100, color='dodgerblue'
+                )
+                single_student_radar_display_update = gr.update(value=plot_path, visible=True,
+                                                                label=f"{student_name} 本次能力雷达图")
+            except Exception as e:
+                METRICS.count_error("process_submission", "radar_render")
+                logger.error("Error plotting single radar chart: %s", e,
+                             extra=fields(student=student_name, stage="radar_render"))
+                single_student_radar_display_update = gr.update(value=None, visible=False,
+                                                                label=f"{student_name} 本次能力雷达图生成失败")
+                analysis_output_md_update["value"] += f"\n\n**注意:** 本次雷达图生成失败，原因：{e}"
+        else:
+            METRICS.count_error("process_submission", "radar_render")
             single_student_radar_display_update = gr.update(value=None, visible=False,
                                                             label=f"{student_name} 本次能力雷达图生成失败")
-            analysis_output_md_update.value += f"\n\n**注意:** 本次雷达图生成失败，原因：{e}"
-    else:
-        single_student_radar_display_update = gr.update(value=None, visible=False,
-                                                        label=f"{student_name} 本次能力雷达图生成失败")
-        analysis_output_md_update.value += "\n\n**注意:** 本次雷达图因数据不足或计算错误未能生成。"
+            analysis_output_md_update["value"] += "\n\n**注意:** 本次雷达图因数据不足或计算错误未能生成。"
+
+    # 学习路线默认以 HTML 树展示；思维导图图片只在学生点击按钮时才渲染（render_study_route_image 单独计时）
+    with METRICS.span("process_submission", "study_route"):
+        study_route_html_update = gr.update(
+            value=format_study_route_html(student_name, build_study_route(detailed_errors)))
+    study_route_errors_update = gr.update(value={"student_name": student_name, "detailed_errors": detailed_errors})
+    study_route_image_button_update = gr.update(visible=True)
+    study_route_mindmap_display_update = gr.update(value=None, visible=False)
 
-    study_route_plot_path = None
-    try:
-        fig_mindmap, ax_mindmap = plot_study_route_mindmap(student_name, detailed_errors)
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile_mindmap:
-            fig_mindmap.savefig(tmpfile_mindmap.name, bbox_inches='tight', dpi=150)
-            study_route_plot_path = tmpfile_mindmap.name
-        plt.close(fig_mindmap)
-        # 确保 study_route_mindmap_display_update 被正确设置为可见
-        study_route_mindmap_display_update = gr.update(value=study_route_plot_path, visible=True)
-    except Exception as e:
-        print(f"Error generating study route mindmap for {student_name}: {e}")
-        study_route_mindmap_display_update = gr.update(value=None, visible=False)
-
-    if radar_attributes and radar_scores and len(radar_attributes) >= 3 and len(radar_attributes) == len(radar_scores):
-        if student_name not in STUDENT_DATA:
-            STUDENT_DATA[student_name] = []
-        STUDENT_DATA[student_name].append({'scores': radar_scores, 'attributes': radar_attributes})
-        STUDENT_DATA[student_name] = STUDENT_DATA[student_name][-MAX_SUBMISSIONS_HISTORY:]
-        print(
-            f"Stored data for student: {student_name}. Total submissions for {student_name}: {len(STUDENT_DATA[student_name])}")
-    else:
-        print(
-            f"Warning: Could not store data for student {student_name}. Radar data calculation failed or is insufficient.")
+    with METRICS.span("process_submission", "state_update"):
+        # 保存最近一次检查结果，整班报告导出时使用
+        STUDENT_DATA.record_check_result(student_name, {
+            "check_message": check_message_string,
+            "analysis_report": analysis_report_str,
+            "error_sections_with_counts": error_sections_with_counts,
+            "detailed_errors": detailed_errors,
+        })
+
+        if radar_attributes and radar_scores and len(radar_attributes) >= 3 and len(radar_attributes) == len(radar_scores):
+            total_submissions = STUDENT_DATA.append_submission(student_name, radar_attributes, radar_scores)
+            logger.info("Stored submission %d for %s", total_submissions, student_name,
+                        extra=fields(student=student_name, stage="state_update",
+                                     duration=time.perf_counter() - submission_started_at))
+        else:
+            METRICS.count_error("process_submission", "state_update")
+            logger.warning("Could not store data: radar data calculation failed or is insufficient.",
+                           extra=fields(student=student_name, stage="state_update"))
 
-    updated_student_list = list(STUDENT_DATA.keys())
+        updated_student_list = list(STUDENT_DATA.keys())
+        current_student_history = STUDENT_DATA.get_history(student_name)
     student_list_choices_update = gr.update(choices=updated_student_list,
                                             value=student_name if student_name in updated_student_list else None,
                                             interactive=True)
-    overall_radar_visibility_update = gr.update(visible=len(STUDENT_DATA) > 1, interactive=True)
-    current_student_submissions = STUDENT_DATA.get(student_name, [])
-    growth_radar_visibility_update = gr.update(visible=(len(current_student_submissions) > 1), interactive=True)
+    overall_radar_visibility_update = gr.update(visible=len(updated_student_list) > 1, interactive=True)
+    growth_radar_visibility_update = gr.update(
+        visible=current_student_history is not None and len(current_student_history.scores) > 1, interactive=True)
 
     comparison_radar_display_update = gr.update(value=None, visible=False)
     selected_student_info_md_update = gr.update(
@@ -494,9 +504,108 @@ def process_submission(
             student_list_choices_update, overall_radar_visibility_update, growth_radar_visibility_update,
             selected_student_info_md_update, comparison_radar_display_update,
             final_eval_student_name_display_update,
-            network_analysis_error_md_update) # 更新返回
+            network_analysis_error_md_update, # 更新返回
+            study_route_html_update, study_route_errors_update, study_route_image_button_update)
+
+
+@METRICS.timed("api_submission_batch")
+def _grade_submission_batch(submissions):
+    """
+    批量提交接口的判分函数（由 submission_api.MicroBatcher 按批调用）：逐份检查答卷，整批计算雷达分数，
+    学生历史与检查结果一次写入存储。默认不生成图表，include_charts 为真时附带 SVG 雷达图。
+    """
+    results = [None] * len(submissions)
+    graded = []
+    for i, submission in enumerate(submissions):
+        student_name = submission["student_name"].strip()
+        if not student_name:
+            results[i] = {"student_name": student_name, "error": "学生姓名不能为空。"}
+            continue
+        try:
+            check_message_string, error_sections_with_counts, _, detailed_errors = check_paper(
+                submission["subnet_id"], submission["network_name"],
+                submission["station_config"] or station_config_data,
+                submission["channel_segment"], submission["channel_type"],
+                submission["channel_suite"],
+                submission["network_analysis"],
+                submission["local_cc_address"], submission["remote_xx_address"], submission["p2p"],
+                submission["virtual_subnet"],
+                submission["virtual_subnet_rate"]
+            )
+        except Exception as e:
+            logger.error("Error checking API submission: %s", e, extra=fields(student=student_name, stage="check_paper"))
+            results[i] = {"student_name": student_name, "error": f"检查答卷失败: {e}"}
+            continue
+        average_peer_score = _process_peer_review_scores(submission["peer_scores"])
+        graded.append((i, student_name, average_peer_score, {
+            "check_message": check_message_string,
+            "analysis_report": _generate_analysis_report(error_sections_with_counts, average_peer_score),
+            "error_sections_with_counts": error_sections_with_counts,
+            "detailed_errors": detailed_errors,
+        }))
+
+    radar_attributes, radar_score_matrix = _calculate_radar_scores_batch(
+        [check_result["error_sections_with_counts"] for _, _, _, check_result in graded],
+        [average_peer_score for _, _, average_peer_score, _ in graded])
+
+    entries = []
+    entry_indices = []
+    for (i, student_name, _, check_result), radar_scores in zip(graded, radar_score_matrix):
+        results[i] = dict(check_result, student_name=student_name, total_submissions=None,
+                          radar={"attributes": radar_attributes, "scores": radar_scores.tolist()})
+        if submissions[i]["include_charts"]:
+            results[i]["radar_svg"] = attribute_radar_svg(
+                character_name=student_name, attributes=radar_attributes, values=radar_scores,
+                max_value=100, color='dodgerblue')
+        if submissions[i]["store"]:
+            entries.append((student_name, check_result, radar_attributes, radar_scores))
+            entry_indices.append(i)
+
+    if entries:
+        for i, total_submissions in zip(entry_indices, STUDENT_DATA.record_batch(entries)):
+            results[i]["total_submissions"] = total_submissions
+    return results
+
+
+# 事件优先级调度：判分 > 随堂测试 > 查看类事件，各组独立的并发上限（见 scheduler.py）
+SCHEDULER = PriorityScheduler(METRICS)
+# 批量提交接口（/api/v1/submissions），并发请求在此攒批判分；每批与界面提交同属判分组
+SUBMISSION_BATCHER = MicroBatcher(SCHEDULER.scheduled(GRADING, "api_submission_batch")(_grade_submission_batch))
+SUBMISSION_API_ROUTER = create_submission_router(SUBMISSION_BATCHER)
+# 分阶段耗时统计（/metrics，Prometheus 文本格式，默认只允许本机访问）
+METRICS_ROUTER = create_metrics_router(METRICS)
+# 就绪检查（/readyz，启动预热完成后返回 200）
+READINESS_ROUTER = create_readiness_router(READINESS)
+# 内存看门狗：采样内存与打开的图形数写入 /metrics，超限时清理下列缓存（启动见文件末尾与 serve.py）
+MEMORY_WATCHDOG = MemoryWatchdog(METRICS, render_service=RENDER_SERVICE)
+MEMORY_WATCHDOG.register_trimmer("chart_cache", clear_chart_cache)
+MEMORY_WATCHDOG.register_trimmer("render_caches", trim_local_caches)
+
+
+@METRICS.timed("render_study_route_image", "mindmap_render")
+def render_study_route_image(study_route_errors):
+    """按需渲染学习路线思维导图图片；study_route_errors 为最近一次提交的 {student_name, detailed_errors}。"""
+    if not study_route_errors:
+        return gr.update(value=None, visible=False)
+    student_name = study_route_errors.get("student_name", "")
+    if not _admit_chart("render_study_route_image"):
+        # 学习路线的文字版已在页面上，图片推迟到负载回落后由学生再次点击生成
+        gr.Warning("当前提交人数较多，学习路线图暂缓生成，请稍后再点击按钮。")
+        return gr.update(value=None, visible=False)
+    try:
+        study_route_plot_path = RENDER_SERVICE.render_to_file(
+            "plot_study_route_mindmap", savefig_kwargs={'dpi': 150},
+            student_name=student_name, detailed_errors=study_route_errors.get("detailed_errors") or []
+        )
+        return gr.update(value=study_route_plot_path, visible=True)
+    except Exception as e:
+        METRICS.count_error("render_study_route_image", "mindmap_render")
+        logger.error("Error generating study route mindmap: %s", e,
+                     extra=fields(student=student_name, stage="mindmap_render"))
+        return gr.update(value=None, visible=False)
 
 
+@METRICS.timed("view_student_radar")
 def view_student_radar(selected_student_name):
     default_image_update = gr.update(value=None, visible=False)
     default_markdown_update = gr.update(value="请从下拉列表中选择一个学生查看能力图谱。")
@@ -504,33 +613,29 @@ def view_student_radar(selected_student_name):
     final_eval_student_name_display_update = gr.update(value="")
 
     if selected_student_name and selected_student_name in STUDENT_DATA:
-        student_submissions = STUDENT_DATA[selected_student_name]
-        if not student_submissions:
+        student_history = STUDENT_DATA.get_history(selected_student_name)
+        if student_history is None or len(student_history.scores) == 0:
             return default_image_update, default_markdown_update, growth_button_update, final_eval_student_name_display_update
 
-        latest_submission = student_submissions[-1]
-        scores = latest_submission.get('scores')
-        attributes = latest_submission.get('attributes')
+        scores = student_history.scores[-1]
+        attributes = student_history.attributes
 
-        current_growth_button_visible = len(student_submissions) > 1
+        current_growth_button_visible = len(student_history.scores) > 1
         growth_button_update = gr.update(visible=current_growth_button_visible, interactive=True)
         final_eval_student_name_display_update = gr.update(value=selected_student_name)
 
-        if attributes and scores and len(attributes) == len(scores) and len(attributes) >= 3:
+        if attributes and len(attributes) == len(scores) and len(attributes) >= 3:
             try:
-                fig, ax = plot_attribute_radar(
+                radar_svg = attribute_radar_svg(
                     character_name=selected_student_name, attributes=attributes, values=scores,
                     max_value=100, color='dodgerblue'
                 )
-                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-                    fig.savefig(tmpfile.name)
-                    plot_path = tmpfile.name
-                plt.close(fig)
-                return gr.update(value=plot_path, visible=True,
+                return gr.update(value=radar_svg, visible=True,
                                  label=f"{selected_student_name} 最新能力雷达图"), gr.update(
                     value=""), growth_button_update, final_eval_student_name_display_update
             except Exception as e:
-                print(f"Error plotting radar for student {selected_student_name}: {e}")
+                METRICS.count_error("view_student_radar", "total")
+                logger.error("Error plotting student radar: %s", e, extra=fields(student=selected_student_name))
                 return default_image_update, gr.update(
                     value=f"为学生 {selected_student_name} 生成雷达图失败: {e}"), growth_button_update, final_eval_student_name_display_update
         else:
@@ -545,94 +650,146 @@ def view_student_growth_radar(selected_student_name):
     default_markdown_update = gr.update(value="需要至少两次提交数据才能绘制成长情况对比图。")
 
     if selected_student_name and selected_student_name in STUDENT_DATA:
-        student_submissions = STUDENT_DATA[selected_student_name]
+        student_history = STUDENT_DATA.get_history(selected_student_name)
 
-        if len(student_submissions) < 2:
+        # 同一学生的历史共享一组能力维度，无需再逐条筛选
+        if student_history is None or len(student_history.scores) < 2:
             return default_image_update, default_markdown_update
 
-        first_attributes = student_submissions[0]['attributes']
-        if len(first_attributes) < 3:
+        if len(student_history.attributes) < 3:
             return default_image_update, gr.update(
                 value=f"学生 {selected_student_name} 的能力维度少于3个，无法绘制雷达图。")
 
-        valid_submissions = [
-            s for s in student_submissions
-            if s.get('attributes') == first_attributes and
-               s.get('scores') is not None and
-               len(s['scores']) == len(first_attributes)
-        ]
-
-        if len(valid_submissions) < 2:
-            return default_image_update, default_markdown_update
-
         try:
-            fig, ax = plot_history_radar(
-                student_name=selected_student_name, submissions=valid_submissions, max_value=100
+            radar_svg = history_radar_svg(
+                student_name=selected_student_name, attributes=student_history.attributes,
+                score_history=student_history.scores, max_value=100
             )
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-                fig.savefig(tmpfile.name)
-                plot_path = tmpfile.name
-            plt.close(fig)
 
-            return gr.update(value=plot_path, visible=True, label=f"{selected_student_name} 能力成长情况"), gr.update(
+            return gr.update(value=radar_svg, visible=True, label=f"{selected_student_name} 能力成长情况"), gr.update(
                 value="")
         except Exception as e:
-            print(f"Error plotting growth radar for {selected_student_name}: {e}")
+            logger.error("Error plotting growth radar: %s", e, extra=fields(student=selected_student_name))
             return default_image_update, gr.update(value=f"生成学生 {selected_student_name} 的成长图失败: {e}")
     else:
         return default_image_update, default_markdown_update
 
 
-def view_overall_radar():
+def _view_cohort_radar(class_summary, selected_student_name):
+    default_image_update = gr.update(value=None, visible=False)
+    growth_button_update_local = gr.update(visible=False, interactive=True)
+
+    bands = {
+        "minimum": class_summary.minimum, "q1": class_summary.quantiles[0.25],
+        "median": class_summary.quantiles[0.5], "q3": class_summary.quantiles[0.75],
+        "maximum": class_summary.maximum,
+    }
+    highlight = None
+    if selected_student_name:
+        student_history = STUDENT_DATA.get_history(selected_student_name)
+        if student_history is not None and student_history.attributes is class_summary.attributes:
+            highlight = (selected_student_name, student_history.scores[-1])
+
+    try:
+        radar_svg = cohort_radar_svg(
+            attributes=class_summary.attributes, bands=bands, student_count=class_summary.count,
+            highlight=highlight, max_value=100
+        )
+        return gr.update(value=radar_svg, visible=True, label="总体能力分布雷达图"), gr.update(
+            value=_format_class_summary_markdown(class_summary)), growth_button_update_local
+    except Exception as e:
+        METRICS.count_error("view_overall_radar", "total")
+        logger.error("Error plotting cohort radar chart: %s", e)
+        return default_image_update, gr.update(
+            value=f"生成总体能力分布图失败: {e}"), growth_button_update_local
+
+
+@METRICS.timed("view_overall_radar")
+def view_overall_radar(selected_student_name=None):
     default_image_update = gr.update(value=None, visible=False)
     default_markdown_update = gr.update(value="需要至少两位学生的数据完整且一致，才能绘制总体能力对比图。")
     growth_button_update_local = gr.update(visible=False, interactive=True)
 
+    # 人数较多时直接使用增量维护的分位统计绘制分位带，无需遍历全部学生
+    class_summary = STUDENT_DATA.class_summary()
+    if class_summary is not None and class_summary.count >= COHORT_RADAR_MIN_STUDENTS and \
+            len(class_summary.attributes) >= 3:
+        return _view_cohort_radar(class_summary, selected_student_name)
+
     students_to_plot = []
     common_attributes = None
 
-    if STUDENT_DATA:
-        student_names_with_data = [name for name, submissions in STUDENT_DATA.items() if submissions]
-        if student_names_with_data:
-            first_student_name = student_names_with_data[0]
-            first_student_history = STUDENT_DATA.get(first_student_name)
-            if first_student_history:
-                first_student_info = first_student_history[-1]
-                common_attributes = first_student_info.get('attributes')
+    latest_scores = STUDENT_DATA.latest_scores()
+    if latest_scores:
+        common_attributes = latest_scores[0][1]
 
         if common_attributes and len(common_attributes) >= 3:
-            num_attributes = len(common_attributes)
-            for student_name, student_submissions in STUDENT_DATA.items():
-                if student_submissions:
-                    latest_submission = student_submissions[-1]
-                    scores = latest_submission.get('scores')
-                    attributes = latest_submission.get('attributes')
-                    if scores is not None and attributes == common_attributes and len(scores) == num_attributes:
-                        students_to_plot.append((student_name, scores))
-                    else:
-                        print(
-                            f"Warning: Data mismatch or missing for student {student_name}. Skipping in overall view.")
+            for student_name, attributes, scores in latest_scores:
+                # 能力维度元组是驻留的，相同维度的学生共享同一个对象
+                if attributes is common_attributes:
+                    students_to_plot.append((student_name, scores))
+                else:
+                    logger.warning("Data mismatch or missing for a student. Skipping in overall view.",
+                                   extra=fields(student=student_name))
 
     if len(students_to_plot) < 2:
         return default_image_update, default_markdown_update, growth_button_update_local
 
     try:
-        fig_compare, ax_compare = plot_comparison_radar(students_to_plot, common_attributes, max_value=100)
-
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-            fig_compare.savefig(tmpfile.name)
-            plot_path = tmpfile.name
-        plt.close(fig_compare)
+        radar_svg = comparison_radar_svg(
+            list_of_name_and_scores=students_to_plot, attributes=common_attributes, max_value=100
+        )
 
-        return gr.update(value=plot_path, visible=True, label="总体能力对比雷达图"), gr.update(
-            value=""), growth_button_update_local
+        class_summary_md = _format_class_summary_markdown(STUDENT_DATA.class_summary(common_attributes))
+        return gr.update(value=radar_svg, visible=True, label="总体能力对比雷达图"), gr.update(
+            value=class_summary_md), growth_button_update_local
 
     except Exception as e:
-        print(f"Error plotting overall radar chart: {e}")
+        METRICS.count_error("view_overall_radar", "total")
+        logger.error("Error plotting overall radar chart: %s", e)
         return default_image_update, gr.update(
             value=f"生成总体能力对比图失败: {e}"), growth_button_update_local
 
 
+def export_class_report(include_mindmaps, progress=gr.Progress()):
+    """把全班学生的检查摘要、雷达图、成长图与学习路线导出为一个 zip。"""
+    if len(STUDENT_DATA) == 0:
+        return gr.update(value=None, visible=False), gr.update(value="暂无学生提交记录，无法导出。")
+
+    def _report_progress(done, total):
+        progress(done / total, desc=f"正在导出全班报告 {done}/{total}")
+
+    try:
+        zip_path, stats = export_class_reports(STUDENT_DATA, include_mindmaps=bool(include_mindmaps),
+                                               progress=_report_progress)
+    except Exception as e:
+        logger.error("Error exporting class reports: %s", e)
+        return gr.update(value=None, visible=False), gr.update(value=f"导出全班报告失败：{e}")
+
+    status = (f"已导出 {stats['students']} 名学生的报告，共 {stats['charts']} 张图表"
+              f"（其中 {stats['cached_charts']} 张复用缓存），耗时 {stats['seconds']:.1f} 秒。")
+    if stats["failed_charts"]:
+        status += f" 有 {stats['failed_charts']} 张图表生成失败，详见对应学生的报告。"
+    return gr.update(value=zip_path, visible=True), gr.update(value=status)
+
+
+def refresh_error_dashboard(known_version):
+    """教师看板轮询：错误趋势版本号未变时跳过渲染，返回 (热力表 HTML, 版本号)。"""
+    if STUDENT_DATA.error_trend_version() == known_version:
+        return gr.skip(), gr.skip()
+    snapshot = STUDENT_DATA.error_trends()
+    return gr.update(value=format_error_heatmap_html(snapshot)), snapshot.version
+
+
+def refresh_metrics():
+    """管理页：各事件分阶段的耗时分位数与失败次数、调度概况，以及内存概况。"""
+    metrics_markdown = format_metrics_markdown(METRICS) + "\n\n#### 事件调度\n\n" + SCHEDULER.format_markdown()
+    memory_markdown = MEMORY_WATCHDOG.format_markdown()
+    if CHECKPOINTER is not None:
+        memory_markdown += "\n\n" + CHECKPOINTER.format_markdown()
+    return gr.update(value=metrics_markdown), gr.update(value=memory_markdown)
+
+
 def submit_final_evaluation(
         student_name_value,
         s_influence, s_coop, s_comm,
@@ -645,20 +802,20 @@ def submit_final_evaluation(
     if not student_name:
         return final_eval_radar_output_update, gr.update(value="错误：请先在左侧输入或选择学生姓名！")
 
-    if student_name not in STUDENT_DATA or not STUDENT_DATA[student_name]:
+    student_history = STUDENT_DATA.get_history(student_name)
+    if student_history is None or len(student_history.scores) == 0:
         return final_eval_radar_output_update, gr.update(
             value=f"错误：学生 '{student_name}' 没有提交记录，无法获取首次提交成绩。")
 
-    first_submission = STUDENT_DATA[student_name][0]
-    first_submission_scores = first_submission.get('scores', [])
+    first_submission_scores = student_history.scores[0]
     first_submission_avg_score = 0
-    if first_submission_scores:
+    if first_submission_scores.size:
         first_submission_avg_score = np.mean(first_submission_scores)
     else:
         final_eval_message_update = gr.update(
             value=f"注意：学生 '{student_name}' 的首次提交没有有效分数，首次提交平均分将设为0。",
             visible=True)
-        print(f"Warning: Student '{student_name}' first submission has no valid scores.")
+        logger.warning("First submission has no valid scores.", extra=fields(student=student_name))
 
     attributes = ["影响力", "组内合作能力", "沟通能力", "专业能力", "创新能力", "发展潜力", "首次提交平均分"]
     raw_scores = [s_influence, s_coop, s_comm, s_prof, s_innov, s_potential]
@@ -677,7 +834,8 @@ def submit_final_evaluation(
         return final_eval_radar_output_update, gr.update(value="错误：雷达图数据不完整或维度不足。")
 
     try:
-        fig, ax = plot_attribute_radar(
+        plot_path = RENDER_SERVICE.render_to_file(
+            "plot_attribute_radar",
             character_name=f"{student_name} 最终评价",
             attributes=attributes,
             values=final_scores,
@@ -685,16 +843,12 @@ def submit_final_evaluation(
             color='purple',
             title=f"{student_name} 最终综合能力评价"
         )
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-            fig.savefig(tmpfile.name)
-            plot_path = tmpfile.name
-        plt.close(fig)
 
         final_eval_radar_output_update = gr.update(value=plot_path, visible=True)
         final_eval_message_update = gr.update(value=f"已成功为学生 '{student_name}' 生成最终评价雷达图。", visible=True)
 
     except Exception as e:
-        print(f"Error plotting final evaluation radar chart for {student_name}: {e}")
+        logger.error("Error plotting final evaluation radar chart: %s", e, extra=fields(student=student_name))
         final_eval_radar_output_update = gr.update(value=None, visible=False)
         final_eval_message_update = gr.update(value=f"生成最终评价雷达图失败：{e}", visible=True)
 
@@ -881,7 +1035,7 @@ custom_css = """
 
 with gr.Blocks(css=custom_css) as demo:
     with gr.Tabs() as overall_tabs:
-        with gr.Tab("主页", id="home_tab"):
+        with gr.Tab("主页", id="home_tab") as home_tab:
             with gr.Column(elem_id="home-page-wrapper"):
                 gr.Markdown("<h1>大型任务</h1>")
                 gr.Markdown("<p><strong>时间：</strong>2023年10月27日</p>")
@@ -893,7 +1047,7 @@ with gr.Blocks(css=custom_css) as demo:
                     start_task_button = gr.Button("任务开始", variant="primary", elem_id="start-task-button")
                     gr.Column(scale=1)
 
-        with gr.Tab("任务内容", id="paper_app_tab"):
+        with gr.Tab("任务内容", id="paper_app_tab") as paper_app_tab:
             gr.Markdown("<h2 style='text-align: center;'>任务书</h2>")
             with gr.Row():
                 student_name_input = gr.Textbox(label="请输入您的姓名：", placeholder="例如：张三", scale=2)
@@ -1028,6 +1182,11 @@ with gr.Blocks(css=custom_css) as demo:
                                 with gr.Tab("能力分析报告"):
                                     analysis_output_md = gr.Markdown("等待检查结果...", elem_classes=["output-text"])
                                 with gr.Tab("学习路线"): # 取消注释以显示学习路线思维导图
+                                    study_route_html_display = gr.HTML("等待检查结果...")
+                                    render_study_route_image_button = gr.Button("生成学习路线图（可下载）",
+                                                                                visible=False)
+                                    # 最近一次提交的错误明细，随请求由浏览器回传，多进程部署时也可用
+                                    study_route_errors_json = gr.JSON(visible=False)
                                     study_route_mindmap_display = gr.Image(label=None, show_label=False,
                                                                            type="filepath",
                                                                            interactive=False, visible=False)
@@ -1052,9 +1211,17 @@ with gr.Blocks(css=custom_css) as demo:
 
                             selected_student_info_md = gr.Markdown(
                                 "请从下拉列表中选择一个学生查看能力图谱，或点击按钮查看总体能力对比图。")
-                            comparison_radar_display = gr.Image(label=None, show_label=False, type="filepath",
-                                                                interactive=False,
-                                                                visible=False)
+                            # 查看类图表直接输出 SVG（svg_radar.py），无需 matplotlib 渲染，悬停顶点可查看分数
+                            comparison_radar_display = gr.HTML(label=None, show_label=False, visible=False)
+
+                            gr.Markdown("---")
+
+                            gr.Markdown("### 整班报告导出")
+                            export_include_mindmaps_checkbox = gr.Checkbox(label="包含学习路线思维导图（较慢）",
+                                                                           value=False)
+                            export_class_button = gr.Button("导出全班报告（zip）")
+                            export_class_status_md = gr.Markdown("")
+                            export_class_file = gr.File(label="全班报告", interactive=False, visible=False)
 
                 with gr.Tab("随堂测试", id="quiz_tab"):
                     gr.Markdown("## 随堂测试")
@@ -1075,7 +1242,7 @@ with gr.Blocks(css=custom_css) as demo:
                         quiz_stats_output_md = gr.Markdown(display_quiz_stats(), visible=True,
                                                            elem_classes=["output-text"])
 
-        with gr.Tab("最终评价", id="final_evaluation_tab"):
+        with gr.Tab("最终评价", id="final_evaluation_tab") as final_evaluation_tab:
             gr.Markdown("## 最终评价")
             final_eval_student_name_display = gr.Textbox(label="当前评价学生", interactive=False,
                                                          placeholder="请在'任务内容'页面提交或选择学生")
@@ -1099,13 +1266,29 @@ with gr.Blocks(css=custom_css) as demo:
                                                visible=False)
             final_eval_message = gr.Markdown("")
 
+        with gr.Tab("教师看板", id="teacher_dashboard_tab") as teacher_dashboard_tab:
+            gr.Markdown("## 全班错误分布")
+            gr.Markdown(f"按各学生最近一次检查统计，打开本页时每 {DASHBOARD_REFRESH_SECONDS} 秒自动刷新。")
+            error_dashboard_html = gr.HTML("暂无检查结果。")
+            error_dashboard_version = gr.State(None)
+            error_dashboard_timer = gr.Timer(DASHBOARD_REFRESH_SECONDS, active=False)
+
+        with gr.Tab("管理", id="admin_tab") as admin_tab:
+            gr.Markdown("## 分阶段耗时")
+            gr.Markdown("本服务进程内各事件每个阶段的耗时与失败次数；Prometheus 可抓取本机的 `/metrics`。")
+            refresh_metrics_button = gr.Button("刷新")
+            metrics_md = gr.Markdown("暂无统计数据。")
+            gr.Markdown("## 内存")
+            memory_md = gr.Markdown("暂无采样数据。")
+
     start_task_button.click(
         lambda: gr.update(selected="paper_app_tab"),
-        outputs=[overall_tabs]
+        outputs=[overall_tabs],
+        queue=EVENT_QUEUE_ENABLED
     )
 
     submit_button.click(
-        fn=process_submission,
+        fn=SCHEDULER.scheduled(GRADING)(process_submission),
         inputs=[
             student_name_input,
             subnet_id_input, network_name_input, station_config_table, channel_segment_table,
@@ -1127,47 +1310,120 @@ with gr.Blocks(css=custom_css) as demo:
             selected_student_info_md,
             comparison_radar_display,
             final_eval_student_name_display,
-            network_analysis_error_message
-        ]
+            network_analysis_error_message,
+            study_route_html_display,
+            study_route_errors_json,
+            render_study_route_image_button
+        ],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(GRADING)
     ).then(
-        fn=view_student_radar,
+        # 提交后显示本人的能力图，属于判分流程的一部分
+        fn=SCHEDULER.scheduled(GRADING)(view_student_radar),
         inputs=[student_list_dropdown],
         outputs=[comparison_radar_display, selected_student_info_md, growth_radar_button,
-                 final_eval_student_name_display]
+                 final_eval_student_name_display],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(GRADING)
+    )
+
+    render_study_route_image_button.click(
+        fn=SCHEDULER.scheduled(GRADING)(render_study_route_image),
+        inputs=[study_route_errors_json],
+        outputs=[study_route_mindmap_display],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(GRADING)
     )
 
     student_list_dropdown.change(
-        fn=view_student_radar,
+        fn=SCHEDULER.scheduled(ANALYTICS)(view_student_radar),
         inputs=[student_list_dropdown],
         outputs=[comparison_radar_display, selected_student_info_md, growth_radar_button,
-                 final_eval_student_name_display]
+                 final_eval_student_name_display],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
     )
 
     overall_radar_button.click(
-        fn=view_overall_radar,
-        inputs=[],
-        outputs=[comparison_radar_display, selected_student_info_md, growth_radar_button]
+        fn=SCHEDULER.scheduled(ANALYTICS)(view_overall_radar),
+        inputs=[student_list_dropdown],
+        outputs=[comparison_radar_display, selected_student_info_md, growth_radar_button],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
     )
 
     growth_radar_button.click(
-        fn=view_student_growth_radar,
+        fn=SCHEDULER.scheduled(ANALYTICS)(view_student_growth_radar),
         inputs=[student_list_dropdown],
-        outputs=[comparison_radar_display, selected_student_info_md]
+        outputs=[comparison_radar_display, selected_student_info_md],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
+    )
+
+    export_class_button.click(
+        fn=SCHEDULER.scheduled(ANALYTICS)(export_class_report),
+        inputs=[export_include_mindmaps_checkbox],
+        outputs=[export_class_file, export_class_status_md],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
+    )
+
+    # 只在教师看板打开时轮询，离开时停止计时器
+    teacher_dashboard_tab.select(
+        fn=lambda: gr.Timer(active=True),
+        outputs=[error_dashboard_timer],
+        queue=EVENT_QUEUE_ENABLED
+    ).then(
+        fn=SCHEDULER.scheduled(ANALYTICS)(refresh_error_dashboard),
+        inputs=[error_dashboard_version],
+        outputs=[error_dashboard_html, error_dashboard_version],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
+    )
+    for other_tab in (home_tab, paper_app_tab, final_evaluation_tab, admin_tab):
+        other_tab.select(
+            fn=lambda: gr.Timer(active=False),
+            outputs=[error_dashboard_timer],
+            queue=EVENT_QUEUE_ENABLED
+        )
+
+    error_dashboard_timer.tick(
+        fn=SCHEDULER.scheduled(ANALYTICS)(refresh_error_dashboard),
+        inputs=[error_dashboard_version],
+        outputs=[error_dashboard_html, error_dashboard_version],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
+    )
+
+    admin_tab.select(
+        fn=SCHEDULER.scheduled(ANALYTICS)(refresh_metrics),
+        outputs=[metrics_md, memory_md],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
+    )
+    refresh_metrics_button.click(
+        fn=SCHEDULER.scheduled(ANALYTICS)(refresh_metrics),
+        outputs=[metrics_md, memory_md],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
     )
 
     submit_quiz_button.click(
-        fn=submit_quiz,
+        fn=SCHEDULER.scheduled(QUIZ)(submit_quiz),
         inputs=quiz_inputs,
-        outputs=[quiz_result_output_md, quiz_stats_output_md]
+        outputs=[quiz_result_output_md, quiz_stats_output_md],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(QUIZ)
     )
 
     quiz_tab_selector_button.click(
         lambda: gr.update(selected="quiz_tab"),
-        outputs=[main_tabs]
+        outputs=[main_tabs],
+        queue=EVENT_QUEUE_ENABLED
     )
 
     submit_final_evaluation_button.click(
-        fn=submit_final_evaluation,
+        fn=SCHEDULER.scheduled(ANALYTICS)(submit_final_evaluation),
         inputs=[
             final_eval_student_name_display,
             leader_score_influence,
@@ -1177,12 +1433,133 @@ with gr.Blocks(css=custom_css) as demo:
             teacher_score_innov,
             teacher_score_potential
         ],
-        outputs=[final_eval_radar_output, final_eval_message]
+        outputs=[final_eval_radar_output, final_eval_message],
+        queue=EVENT_QUEUE_ENABLED,
+        **SCHEDULER.gradio_concurrency(ANALYTICS)
     )
 
+if EVENT_QUEUE_ENABLED:
+    # 界面事件在 Gradio 队列中按分组排队，判分组是否过载需要把其中排队的事件一并计入
+    SCHEDULER.attach_gradio_queue(demo)
+
+# --- 启动预热 ---
+# 重启后的第一份答卷要额外承担 matplotlib 字体加载、中文字形栅格化、雷达图模板构建等一次性开销。
+# CLASSMATCH_WARMUP 不为 0 时（默认开启），服务开始接受连接的同时在后台线程中检查一份示例答卷（界面的空白模板），
+# 用检查结果渲染界面用到的每种图表各一次（PNG 与 SVG），并生成 Gradio 的界面配置与 API 描述。
+# 预热期间 GET /readyz 返回 503，完成后才返回 200；负载均衡据此在预热完成后再分配流量，预热期间直接到达的请求照常处理。
+# 预热不写入学生数据，也不计入 /metrics 的耗时统计。
+WARMUP_ENV = "CLASSMATCH_WARMUP"
+WARMUP_ENABLED = os.environ.get(WARMUP_ENV, "1") != "0"
+_WARMUP_STUDENT_NAME = "预热示例"
+
+
+def warm_up():
+    """执行启动预热并标记就绪，返回 {步骤: 秒}；某一步失败时记录错误并继续其余步骤。"""
+    timings = {}
+    failed_steps = []
+
+    def _step(name, fn):
+        started_at = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            failed_steps.append(name)
+            logger.error("Warm-up step %s failed: %s", name, e, extra=fields(stage="warmup"))
+        finally:
+            timings[name] = time.perf_counter() - started_at
+
+    def _check_sample_paper():
+        capture_paper_data_string(
+            "", "", station_config_headers, station_config_data, channel_segment_headers, channel_segment_data,
+            channel_suite_headers, channel_suite_data, network_analysis_headers, network_analysis_data, "", "",
+            p2p_headers, p2p_data, virtual_subnet_headers, virtual_subnet_data, "aa")
+        return check_paper("", "", station_config_data, channel_segment_data, "aa", channel_suite_data,
+                           network_analysis_data, "", "", p2p_data, virtual_subnet_data, 64)
+
+    check_result = _step("check_paper", _check_sample_paper)
+    _, error_sections_with_counts, _, detailed_errors = check_result or ("", {}, None, [])
+    attributes, scores = _calculate_radar_data(error_sections_with_counts, None)
+    history = [scores, scores]
+
+    def _render_charts():
+        # 界面中仍以 PNG 渲染的图表：本次/最终评价雷达图（模板渲染）与 dpi=150 的学习路线图；
+        # 成长与对比雷达图以 SVG 显示，由 _render_svg_charts 预热
+        return RENDER_SERVICE.warm_up([
+            ("plot_attribute_radar", {}, dict(character_name=_WARMUP_STUDENT_NAME, attributes=attributes,
+                                              values=scores, max_value=100, color='dodgerblue')),
+            ("plot_study_route_mindmap", {'dpi': 150}, dict(student_name=_WARMUP_STUDENT_NAME,
+                                                            detailed_errors=detailed_errors)),
+        ])
+
+    def _render_svg_charts():
+        attribute_radar_svg(character_name=_WARMUP_STUDENT_NAME, attributes=attributes, values=scores,
+                            max_value=100, color='dodgerblue')
+        history_radar_svg(_WARMUP_STUDENT_NAME, attributes, history)
+        comparison_radar_svg([(_WARMUP_STUDENT_NAME, scores)] * 2, attributes)
+        format_study_route_html(_WARMUP_STUDENT_NAME, build_study_route(detailed_errors))
+
+    def _build_gradio_config():
+        demo.get_config_file()
+        demo.get_api_info()
+
+    render_pids = _step("render_charts", _render_charts)
+    _step("svg_charts", _render_svg_charts)
+    _step("gradio_config", _build_gradio_config)
+
+    total_seconds = sum(timings.values())
+    READINESS.mark_ready(warmup_seconds=round(total_seconds, 3), warmup_failed_steps=failed_steps,
+                         render_processes=render_pids or [])
+    logger.info("Warm-up finished in %.2fs; ready to accept traffic.", total_seconds,
+                extra=fields(stage="warmup", duration=total_seconds,
+                             **{f"{name}_seconds": round(seconds, 3) for name, seconds in timings.items()}))
+    return timings
+
+
+def start_serving_process():
+    """
+    每个服务进程开始接受连接前调用：读回状态检查点（须在处理第一个请求之前完成），创建渲染进程池，
+    在后台线程中开始预热（预热完成后报告就绪；关闭预热时立即报告就绪），并启动内存看门狗与检查点线程。
+    不等待预热完成，调用方随即开始监听，预热期间 /readyz 返回 503。
+    """
+    if CHECKPOINTER is not None:
+        CHECKPOINTER.restore()
+    # 渲染进程池在调用方线程中、开始监听之前创建：fork 一次性创建全部渲染子进程，此时还没有服务线程持有锁。
+    # 不等待子进程完成导入，后台预热只向已创建的进程池投递任务
+    RENDER_SERVICE.start(wait=False)
+    if WARMUP_ENABLED:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        READINESS.mark_ready(warmup_seconds=None)
+    logger.info("Render service running with %d workers.", RENDER_SERVICE.max_workers)
+    MEMORY_WATCHDOG.start()
+    if CHECKPOINTER is not None:
+        CHECKPOINTER.start()
+
+
+# --- 启动耗时预算 ---
+# 冷启动时间以导入本模块的耗时衡量（python -X importtime paper.py 可查看各依赖的明细）。
+# 预算只约束本项目自己的部分（总耗时减去 gradio 的导入）：各模块与界面构建超出
+# CLASSMATCH_IMPORT_BUDGET_SECONDS 时给出警告。
+_IMPORT_BUDGET_ENV = "CLASSMATCH_IMPORT_BUDGET_SECONDS"
+_DEFAULT_IMPORT_BUDGET_SECONDS = 2.0
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED_AT
+APP_IMPORT_SECONDS = IMPORT_SECONDS - _GRADIO_IMPORT_SECONDS
+IMPORT_BUDGET_SECONDS = env_number(_IMPORT_BUDGET_ENV, _DEFAULT_IMPORT_BUDGET_SECONDS)
+if APP_IMPORT_SECONDS > IMPORT_BUDGET_SECONDS:
+    logger.warning("Importing paper.py took %.2fs excluding gradio (%.2fs), over the %.2fs budget.",
+                   APP_IMPORT_SECONDS, _GRADIO_IMPORT_SECONDS, IMPORT_BUDGET_SECONDS,
+                   extra=fields(stage="import", duration=IMPORT_SECONDS, app_duration=APP_IMPORT_SECONDS))
+
+
 if __name__ == "__main__":
-    print(f"Starting Gradio app...")
+    logger.info("Starting Gradio app... (imported in %.2fs)", IMPORT_SECONDS)
+    logger.info("当前工作目录: %s", os.getcwd())
+    logger.info("文件是否存在: %s", os.path.exists("static/slide.html"))
     try:
-        demo.launch(debug=True, share=False)
+        start_serving_process()
+        # 批量提交接口、/metrics 与 /readyz 的路由放在 Gradio 自身路由之前注册
+        demo.launch(debug=True, share=False,
+                    app_kwargs={"routes": list(SUBMISSION_API_ROUTER.routes) + list(METRICS_ROUTER.routes) +
+                                          list(READINESS_ROUTER.routes)})
     except Exception as e:
-        print(f"Error launching Gradio app: {e}")
\ No newline at end of file
+        logger.error("Error launching Gradio app: %s", e)
\ No newline at end of file
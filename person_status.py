@@ -1,45 +1,172 @@
 import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
+import io
 import os
+import sys
+import json
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+import matplotlib.image as mpimg
+import matplotlib.text
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.font_manager import FontProperties
 import textwrap
+import threading
 
-try:
-    font_paths = matplotlib.font_manager.findSystemFonts(fontpaths=None, fontext='ttf')
-    zh_font = None
-    # 尝试多种常见的中文宋体或黑体字体名称，提高兼容性
-    preferred_fonts = ['SimHei', 'Microsoft YaHei', 'WenQuanYi Zen Hei', 'Arial Unicode MS', 'Noto Sans CJK SC']
+# 学习建议映射已移至 recommendations.py，此处导入以保持原有接口
+from recommendations import RECOMMENDATIONS_MAP, get_study_recommendation, build_study_route  # noqa: F401
+from app_logging import get_logger
 
-    for font_name in preferred_fonts:
+logger = get_logger("person_status")
+
+# --- 中文字体配置（延迟到首次绘图时执行） ---
+# 扫描系统字体较慢，不在导入本模块时进行；各绘图函数开头调用 ensure_chinese_font()，
+# 渲染进程也可在启动时提前调用以完成预热。
+# 查找结果（字体族名与文件路径）缓存在磁盘上，以字体目录指纹为键：字体目录没有变化时，
+# 之后的进程与重启直接复用缓存，不再重新扫描。
+_font_lock = threading.Lock()
+_font_configured = False
+
+# 尝试多种常见的中文宋体或黑体字体名称，提高兼容性
+_PREFERRED_FONTS = ['SimHei', 'Microsoft YaHei', 'WenQuanYi Zen Hei', 'Arial Unicode MS', 'Noto Sans CJK SC']
+
+_FONT_CACHE_ENV = "CLASSMATCH_FONT_CACHE"
+_FONT_CACHE_VERSION = 1
+
+
+def _font_cache_path():
+    return os.environ.get(_FONT_CACHE_ENV) or os.path.join(
+        os.path.expanduser("~"), ".cache", "classmatch", "font_cache.json")
+
+
+def _font_directories():
+    font_manager = matplotlib.font_manager
+    if sys.platform == "win32":
+        return [font_manager.win32FontDirectory()] + list(font_manager.MSUserFontDirectories)
+    if sys.platform == "darwin":
+        return list(font_manager.OSXFontDirectories)
+    return list(font_manager.X11FontDirectories)
+
+
+def _font_fingerprint():
+    """字体目录指纹：各级子目录的修改时间与文件数，安装或删除字体后随之变化。"""
+    digest = hashlib.sha1()
+    digest.update(f"{_FONT_CACHE_VERSION}|{matplotlib.__version__}|{_PREFERRED_FONTS}\n".encode("utf-8"))
+    for directory in _font_directories():
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames.sort()
+            try:
+                mtime_ns = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue
+            digest.update(f"{dirpath}|{mtime_ns}|{len(filenames)}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def _load_font_cache(fingerprint):
+    """返回缓存的 (family, path)；缓存不存在、已损坏或指纹不一致时返回 None。"""
+    try:
+        with open(_font_cache_path(), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("fingerprint") != fingerprint:
+        return None
+    family, path = cached.get("family"), cached.get("path")
+    if path is not None and not os.path.exists(path):
+        return None
+    return family, path
+
+
+def _save_font_cache(fingerprint, family, path):
+    cache_path = _font_cache_path()
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "family": family, "path": path}, f, ensure_ascii=False)
+        # 先写临时文件再替换，多个渲染进程同时写入时也不会留下半个文件
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not write font cache %s: %s", cache_path, e)
+
+
+def _resolve_chinese_font():
+    """按 _PREFERRED_FONTS 顺序查找可用的中文字体，返回 (family, path)，找不到时返回 (None, None)。"""
+    font_manager = matplotlib.font_manager
+    font_paths = None
+    for font_name in _PREFERRED_FONTS:
         try:
-            # 尝试直接通过字体名称查找
-            zh_font = matplotlib.font_manager.FontProperties(family=font_name)
-            # 验证字体是否实际可用
-            if os.path.exists(matplotlib.font_manager.findfont(font_name)):
-                break
-            else:
-                zh_font = None  # 如果通过名称找到的路径不存在，则重置
+            # 尝试直接通过字体名称查找；找不到时抛出异常而不是退回默认字体
+            font_path = font_manager.findfont(font_name, fallback_to_default=False)
+            if os.path.exists(font_path):
+                return font_manager.FontProperties(fname=font_path).get_name(), font_path
         except Exception:
-            # 如果直接通过名称查找失败，则尝试遍历文件路径
+            # 如果直接通过名称查找失败，则尝试遍历文件路径（只在需要时扫描一次系统字体）
+            if font_paths is None:
+                font_paths = font_manager.findSystemFonts(fontpaths=None, fontext='ttf')
             for font_path in font_paths:
                 fname = os.path.basename(font_path).lower()
                 if font_name.lower().replace(" ", "") in fname.lower().replace(" ", ""):
-                    zh_font = matplotlib.font_manager.FontProperties(fname=font_path)
-                    break
-            if zh_font:
-                break  # 找到了就退出外层循环
+                    return font_manager.FontProperties(fname=font_path).get_name(), font_path
+    return None, None
 
-    if zh_font:
-        plt.rcParams['font.sans-serif'] = [zh_font.get_name()]
-    else:
-        print("Warning: Could not find common Chinese fonts. Falling back. Chinese labels might not display correctly.")
-        plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'WenQuanYi Zen Hei', 'Arial Unicode MS',
-                                           'sans-serif']
-    plt.rcParams['axes.unicode_minus'] = False
-except Exception as e:
-    print(f"Error setting Chinese font in person_status.py: {e}")
-    print("Chinese labels might not display correctly.")
+
+def _configure_chinese_font():
+    try:
+        fingerprint = _font_fingerprint()
+        cached = _load_font_cache(fingerprint)
+        if cached is not None:
+            family, font_path = cached
+        else:
+            family, font_path = _resolve_chinese_font()
+            _save_font_cache(fingerprint, family, font_path)
+
+        if family:
+            # 通过文件路径找到的字体未必在 matplotlib 的字体列表中，需要先注册才能按族名使用
+            font_manager = matplotlib.font_manager
+            if not any(entry.fname == font_path for entry in font_manager.fontManager.ttflist):
+                font_manager.fontManager.addfont(font_path)
+            plt.rcParams['font.sans-serif'] = [family]
+        else:
+            logger.warning("Could not find common Chinese fonts. Falling back. Chinese labels might not display correctly.")
+            # 列表末尾保留 matplotlib 自带的 DejaVu Sans，保证至少有一个可用字体
+            plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'WenQuanYi Zen Hei', 'Arial Unicode MS',
+                                               'DejaVu Sans']
+        plt.rcParams['axes.unicode_minus'] = False
+    except Exception as e:
+        logger.error("Error setting Chinese font: %s. Chinese labels might not display correctly.", e)
+
+
+def ensure_chinese_font():
+    """首次调用时配置 matplotlib 中文字体，之后直接返回。"""
+    global _font_configured
+    if _font_configured:
+        return
+    with _font_lock:
+        if not _font_configured:
+            _configure_chinese_font()
+            _font_configured = True
+
+
+# --- 图形生命周期 ---
+# 绘图函数创建的图形不注册到 pyplot 的图形管理器（Figure + FigureCanvasAgg），除返回值外没有全局引用：
+# 绘图中途抛出异常时，已创建的图形随调用栈一起被回收，不会在 plt.get_fignums() 中越积越多。
+# 使用完毕后调用 release_figure() 尽早释放其中的坐标轴、文字与像素缓冲。
+def new_figure(figsize=None):
+    """创建不经过 pyplot 管理的图形，可直接 savefig。"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def release_figure(fig):
+    """清空图形内容；若图形由 pyplot 创建，同时从图形管理器中移除。"""
+    plt.close(fig)
+    fig.clear()
 
 
 def plot_attribute_radar(character_name, attributes, values,
@@ -55,7 +182,9 @@ def plot_attribute_radar(character_name, attributes, values,
     plot_values = np.concatenate((values, [values[0]]))
     plot_angles = angles + angles[:1]
 
-    fig, ax = plt.subplots(figsize=figsize, subplot_kw=dict(polar=True))
+    ensure_chinese_font()
+    fig = new_figure(figsize=figsize)
+    ax = fig.add_subplot(polar=True)
 
     ax.plot(plot_angles, plot_values, linewidth=2, linestyle='solid', label=character_name, color=color)
     ax.fill(plot_angles, plot_values, color, alpha=0.4)
@@ -86,14 +215,185 @@ def plot_attribute_radar(character_name, attributes, values,
     return fig, ax
 
 
-def plot_history_radar(student_name, submissions, max_value=100, figsize=(9, 9)):
-    if not submissions:
+# --- 能力雷达图模板缓存 ---
+# 同一组能力维度、同一尺寸的雷达图，坐标轴、刻度与网格完全相同；布局（tight_layout）另外只取决于
+# 标题与图例的尺寸。模板把静态元素渲染一次并保存像素，之后每个请求只恢复背景、更新多边形、标题与图例
+# 并重绘这几个元素，再直接把画布像素编码为 PNG，省去整图重新布局和绘制。
+# 模板按 (能力维度, 最大值, 尺寸, 标题与图例的像素尺寸) 缓存：先测量本次的标题与图例，尺寸相同的姓名
+# （例如字数相同的中文姓名）共用一个模板，其布局与 plot_attribute_radar 对该姓名算出的布局一致。
+# 绘制顺序与整图绘制一致：背景 → 填充 → 网格与刻度（预先渲染的透明图层） → 折线 → 外框 → 标题与图例。
+# 模板不经过 pyplot 创建，不计入 plt 管理的打开图形，也不需要 plt.close。
+_RADAR_TEMPLATE_CACHE_SIZE = 16
+_radar_templates = OrderedDict()
+_radar_templates_lock = threading.Lock()
+_radar_text_probe = None
+
+
+class _RadarTextProbe:
+    """按 plot_attribute_radar 的设置创建标题与图例，只用于测量它们的像素尺寸。"""
+
+    def __init__(self):
+        self.fig = Figure()
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.fig.add_subplot(polar=True)
+        ax.plot([], [], linewidth=2, linestyle='solid', label=" ")
+        self.title = ax.set_title(" ", size=16, y=1.08)
+        self.legend = ax.legend(loc='upper left', bbox_to_anchor=(1.05, 1.0), frameon=False)
+
+    def measure(self, character_name, plot_title):
+        renderer = self.canvas.get_renderer()
+        self.title.set_text(plot_title)
+        self.legend.texts[0].set_text(character_name)
+        extents = (self.title.get_window_extent(renderer), self.legend.get_window_extent(renderer))
+        return tuple(round(value, 3) for bbox in extents for value in (bbox.width, bbox.height))
+
+
+class _RadarTemplate:
+    def __init__(self, attributes, max_value, figsize, character_name, plot_title):
+        ensure_chinese_font()
+        self.lock = threading.Lock()
+        num_attributes = len(attributes)
+        angles = np.linspace(0, 2 * np.pi, num_attributes, endpoint=False)
+        self.plot_angles = np.concatenate((angles, angles[:1]))
+
+        self.fig = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot(polar=True)
+
+        placeholder = np.zeros(num_attributes + 1)
+        self.line, = ax.plot(self.plot_angles, placeholder, linewidth=2, linestyle='solid', label=character_name)
+        self.fill = ax.fill(self.plot_angles, placeholder, 'skyblue', alpha=0.4)[0]
+
+        ax.set_xticks(angles)
+        ax.set_xticklabels(attributes)
+
+        num_yticks = 5
+        y_tick_step = max_value / num_yticks
+        y_ticks = np.arange(0, max_value + y_tick_step, y_tick_step)
+
+        ax.set_yticks(y_ticks)
+        ax.set_yticklabels([f"{int(yt)}" if yt > 0 else "" for yt in y_ticks])
+        ax.set_ylim(0, max_value)
+        ax.set_rlabel_position(0)
+
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+        # 按本次的标题与图例计算布局，之后尺寸相同的标题与图例共用
+        ax.set_title(plot_title, size=16, y=1.08)
+        self.legend = ax.legend(loc='upper left', bbox_to_anchor=(1.05, 1.0), frameon=False)
+        self.fig.tight_layout(rect=[0, 0, 0.95, 1])
+
+        # 整图绘制时网格与刻度（zorder 1.5）位于填充（1）之上、折线（2）之下，外框（2.5）又在折线之上：
+        # 背景只含画布与坐标区底色，网格与刻度单独渲染为透明图层，外框每次重绘（代价很小）
+        self.axis_artists = (ax.xaxis, ax.yaxis)
+        # 极坐标的 start/end/inner 外框只在扇形或内半径不为 0 时显示（PolarAxes.draw 中切换），只保留当前可见的
+        self.spines = tuple(spine for spine in ax.spines.values() if spine.get_visible())
+        per_request_artists = (self.fill, self.line, ax.title, self.legend) + self.axis_artists + self.spines
+        for artist in per_request_artists:
+            artist.set_visible(False)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+        hidden_for_overlay = [artist for artist in (self.fig.patch, ax.patch) + tuple(ax.get_children())
+                              if artist.get_visible()]
+        for artist in hidden_for_overlay:
+            artist.set_visible(False)
+        for artist in self.axis_artists:
+            artist.set_visible(True)
+        self.canvas.draw()
+        # draw_image 以左下角为原点，缓冲区的第一行是图像顶部
+        self.axis_overlay = np.asarray(self.canvas.buffer_rgba())[::-1].copy()
+        for artist in hidden_for_overlay + list(per_request_artists):
+            artist.set_visible(True)
+
+    def render_png(self, character_name, values, color, plot_title):
+        """返回 PNG 字节。标题与图例须与构建模板时的尺寸相同（由缓存键保证）。"""
+        plot_values = np.concatenate((values, values[:1]))
+        plot_points = np.column_stack((self.plot_angles, plot_values))
+        with self.lock:
+            self.canvas.restore_region(self.background)
+
+            self.ax.title.set_text(plot_title)
+            self.legend.texts[0].set_text(character_name)
+            self.line.set_data(self.plot_angles, plot_values)
+            self.line.set_color(color)
+            self.fill.set_xy(plot_points)
+            self.fill.set_facecolor(color)
+            self.legend.get_lines()[0].set_color(color)
+
+            renderer = self.canvas.get_renderer()
+            self.ax.draw_artist(self.fill)
+            gc = renderer.new_gc()
+            renderer.draw_image(gc, 0, 0, self.axis_overlay)
+            gc.restore()
+            for artist in (self.line,) + self.spines + (self.ax.title, self.legend):
+                self.ax.draw_artist(artist)
+
+            buffer = io.BytesIO()
+            mpimg.imsave(buffer, np.asarray(self.canvas.buffer_rgba()), format="png", dpi=self.fig.dpi)
+        return buffer.getvalue()
+
+    def close(self):
+        self.fig.clear()
+
+
+def _get_radar_template(attributes, max_value, figsize, character_name, plot_title):
+    global _radar_text_probe
+    with _radar_templates_lock:
+        if _radar_text_probe is None:
+            _radar_text_probe = _RadarTextProbe()
+        key = (tuple(attributes), max_value, tuple(figsize), _radar_text_probe.measure(character_name, plot_title))
+        template = _radar_templates.get(key)
+        if template is not None:
+            _radar_templates.move_to_end(key)
+            return template
+    # 构建模板需要完整绘制一次，放在全局锁之外进行；并发构建同一模板时保留先完成的那个
+    template = _RadarTemplate(attributes, max_value, figsize, character_name, plot_title)
+    with _radar_templates_lock:
+        existing = _radar_templates.get(key)
+        if existing is not None:
+            template.close()
+            return existing
+        _radar_templates[key] = template
+        while len(_radar_templates) > _RADAR_TEMPLATE_CACHE_SIZE:
+            _, evicted = _radar_templates.popitem(last=False)
+            evicted.close()
+    return template
+
+
+def render_attribute_radar_png(character_name, attributes, values,
+                               max_value=100, color='skyblue', title=None, figsize=(8, 8)):
+    """与 plot_attribute_radar 参数相同，但使用模板缓存直接返回 PNG 字节。"""
+    num_attributes = len(attributes)
+    if num_attributes != len(values):
+        raise ValueError(f"Attributes list length ({num_attributes}) must match values list length ({len(values)}).")
+    if num_attributes < 3:
+        raise ValueError("At least 3 attributes are needed to draw a polygon radar chart.")
+
+    # 测量标题与图例前先配置字体，与整图绘制使用同一字体
+    ensure_chinese_font()
+    plot_title = f'{character_name} 能力雷达图' if title is None else title
+    template = _get_radar_template(attributes, max_value, figsize, character_name, plot_title)
+    return template.render_png(character_name, np.asarray(values, dtype=float), color, plot_title)
+
+
+# 可直接返回 PNG 字节的快速渲染函数，键为对应的 plot_* 函数名（供 render_service 使用）
+TEMPLATE_RENDERERS = {
+    "plot_attribute_radar": render_attribute_radar_png,
+}
+
+
+def plot_history_radar(student_name, attributes, score_history, max_value=100, figsize=(9, 9)):
+    """score_history: (提交次数 × 能力维度) 的成绩数组，按提交先后排列。"""
+    score_history = np.asarray(score_history)
+    if score_history.ndim != 2 or len(score_history) == 0:
         raise ValueError("没有提交记录可用于绘制成长雷达图。")
-    if len(submissions[0]['attributes']) < 3:
+    if len(attributes) < 3:
         raise ValueError("至少需要3个能力维度才能绘制雷达图。")
+    if score_history.shape[1] != len(attributes):
+        raise ValueError(f"成绩列数 ({score_history.shape[1]}) 与能力维度数 ({len(attributes)}) 不一致。")
 
-    num_attributes = len(submissions[0]['attributes'])
-    attributes = submissions[0]['attributes']
+    num_attributes = len(attributes)
 
     angles = np.linspace(0, 2 * np.pi, num_attributes, endpoint=False).tolist()
     plot_angles = angles + angles[:1]
@@ -105,14 +405,16 @@ def plot_history_radar(student_name, submissions, max_value=100, figsize=(9, 9))
         import matplotlib.cm as cm
         cmap = cm.get_cmap('tab10')
 
-    fig, ax = plt.subplots(figsize=figsize, subplot_kw=dict(polar=True))
+    ensure_chinese_font()
+    fig = new_figure(figsize=figsize)
+    ax = fig.add_subplot(polar=True)
 
-    for i, submission in enumerate(submissions):
-        scores = submission['scores']
-        plot_values = np.concatenate((np.array(scores), [scores[0]]))
+    num_submissions = len(score_history)
+    for i, scores in enumerate(score_history):
+        plot_values = np.concatenate((scores, scores[:1]))
 
-        if len(submissions) > 1:
-            color = cmap(i / (len(submissions) - 1))
+        if num_submissions > 1:
+            color = cmap(i / (num_submissions - 1))
         else:
             color = cmap(0.5)
 
@@ -129,7 +431,7 @@ def plot_history_radar(student_name, submissions, max_value=100, figsize=(9, 9))
     ax.set_rlabel_position(0)
     ax.grid(True, linestyle='--', alpha=0.7)
 
-    ax.set_title(f'{student_name} 最近{len(submissions)}次能力变化图', size=16, y=1.08)
+    ax.set_title(f'{student_name} 最近{num_submissions}次能力变化图', size=16, y=1.08)
     ax.legend(loc='upper left', bbox_to_anchor=(1.05, 1.0), frameon=False)
     fig.tight_layout(rect=[0, 0, 0.95, 1])
 
@@ -156,7 +458,9 @@ def plot_comparison_radar(list_of_name_and_scores, attributes, max_value=100, fi
     colors_list = [cmap(i / (len(list_of_name_and_scores) - 1)) if len(list_of_name_and_scores) > 1 else cmap(0.5) for i
                    in range(len(list_of_name_and_scores))]
 
-    fig, ax = plt.subplots(figsize=figsize, subplot_kw=dict(polar=True))
+    ensure_chinese_font()
+    fig = new_figure(figsize=figsize)
+    ax = fig.add_subplot(polar=True)
 
     for i, (student_name, scores) in enumerate(list_of_name_and_scores):
         plot_val = np.concatenate((np.array(scores), [scores[0]]))
@@ -184,199 +488,87 @@ def plot_comparison_radar(list_of_name_and_scores, attributes, max_value=100, fi
     return fig, ax
 
 
-# --- 新增：绘制学习路线思维导图函数 ---
-
-# 定义错误类型到通用学习建议的映射 (更详细和全面的映射可以进一步扩展)
-RECOMMENDATIONS_MAP = {
-    # （3）信道段参数 - 信道频率规划
-    # 移除信道类型选择的建议
-    # ("（3）信道段参数", "dropdown", "信道类型选择"): "复习信道类型（'uu'/'aa'）的选择与意义。确保选择正确，才能进行后续频率逻辑检查。",
-    ("（3）信道段参数", "dataframe_cell",
-     "下行起始频率应在"): "检查下行起始频率是否在指定范围内（'uu'模式12.25-12.75MHz，'aa'模式19.6-21.2MHz）。",
-    ("（3）信道段参数", "dataframe_cell",
-     "下行终止频率应在"): "检查下行终止频率是否在指定范围内（'uu'模式12.25-12.75MHz，'aa'模式19.6-21.2MHz）。",
-    ("（3）信道段参数", "dataframe_cell",
-     "上行起始频率应在"): "检查上行起始频率是否在指定范围内（'uu'模式14.0-14.5MHz，'aa'模式29.4-31.0MHz）。",
-    ("（3）信道段参数", "dataframe_cell",
-     "上行终止频率应在"): "检查上行终止频率是否在指定范围内（'uu'模式14.0-14.5MHz，'aa'模式29.4-31.0MHz）。",
-    ("（3）信道段参数", "logic_check_failed",
-     "不满足"): "检查上行起始/终止频率与下行起始/终止频率是否保持正确的偏移关系（'uu'模式+1.75MHz，'aa'模式+9.8MHz）。",
-    ("（3）信道段参数", "frequency_logic_error",
-     "上行终止频率"): "信道段上行终止频率不应大于下行起始频率，请核对频率分配逻辑。",
-    ("（3）信道段参数", "dataframe_format_error",
-     None): "确保信道段参数表格格式正确，所有频率值均以数字填写，且表格结构完整。",
-    ("（3）信道段参数", "data_type_error", "频率值应为数字"): "信道段频率值必须是数字，请检查输入格式。",
-    ("（3）信道段参数", "column_count_mismatch", None): "信道段参数表格列数不匹配，请核对表格结构。",
-    ("（3）信道段参数", "logic_check_failed",
-     "无法对信道类型"): "信道段频率逻辑检查依赖于信道类型，请确保信道类型为'uu'或'aa'。",
-
-    # （4）信道套参数 - 信道业务参数 (UPDATED RECOMMENDATIONS)
-    ("（4）信道套参数", "dataframe_format_error",
-     None): "信道套参数表格格式错误或行/列数不匹配，应为2行5列，请核对表格结构及内容。",
-    ("（4）信道套参数", "logic_check_failed",
-     "无法获取信道段参数中的频率数据"): "信道套参数中的频点校验依赖信道段参数，请检查信道段参数表格的填写。",
-    ("（4）信道套参数", "logic_check_failed",
-     "无法校验TDM中心频点"): "因信道段频率数据缺失或格式错误，无法校验TDM中心频点。请先修正信道段参数。",
-    ("（4）信道套参数", "logic_check_failed",
-     "无法校验ALOHA中心频点"): "因信道段频率数据缺失或格式错误，无法校验ALOHA中心频点。请先修正信道段参数。",
-
-    ("（4）信道套参数", "data_type_error", "速率"): "信道套参数中，速率应为数字，请检查输入。",
-    ("（4）信道套参数", "dataframe_cell", "速率应为 9.6"): "信道套参数中，速率应固定为9.6kbps，请核对。",
-
-    ("（4）信道套参数", "data_type_error", "带宽"): "信道套参数中，带宽应为数字，请检查输入。",
-    ("（4）信道套参数", "dataframe_cell", "带宽应为 100"): "信道套参数中，带宽应固定为100kHz，请核对。",
-
-    ("（4）信道套参数", "data_type_error", "上行中心频点"): "信道套参数中，上行中心频点应为数字，请检查输入。",
-    ("（4）信道套参数", "dataframe_cell",
-     "上行中心频点应为"): "上行中心频点应根据信道段参数计算（TDM：信道段上行起始频率+50；ALOHA：信道段上行起始频率+150）。",
-
-    ("（4）信道套参数", "data_type_error", "下行中心频点"): "信道套参数中，下行中心频点应为数字，请检查输入。",
-    ("（4）信道套参数", "dataframe_cell",
-     "下行中心频点应为"): "下行中心频点应根据信道段参数计算（TDM：信道段下行起始频率+50；ALOHA：信道段下行起始频率+150）。",
-
-    # 1.组网参数分析 - 组网信息分析
-    ("1.组网参数分析", "dataframe_duplicate",
-     "CC地址列不允许重复"): "深入学习CC地址规划规范，确保每台通信控制器（CC）的地址是唯一的。",
-    ("1.组网参数分析", "dataframe_format_error", None): "检查组网参数分析表格的整体格式，确保数据可被正确解析。",
-    ("1.组网参数分析", "column_count_mismatch",
-     "CC地址列"): "组网参数分析表格缺少CC地址列，无法进行重复性校验。请核对表格结构。",
-
-    # 2.点对点通信参数 - 点对点业务参数
-    ("2.点对点通信参数", "textbox", "本端CC地址"): "核对本端CC地址的正确填写格式和值。",
-    ("2.点对点通信参数", "textbox", "对端XX地址"): "核对对端XX地址的正确填写格式和值。",
-    ("2.点对点通信参数", "dataframe_cell", None): "复习点对点业务参数（速率、带宽、频率范围）的配置要求。",
-    ("2.点对点通信参数", "frequency_logic_error",
-     "上行终止频率"): "点对点通信上行终止频率不应大于下行起始频率，请核对频点配置。",
-    ("2.点对点通信参数", "bandwidth_rate_mismatch",
-     "小于速率"): "请根据速率（kbps）检查带宽（khz）是否满足KBP映射文件中定义的最低要求，确保带宽大于等于对应值。",
-    ("2.点对点通信参数", "kbp_load_error", None): "KBP映射文件加载失败或为空，请检查kbp.txt文件是否存在和格式是否正确。",
-    ("2.点对点通信参数", "row_count_mismatch", None): "核对点对点通信参数表格行数是否完整。",
-    ("2.点对点通信参数", "column_count_mismatch", None): "检查点对点通信参数表格的列数是否正确。",
-    ("2.点对点通信参数", "dataframe_format_error", None): "确保点对点通信参数表格格式正确。",
-
-    # 3.虚拟子网参数 - 虚拟子网参数 (UPDATED RECOMMENDATIONS)
-    ("3.虚拟子网参数", "dataframe_format_error",
-     None): "虚拟子网参数表格格式错误或行/列数不匹配。应为1行6列，请核对表格结构及内容。",
-    ("3.虚拟子网参数", "logic_check_failed", "请选择一个虚拟子网速率"): "请在下拉列表中选择一个速率，以便校验带宽。",
-    ("3.虚拟子网参数", "bandwidth_rate_mismatch",
-     "小于速率"): "虚拟子网带宽应大于或等于所选速率对应的KBP最低带宽，请核对。",
-    ("3.虚拟子网参数", "data_type_error", "速率或带宽"): "虚拟子网速率或带宽应为数字，请检查输入格式。",
-    ("3.虚拟子网参数", "frequency_logic_error",
-     "下行起始频率不能大于下行终止频率"): "虚拟子网下行频率范围起始值不能大于终止值，请检查。",
-    ("3.虚拟子网参数", "frequency_logic_error",
-     "上行起始频率不能大于上行终止频率"): "虚拟子网上行频率范围起始值不能大于终止值，请检查。",
-    ("3.虚拟子网参数", "frequency_logic_error",
-     "频率范围重叠"): "虚拟子网的下行频率范围与上行频率范围不允许重叠，请调整。",
-    ("3.虚拟子网参数", "data_type_error", "频率值应为数字"): "虚拟子网频率值必须是数字，请检查输入格式。",
-
-    # 通用格式错误建议 (当无法匹配到具体单元格时)
-    (None, "格式错误或解析失败", None): "请检查该部分答卷的填写格式是否符合要求，确保数据可被系统正确解析。",
-    (None, "未知错误数", None): "该部分发生未知错误，请联系教师检查。",
-    (None, "data_type_error", None): "数据类型错误，请确保在数字字段输入的是数字。",
-    (None, "logic_check_failed", None): "逻辑检查失败，请复习该模块的业务逻辑和参数间关系。"
-}
+# --- 学习路线思维导图：布局引擎 ---
+# 节点尺寸由缓存的字体度量直接计算（以磅为单位，与 dpi 无关），一次算出全部节点位置，
+# 图形尺寸按内容大小设置，保存时只绘制一次，无需预先 draw、逐个节点 get_window_extent，
+# 也无需 bbox_inches='tight'（它会为计算边界额外绘制一遍）。
+# 测量使用的 dpi：字形微调（hinting）使文字宽度随 dpi 略有差异，按界面保存学习路线图的 dpi 测量
+_MINDMAP_MEASURE_DPI = 150
+_text_metrics_lock = threading.Lock()
+_text_metrics_figure = None
+
+
+@lru_cache(maxsize=4096)
+def _cached_text_extent(text, fontsize, fontweight, font_families):
+    global _text_metrics_figure
+    with _text_metrics_lock:
+        if _text_metrics_figure is None:
+            # 仅用于测量的画布，从不绘制；文字排版沿用 matplotlib 自身的规则与字体度量缓存
+            _text_metrics_figure = Figure(dpi=_MINDMAP_MEASURE_DPI)
+            FigureCanvasAgg(_text_metrics_figure)
+        renderer = _text_metrics_figure.canvas.get_renderer()
+        text_obj = matplotlib.text.Text(0, 0, text, fontsize=fontsize, fontweight=fontweight)
+        text_obj.set_figure(_text_metrics_figure)
+        extent = text_obj.get_window_extent(renderer=renderer)
+        scale = 72 / _MINDMAP_MEASURE_DPI
+        return extent.width * scale, extent.height * scale
+
+
+def _measure_text(text, fontsize, fontweight='normal'):
+    """返回多行文字框的 (宽, 高)，单位为磅。"""
+    # 字体族是缓存键的一部分：中文字体配置完成前后的测量结果不能混用
+    return _cached_text_extent(text, fontsize, fontweight, tuple(plt.rcParams['font.sans-serif']))
+
+
+def trim_render_caches():
+    """清空雷达图模板与文字测量缓存（内存看门狗在内存超限时调用），返回清除的条目数。"""
+    # 只丢弃引用、不调用 close()：正在使用某个模板渲染的请求不受影响，完成后模板随之回收
+    with _radar_templates_lock:
+        trimmed = len(_radar_templates)
+        _radar_templates.clear()
+    trimmed += _cached_text_extent.cache_info().currsize
+    _cached_text_extent.cache_clear()
+    return trimmed
+
+
+class _MindmapNode:
+    def __init__(self, text, style, x, y):
+        self.text = text
+        self.style = style
+        self.x, self.y = x, y
+        width, height = _measure_text(text, style['fontsize'], style.get('fontweight', 'normal'))
+        x0 = {'left': x, 'center': x - width / 2, 'right': x - width}[style['ha']]
+        y1 = {'top': y, 'center': y + height / 2, 'bottom': y + height}[style['va']]
+        self.x0, self.x1 = x0, x0 + width
+        self.y0, self.y1 = y1 - height, y1
+        self.width, self.height = width, height
+        # 圆角框的 pad 以字号为单位
+        self.pad = _box_pad(style)
+
+    def padded_extent(self):
+        return self.x0 - self.pad, self.y0 - self.pad, self.x1 + self.pad, self.y1 + self.pad
+
+
+def _box_pad(style):
+    return float(style['bbox']['boxstyle'].split("pad=")[1]) * style['fontsize']
+
+
+def _arc_apex(start, end, rad):
+    # arc3 连接线是二次贝塞尔曲线，控制点在弦中点沿法向偏移 rad × 弦长；返回曲线中点
+    (x_start, y_start), (x_end, y_end) = start, end
+    mid_x, mid_y = (x_start + x_end) / 2, (y_start + y_end) / 2
+    ctrl_x, ctrl_y = mid_x + rad * (y_end - y_start), mid_y - rad * (x_end - x_start)
+    return (x_start + 2 * ctrl_x + x_end) / 4, (y_start + 2 * ctrl_y + y_end) / 4
 
 
-def get_study_recommendation(detailed_error):
+def plot_study_route_mindmap(student_name, detailed_errors, figsize=(12, 10)):
     """
-    根据详细错误信息获取具体的学习建议。
-    尝试匹配最具体的建议，如果无，则返回通用建议。
+    绘制学习路线思维导图。figsize 决定节点缩进与间距的参照尺寸，实际图形大小随内容伸缩，
+    保存时无需 bbox_inches='tight'。
     """
-    section_title = detailed_error.get('section_title')
-    error_type = detailed_error.get('type')
-    raw_message = detailed_error.get('message', '')
-    col_header = detailed_error.get('col_header')
-
-    # 将具体的错误消息归类为通用提示，以便匹配 RECOMMENDATIONS_MAP
-    specific_hint = None
-    if error_type == 'dataframe_cell':
-        if "应为数字" in raw_message:
-            specific_hint = f"{col_header}应为数字"  # "TDM速率应为数字"
-        elif "应为" in raw_message:  # "TDM速率应为 9.6"
-            specific_hint = raw_message.split("应为")[0] + "应为"
-        else:  # Fallback for other dataframe_cell messages
-            specific_hint = raw_message
-    elif error_type == 'textbox':
-        specific_hint = detailed_error.get('field_label')
-    elif error_type == 'dropdown':
-        specific_hint = detailed_error.get('field_label')
-    elif error_type == 'logic_check_failed':
-        if "无法对信道类型" in raw_message:
-            specific_hint = "无法对信道类型"
-        elif "无法获取信道段参数中的频率数据" in raw_message:
-            specific_hint = "无法获取信道段参数中的频率数据"
-        elif "无法校验TDM中心频点" in raw_message:  # New specific message for channel suite logic failure
-            specific_hint = "无法校验TDM中心频点"
-        elif "无法校验ALOHA中心频点" in raw_message:  # New specific message for channel suite logic failure
-            specific_hint = "无法校验ALOHA中心频点"
-        elif "不满足" in raw_message and "偏移关系" in raw_message:
-            specific_hint = "不满足"  # For offset relationship
-        else:
-            specific_hint = raw_message
-    elif error_type in ['frequency_logic_error', 'bandwidth_rate_mismatch', 'kbp_load_error', 'dataframe_duplicate',
-                        'data_type_error', 'column_count_mismatch', 'row_count_mismatch']:
-        if "CC地址列不允许重复" in raw_message:
-            specific_hint = "CC地址列不允许重复"
-        elif "小于速率" in raw_message:
-            specific_hint = "小于速率"
-        elif "频率范围重叠" in raw_message:
-            specific_hint = "频率范围重叠"
-        elif "下行起始频率不能大于下行终止频率" in raw_message:
-            specific_hint = "下行起始频率不能大于下行终止频率"
-        elif "上行起始频率不能大于上行终止频率" in raw_message:
-            specific_hint = "上行起始频率不能大于上行终止频率"
-        elif "应为数字" in raw_message:
-            specific_hint = "频率值应为数字"  # Group all frequency data type errors
-        elif "列数不足" in raw_message:
-            if "CC地址列" in raw_message:
-                specific_hint = "CC地址列"  # specific for network analysis
-            else:
-                specific_hint = None  # General column mismatch covered by (section, type, None)
-        elif "表格行数不匹配" in raw_message:
-            specific_hint = None  # General row mismatch covered by (section, type, None)
-        else:
-            specific_hint = raw_message  # Fallback to raw message if none of the above
+    ensure_chinese_font()
 
-    # 尝试最具体的匹配 (section, type, specific_hint)
-    if (section_title, error_type, specific_hint) in RECOMMENDATIONS_MAP:
-        return RECOMMENDATIONS_MAP[(section_title, error_type, specific_hint)]
-
-    # 尝试次具体匹配 (section, type, None)
-    if (section_title, error_type, None) in RECOMMENDATIONS_MAP:
-        return RECOMMENDATIONS_MAP[(section_title, error_type, None)]
-
-    # 尝试最通用匹配 (None, type, None)
-    if (None, error_type, None) in RECOMMENDATIONS_MAP:
-        return RECOMMENDATIONS_MAP[(None, error_type, None)]
-
-    return f"针对 '{section_title}' 部分的 '{raw_message}' 错误，建议复习相关知识点。"
-
-
-def plot_study_route_mindmap(student_name, detailed_errors, figsize=(12, 10)):
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.set_facecolor("#fcfcfc")
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    ax.axis('off')
-
-    fig.canvas.draw()
-    renderer = fig.canvas.get_renderer()
-
-    section_to_capability = {
-        "（3）信道段参数": "信道频率规划",
-        "（4）信道套参数": "信道业务参数",
-        "1.组网参数分析": "组网信息分析",
-        "2.点对点通信参数": "点对点业务参数",
-        "3.虚拟子网参数": "虚拟子网参数",
-    }
-
-    errors_by_capability = {}
-    for err in detailed_errors:
-        section_title = err.get('section_title')
-        capability_name = section_to_capability.get(section_title, section_title)
-        if capability_name not in errors_by_capability:
-            errors_by_capability[capability_name] = []
-        errors_by_capability[capability_name].append(err)
+    study_route = build_study_route(detailed_errors)
 
     ROOT_STYLE = dict(fontsize=20, fontweight='bold', ha='center', va='center', color='white',
                       bbox=dict(boxstyle="round,pad=0.6", fc="#3F51B5", ec="#283593", lw=1.5, zorder=3))
@@ -392,78 +584,114 @@ def plot_study_route_mindmap(student_name, detailed_errors, figsize=(12, 10)):
     ARROW_COLOR_PRIMARY = "#607D8B"
     ARROW_COLOR_SECONDARY = "#9E9E9E"
 
-    root_x, root_y = 0.5, 0.95
+    # 布局坐标以磅为单位：横向间距参照默认子图的宽度，纵向间距参照其高度（与原先按坐标轴比例排版一致）
+    subplot_params = matplotlib.figure.SubplotParams()
+    ref_width = figsize[0] * 72 * (subplot_params.right - subplot_params.left)
+    ref_height = figsize[1] * 72 * (subplot_params.top - subplot_params.bottom)
 
-    root_text = f"{student_name} 的能力提升路线"
-    root_node_obj = ax.text(root_x, root_y, root_text, **ROOT_STYLE)
+    nodes = []
+    # (起点, 终点, 线宽, 颜色, 弧度)
+    arrows = []
 
-    root_bbox_display = root_node_obj.get_window_extent(renderer)
-    root_bbox_data = root_bbox_display.transformed(ax.transData.inverted())
+    root_x, root_y = 0.5 * ref_width, 0.0
+    root_node = _MindmapNode(f"{student_name} 的能力提升路线", ROOT_STYLE, root_x, root_y)
+    nodes.append(root_node)
+    root_arrow_start = (root_x, root_node.y0 - 0.01 * ref_height)
 
-    current_y_bottom_tracker = root_bbox_data.y0 - 0.05
+    current_y_bottom_tracker = root_node.y0 - 0.05 * ref_height
 
-    if not errors_by_capability:
+    if not study_route:
         no_errors_text = "恭喜！您的答卷全部正确，表明您在所有评估领域都表现优秀，无需特定学习路线！"
         wrapped_text = "\n".join(textwrap.wrap(no_errors_text, width=60))
 
-        no_error_node_obj = ax.text(root_x, current_y_bottom_tracker - 0.1, wrapped_text, **NO_ERROR_STYLE)
-        no_error_bbox_display = no_error_node_obj.get_window_extent(renderer)
-        no_error_bbox_data = no_error_bbox_display.transformed(ax.transData.inverted())
-
-        ax.annotate('',
-                    xy=(root_x, no_error_bbox_data.y1 + 0.01),
-                    xytext=(root_x, root_bbox_data.y0 - 0.01),
-                    arrowprops=dict(arrowstyle="->", color=ARROW_COLOR_PRIMARY, lw=2, connectionstyle="arc3,rad=0.0",
-                                    zorder=0))
-
-        current_y_bottom_tracker = no_error_bbox_data.y0 - 0.05
+        no_error_node = _MindmapNode(wrapped_text, NO_ERROR_STYLE, root_x, current_y_bottom_tracker - 0.1 * ref_height)
+        nodes.append(no_error_node)
+        arrows.append((root_arrow_start, (root_x, no_error_node.y1 + 0.01 * ref_height), 2, ARROW_COLOR_PRIMARY, 0.0))
 
     else:
-        capabilities_list = sorted(list(errors_by_capability.keys()))
-
-        main_x_indent = 0.1
-        sub_x_indent = 0.28
-
-        for i, capability in enumerate(capabilities_list):
-            errors = errors_by_capability[capability]
-
-            current_y_bottom_tracker -= 0.06
+        main_x_indent = 0.1 * ref_width
+        sub_x_indent = 0.28 * ref_width
 
-            main_node_obj = ax.text(main_x_indent, current_y_bottom_tracker, capability, **MAIN_STYLE)
-            main_bbox_display = main_node_obj.get_window_extent(renderer)
-            main_bbox_data = main_bbox_display.transformed(ax.transData.inverted())
+        for i, (capability, sorted_recommendations) in enumerate(study_route):
+            current_y_bottom_tracker -= 0.06 * ref_height
 
-            ax.annotate('',
-                        xy=(main_bbox_data.x0 + main_bbox_data.width / 2, main_bbox_data.y1 + 0.01),
-                        xytext=(root_x, root_bbox_data.y0 - 0.01),
-                        arrowprops=dict(arrowstyle="->", color=ARROW_COLOR_PRIMARY, lw=1.5,
-                                        connectionstyle="arc3,rad=0.2" if i % 2 == 0 else "arc3,rad=-0.2", zorder=0))
+            main_node = _MindmapNode(capability, MAIN_STYLE, main_x_indent, current_y_bottom_tracker)
+            nodes.append(main_node)
+            arrows.append((root_arrow_start,
+                           (main_node.x0 + main_node.width / 2, main_node.y1 + 0.01 * ref_height),
+                           1.5, ARROW_COLOR_PRIMARY, 0.2 if i % 2 == 0 else -0.2))
 
-            current_y_bottom_tracker = main_bbox_data.y0 - 0.02
+            # 纵向间距按圆角框外沿计算，相邻节点的框不会相互重叠
+            current_y_bottom_tracker = main_node.y0 - main_node.pad - 0.02 * ref_height
 
-            unique_recommendations = set()
-            for error in errors:
-                rec = get_study_recommendation(error)
-                unique_recommendations.add(rec)
+            for rec_text in sorted_recommendations:
+                wrapped_rec = "\n".join(textwrap.wrap(rec_text, width=45))
 
-            sorted_recommendations = sorted(list(unique_recommendations))
+                sub_node = _MindmapNode(wrapped_rec, SUB_STYLE, sub_x_indent,
+                                        current_y_bottom_tracker - _box_pad(SUB_STYLE))
+                nodes.append(sub_node)
+                arrows.append(((main_node.x1 + 0.01 * ref_width, main_node.y0 + main_node.height / 2),
+                               (sub_node.x0 - 0.01 * ref_width, sub_node.y0 + sub_node.height / 2),
+                               1.2, ARROW_COLOR_SECONDARY, 0.0))
+
+                current_y_bottom_tracker = sub_node.y0 - sub_node.pad - 0.01 * ref_height
+
+    # 内容边界：节点（含圆角框）与连接线弧顶，四周留白
+    extents = [node.padded_extent() for node in nodes]
+    arc_points = [_arc_apex(start, end, rad) for start, end, _, _, rad in arrows if rad]
+    margin = 0.1 * 72
+    x_min = min([e[0] for e in extents] + [p[0] for p in arc_points]) - margin
+    x_max = max([e[2] for e in extents] + [p[0] for p in arc_points]) + margin
+    y_min = min(e[1] for e in extents) - margin
+    y_max = max(e[3] for e in extents) + margin
+
+    # 坐标轴铺满整张图，数据坐标即磅，文字与节点位置按计算结果原样绘制
+    fig = new_figure(figsize=((x_max - x_min) / 72, (y_max - y_min) / 72))
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_facecolor("#fcfcfc")
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    ax.axis('off')
 
-            for j, rec_text in enumerate(sorted_recommendations):
-                wrapped_rec = "\n".join(textwrap.wrap(rec_text, width=45))
+    for node in nodes:
+        ax.text(node.x, node.y, node.text, **node.style)
+    for start, end, line_width, color, rad in arrows:
+        ax.annotate('', xy=end, xytext=start,
+                    arrowprops=dict(arrowstyle="->", color=color, lw=line_width,
+                                    connectionstyle=f"arc3,rad={rad}", zorder=0))
 
-                sub_node_obj = ax.text(sub_x_indent, current_y_bottom_tracker, wrapped_rec, **SUB_STYLE)
-                sub_bbox_display = sub_node_obj.get_window_extent(renderer)
-                sub_bbox_data = sub_bbox_display.transformed(ax.transData.inverted())
+    return fig, ax
 
-                ax.annotate('',
-                            xy=(sub_bbox_data.x0 - 0.01, sub_bbox_data.y0 + sub_bbox_data.height / 2),
-                            xytext=(main_bbox_data.x1 + 0.01, main_bbox_data.y0 + main_bbox_data.height / 2),
-                            arrowprops=dict(arrowstyle="->", color=ARROW_COLOR_SECONDARY, lw=1.2,
-                                            connectionstyle="arc3,rad=0.0", zorder=0))
 
-                current_y_bottom_tracker = sub_bbox_data.y0 - 0.01
+# --- 自检：python person_status.py ---
+# 对比能力雷达图的模板路径与 plot_attribute_radar 整图路径：同一姓名与分数，两者只允许抗锯齿带来的
+# 细微像素差异，布局（图形大小、标题与图例位置）必须一致。
+_RADAR_CHECK_TOLERANCE = 8
 
-    ax.set_ylim(current_y_bottom_tracker - 0.05, root_y + root_bbox_data.height / 2 + 0.05)
 
-    fig.tight_layout(rect=[0, 0, 1, 1])
-    return fig, ax
\ No newline at end of file
+def check_radar_template(names=("张三", "李四四", "欧阳小明", "Li", "某某某 最终评价")):
+    """逐个姓名对比两条渲染路径，返回 {姓名: 超出容差的像素数}。"""
+    attributes = ["信道频率规划", "信道业务参数配置", "组网信息分析", "点对点业务参数配置", "虚拟子网参数配置", "组内评价"]
+    values = [85.7, 87.5, 91.7, 50, 50, 75]
+    mismatches = {}
+    for name in names:
+        buffer = io.BytesIO()
+        fig, _ = plot_attribute_radar(name, attributes, values)
+        try:
+            fig.savefig(buffer, format="png")
+        finally:
+            release_figure(fig)
+        full = mpimg.imread(io.BytesIO(buffer.getvalue()))[..., :3] * 255
+        fast = mpimg.imread(io.BytesIO(render_attribute_radar_png(name, attributes, values)))[..., :3] * 255
+        if full.shape != fast.shape:
+            mismatches[name] = full.shape[0] * full.shape[1]
+            continue
+        mismatches[name] = int((np.abs(full - fast).max(axis=2) > _RADAR_CHECK_TOLERANCE).sum())
+    return mismatches
+
+
+if __name__ == "__main__":
+    results = check_radar_template(sys.argv[1:]) if len(sys.argv) > 1 else check_radar_template()
+    for checked_name, differing in results.items():
+        print(f"{checked_name}: {'一致' if differing == 0 else f'{differing} 个像素不一致'}")
+    sys.exit(1 if any(results.values()) else 0)
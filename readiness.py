@@ -0,0 +1,49 @@
+import os
+import threading
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+# --- 就绪状态 ---
+# 服务进程先开始接受连接，同时在后台完成预热（paper.warm_up），之后才报告就绪：
+# 预热期间 GET /readyz 返回 503，完成后返回 200。
+# 负载均衡、部署脚本与 loadtest.py 以此判断何时开始发送流量。
+# 状态保存在当前进程内；多进程部署（serve.py）时每个 worker 各自预热、各自报告。
+
+READYZ_PATH = "/readyz"
+
+
+class Readiness:
+    """进程级就绪标志，附带预热结果等说明信息，线程安全。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._details = {}
+
+    def mark_ready(self, **details):
+        with self._lock:
+            self._ready = True
+            self._details = dict(details)
+
+    def is_ready(self):
+        return self._ready
+
+    def status(self):
+        with self._lock:
+            return dict(self._details, ready=self._ready, pid=os.getpid())
+
+
+def create_readiness_router(readiness):
+    """GET /readyz：就绪时 200，预热尚未完成时 503，响应体为 JSON 格式的状态说明。"""
+    router = APIRouter()
+
+    @router.get(READYZ_PATH)
+    def get_readiness():
+        status = readiness.status()
+        return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+    return router
+
+
+READINESS = Readiness()
@@ -0,0 +1,296 @@
+import re
+import html
+from types import MappingProxyType
+
+# --- 学习建议 ---
+# 错误 -> 学习建议的映射与学习路线（能力 -> 去重后的建议列表）的构建。本模块不依赖 matplotlib，
+# 学习路线的 HTML 输出与思维导图图片（person_status.plot_study_route_mindmap）共用同一份路线数据。
+
+# 定义错误类型到通用学习建议的映射 (更详细和全面的映射可以进一步扩展)
+RECOMMENDATIONS_MAP = {
+    # （3）信道段参数 - 信道频率规划
+    # 移除信道类型选择的建议
+    # ("（3）信道段参数", "dropdown", "信道类型选择"): "复习信道类型（'uu'/'aa'）的选择与意义。确保选择正确，才能进行后续频率逻辑检查。",
+    ("（3）信道段参数", "dataframe_cell",
+     "下行起始频率应在"): "检查下行起始频率是否在指定范围内（'uu'模式12.25-12.75MHz，'aa'模式19.6-21.2MHz）。",
+    ("（3）信道段参数", "dataframe_cell",
+     "下行终止频率应在"): "检查下行终止频率是否在指定范围内（'uu'模式12.25-12.75MHz，'aa'模式19.6-21.2MHz）。",
+    ("（3）信道段参数", "dataframe_cell",
+     "上行起始频率应在"): "检查上行起始频率是否在指定范围内（'uu'模式14.0-14.5MHz，'aa'模式29.4-31.0MHz）。",
+    ("（3）信道段参数", "dataframe_cell",
+     "上行终止频率应在"): "检查上行终止频率是否在指定范围内（'uu'模式14.0-14.5MHz，'aa'模式29.4-31.0MHz）。",
+    ("（3）信道段参数", "logic_check_failed",
+     "不满足"): "检查上行起始/终止频率与下行起始/终止频率是否保持正确的偏移关系（'uu'模式+1.75MHz，'aa'模式+9.8MHz）。",
+    ("（3）信道段参数", "frequency_logic_error",
+     "上行终止频率"): "信道段上行终止频率不应大于下行起始频率，请核对频率分配逻辑。",
+    ("（3）信道段参数", "dataframe_format_error",
+     None): "确保信道段参数表格格式正确，所有频率值均以数字填写，且表格结构完整。",
+    ("（3）信道段参数", "data_type_error", "频率值应为数字"): "信道段频率值必须是数字，请检查输入格式。",
+    ("（3）信道段参数", "column_count_mismatch", None): "信道段参数表格列数不匹配，请核对表格结构。",
+    ("（3）信道段参数", "logic_check_failed",
+     "无法对信道类型"): "信道段频率逻辑检查依赖于信道类型，请确保信道类型为'uu'或'aa'。",
+
+    # （4）信道套参数 - 信道业务参数 (UPDATED RECOMMENDATIONS)
+    ("（4）信道套参数", "dataframe_format_error",
+     None): "信道套参数表格格式错误或行/列数不匹配，应为2行5列，请核对表格结构及内容。",
+    ("（4）信道套参数", "logic_check_failed",
+     "无法获取信道段参数中的频率数据"): "信道套参数中的频点校验依赖信道段参数，请检查信道段参数表格的填写。",
+    ("（4）信道套参数", "logic_check_failed",
+     "无法校验TDM中心频点"): "因信道段频率数据缺失或格式错误，无法校验TDM中心频点。请先修正信道段参数。",
+    ("（4）信道套参数", "logic_check_failed",
+     "无法校验ALOHA中心频点"): "因信道段频率数据缺失或格式错误，无法校验ALOHA中心频点。请先修正信道段参数。",
+
+    ("（4）信道套参数", "data_type_error", "速率"): "信道套参数中，速率应为数字，请检查输入。",
+    ("（4）信道套参数", "dataframe_cell", "速率应为 9.6"): "信道套参数中，速率应固定为9.6kbps，请核对。",
+
+    ("（4）信道套参数", "data_type_error", "带宽"): "信道套参数中，带宽应为数字，请检查输入。",
+    ("（4）信道套参数", "dataframe_cell", "带宽应为 100"): "信道套参数中，带宽应固定为100kHz，请核对。",
+
+    ("（4）信道套参数", "data_type_error", "上行中心频点"): "信道套参数中，上行中心频点应为数字，请检查输入。",
+    ("（4）信道套参数", "dataframe_cell",
+     "上行中心频点应为"): "上行中心频点应根据信道段参数计算（TDM：信道段上行起始频率+50；ALOHA：信道段上行起始频率+150）。",
+
+    ("（4）信道套参数", "data_type_error", "下行中心频点"): "信道套参数中，下行中心频点应为数字，请检查输入。",
+    ("（4）信道套参数", "dataframe_cell",
+     "下行中心频点应为"): "下行中心频点应根据信道段参数计算（TDM：信道段下行起始频率+50；ALOHA：信道段下行起始频率+150）。",
+
+    # 1.组网参数分析 - 组网信息分析
+    ("1.组网参数分析", "dataframe_duplicate",
+     "CC地址列不允许重复"): "深入学习CC地址规划规范，确保每台通信控制器（CC）的地址是唯一的。",
+    ("1.组网参数分析", "dataframe_format_error", None): "检查组网参数分析表格的整体格式，确保数据可被正确解析。",
+    ("1.组网参数分析", "column_count_mismatch",
+     "CC地址列"): "组网参数分析表格缺少CC地址列，无法进行重复性校验。请核对表格结构。",
+
+    # 2.点对点通信参数 - 点对点业务参数
+    ("2.点对点通信参数", "textbox", "本端CC地址"): "核对本端CC地址的正确填写格式和值。",
+    ("2.点对点通信参数", "textbox", "对端XX地址"): "核对对端XX地址的正确填写格式和值。",
+    ("2.点对点通信参数", "dataframe_cell", None): "复习点对点业务参数（速率、带宽、频率范围）的配置要求。",
+    ("2.点对点通信参数", "frequency_logic_error",
+     "上行终止频率"): "点对点通信上行终止频率不应大于下行起始频率，请核对频点配置。",
+    ("2.点对点通信参数", "bandwidth_rate_mismatch",
+     "小于速率"): "请根据速率（kbps）检查带宽（khz）是否满足KBP映射文件中定义的最低要求，确保带宽大于等于对应值。",
+    ("2.点对点通信参数", "kbp_load_error", None): "KBP映射文件加载失败或为空，请检查kbp.txt文件是否存在和格式是否正确。",
+    ("2.点对点通信参数", "row_count_mismatch", None): "核对点对点通信参数表格行数是否完整。",
+    ("2.点对点通信参数", "column_count_mismatch", None): "检查点对点通信参数表格的列数是否正确。",
+    ("2.点对点通信参数", "dataframe_format_error", None): "确保点对点通信参数表格格式正确。",
+
+    # 3.虚拟子网参数 - 虚拟子网参数 (UPDATED RECOMMENDATIONS)
+    ("3.虚拟子网参数", "dataframe_format_error",
+     None): "虚拟子网参数表格格式错误或行/列数不匹配。应为1行6列，请核对表格结构及内容。",
+    ("3.虚拟子网参数", "logic_check_failed", "请选择一个虚拟子网速率"): "请在下拉列表中选择一个速率，以便校验带宽。",
+    ("3.虚拟子网参数", "bandwidth_rate_mismatch",
+     "小于速率"): "虚拟子网带宽应大于或等于所选速率对应的KBP最低带宽，请核对。",
+    ("3.虚拟子网参数", "data_type_error", "速率或带宽"): "虚拟子网速率或带宽应为数字，请检查输入格式。",
+    ("3.虚拟子网参数", "frequency_logic_error",
+     "下行起始频率不能大于下行终止频率"): "虚拟子网下行频率范围起始值不能大于终止值，请检查。",
+    ("3.虚拟子网参数", "frequency_logic_error",
+     "上行起始频率不能大于上行终止频率"): "虚拟子网上行频率范围起始值不能大于终止值，请检查。",
+    ("3.虚拟子网参数", "frequency_logic_error",
+     "频率范围重叠"): "虚拟子网的下行频率范围与上行频率范围不允许重叠，请调整。",
+    ("3.虚拟子网参数", "data_type_error", "频率值应为数字"): "虚拟子网频率值必须是数字，请检查输入格式。",
+
+    # 通用格式错误建议 (当无法匹配到具体单元格时)
+    (None, "格式错误或解析失败", None): "请检查该部分答卷的填写格式是否符合要求，确保数据可被系统正确解析。",
+    (None, "未知错误数", None): "该部分发生未知错误，请联系教师检查。",
+    (None, "data_type_error", None): "数据类型错误，请确保在数字字段输入的是数字。",
+    (None, "logic_check_failed", None): "逻辑检查失败，请复习该模块的业务逻辑和参数间关系。"
+}
+
+
+# 检查器错误代码 (checker.check_paper 输出的 'code') -> (错误类型, RECOMMENDATIONS_MAP 中的提示)
+# 提示为 None 时使用该部分该类型的通用建议；新增错误代码时在此登记即可。
+ERROR_CODE_HINTS = {
+    # 1.组网参数分析
+    "network.format": ("dataframe_format_error", None),
+    "network.missing_cc_column": ("column_count_mismatch", "CC地址列"),
+    "network.duplicate_cc": ("dataframe_duplicate", "CC地址列不允许重复"),
+    # （3）信道段参数
+    "segment.format": ("dataframe_format_error", None),
+    "segment.column_count": ("column_count_mismatch", None),
+    "segment.not_numeric": ("data_type_error", "频率值应为数字"),
+    "segment.unsupported_channel_type": ("logic_check_failed", "无法对信道类型"),
+    "segment.dl_start_range": ("dataframe_cell", "下行起始频率应在"),
+    "segment.dl_end_range": ("dataframe_cell", "下行终止频率应在"),
+    "segment.ul_start_range": ("dataframe_cell", "上行起始频率应在"),
+    "segment.ul_end_range": ("dataframe_cell", "上行终止频率应在"),
+    "segment.ul_start_offset": ("logic_check_failed", "不满足"),
+    "segment.ul_end_offset": ("logic_check_failed", "不满足"),
+    # （4）信道套参数
+    "suite.format": ("dataframe_format_error", None),
+    "suite.segment_unavailable": ("logic_check_failed", "无法获取信道段参数中的频率数据"),
+    "suite.segment_not_numeric": ("data_type_error", "频率值应为数字"),
+    "suite.rate_value": ("dataframe_cell", "速率应为 9.6"),
+    "suite.rate_not_numeric": ("data_type_error", "速率"),
+    "suite.bandwidth_value": ("dataframe_cell", "带宽应为 100"),
+    "suite.bandwidth_not_numeric": ("data_type_error", "带宽"),
+    "suite.uplink_center_value": ("dataframe_cell", "上行中心频点应为"),
+    "suite.uplink_center_not_numeric": ("data_type_error", "上行中心频点"),
+    "suite.downlink_center_value": ("dataframe_cell", "下行中心频点应为"),
+    "suite.downlink_center_not_numeric": ("data_type_error", "下行中心频点"),
+    "suite.tdm_center_unchecked": ("logic_check_failed", "无法校验TDM中心频点"),
+    "suite.aloha_center_unchecked": ("logic_check_failed", "无法校验ALOHA中心频点"),
+    # 2.点对点通信参数
+    "p2p.format": ("dataframe_format_error", None),
+    "p2p.row_count": ("row_count_mismatch", None),
+    "p2p.column_count": ("column_count_mismatch", None),
+    "p2p.missing_frequency_columns": ("column_count_mismatch", None),
+    "p2p.missing_rate_bandwidth_columns": ("column_count_mismatch", None),
+    # 3.虚拟子网参数
+    "virtual_subnet.format": ("dataframe_format_error", None),
+    "virtual_subnet.rate_not_selected": ("logic_check_failed", "请选择一个虚拟子网速率"),
+    # 多个部分共用的规则 (点对点 / 虚拟子网 / 信道段)
+    "freq.ul_end_above_dl_start": ("frequency_logic_error", "上行终止频率"),
+    "freq.pair_not_numeric": ("data_type_error", "频率值应为数字"),
+    "freq.dl_range_inverted": ("frequency_logic_error", "下行起始频率不能大于下行终止频率"),
+    "freq.ul_range_inverted": ("frequency_logic_error", "上行起始频率不能大于上行终止频率"),
+    "freq.overlap": ("frequency_logic_error", "频率范围重叠"),
+    "freq.not_numeric": ("data_type_error", "频率值应为数字"),
+    "bandwidth.rate_unmapped": ("bandwidth_rate_mismatch", None),
+    "bandwidth.below_required": ("bandwidth_rate_mismatch", "小于速率"),
+    "bandwidth.not_numeric": ("data_type_error", "速率或带宽"),
+    "bandwidth.internal_error": ("bandwidth_rate_mismatch", None),
+    "check.unsupported_type": ("unsupported_check_type", None),
+}
+
+
+def _resolve_recommendation(section_title, error_type, hint):
+    # 依次尝试 (section, type, hint) -> (section, type, None) -> (None, type, None)，均未命中时返回 None
+    for key in ((section_title, error_type, hint), (section_title, error_type, None), (None, error_type, None)):
+        if key in RECOMMENDATIONS_MAP:
+            return RECOMMENDATIONS_MAP[key]
+    return None
+
+
+class _HintMatcher:
+    """
+    RECOMMENDATIONS_MAP 中全部提示子串的多模式匹配器 (Aho-Corasick)，扫描一遍消息即可找出其中出现的所有提示，
+    仅用于没有错误代码的旧版错误 (例如早先保存的检查结果)。
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._output[state] += (pattern,)
+
+        # 广度优先构建失败指针，并把失败链上的输出合并到当前状态
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail_state = self._fail[state]
+                while fail_state and ch not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(ch, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            found.update(self._output[state])
+        return found
+
+
+# 预编译：(section, code) -> 建议，以及每个 (section, type) 下可用的提示。
+# 导入时一次建完，之后只读（多个请求线程并发查询，不加锁）：RECOMMENDATIONS_MAP 中没有的部分
+# 只会命中 (None, type, None) 的通用建议，与 section 为 None 的条目相同，查询时退回到该条目。
+_recommendation_by_code = {}
+_HINTS_BY_SECTION_TYPE = {}
+for _section, _type, _hint in RECOMMENDATIONS_MAP:
+    if _hint is not None:
+        _HINTS_BY_SECTION_TYPE.setdefault((_section, _type), set()).add(_hint)
+for _section in {key[0] for key in RECOMMENDATIONS_MAP} | {None}:
+    for _code, (_type, _hint) in ERROR_CODE_HINTS.items():
+        _recommendation_by_code[(_section, _code)] = _resolve_recommendation(_section, _type, _hint)
+_RECOMMENDATION_BY_CODE = MappingProxyType(_recommendation_by_code)
+_HINT_MATCHER = _HintMatcher({hint for hints in _HINTS_BY_SECTION_TYPE.values() for hint in hints})
+
+# 错误消息中插入的具体取值，例如 "下行起始频率(12.3)不能大于……" 中的 "(12.3)"、"速率 '9.6' 或带宽……" 中的 " '9.6' "；
+# 去掉后消息与 RECOMMENDATIONS_MAP 中的提示文字一致
+_INTERPOLATED_VALUE = re.compile(r"\s*(?:\([^()]*\)|'[^']*')\s*")
+
+
+def _legacy_hint(section_title, error_type, detailed_error):
+    """没有错误代码时，从消息中找出该部分该类型下最长（最具体）的提示。"""
+    if error_type in ('textbox', 'dropdown'):
+        return detailed_error.get('field_label')
+    candidates = _HINTS_BY_SECTION_TYPE.get((section_title, error_type))
+    if not candidates:
+        return None
+    message = detailed_error.get('message', '')
+    matched = (_HINT_MATCHER.find_all(message) | _HINT_MATCHER.find_all(_INTERPOLATED_VALUE.sub("", message))) \
+        & candidates
+    return max(matched, key=len) if matched else None
+
+
+def get_study_recommendation(detailed_error):
+    """
+    根据详细错误信息获取具体的学习建议。
+    优先按错误代码查预编译表；旧版错误没有代码时按消息匹配提示。都无法匹配时返回通用建议。
+    """
+    section_title = detailed_error.get('section_title')
+    error_type = detailed_error.get('type')
+    code = detailed_error.get('code')
+
+    if code in ERROR_CODE_HINTS:
+        recommendation = _RECOMMENDATION_BY_CODE.get((section_title, code), _RECOMMENDATION_BY_CODE[(None, code)])
+    else:
+        recommendation = _resolve_recommendation(section_title, error_type,
+                                                 _legacy_hint(section_title, error_type, detailed_error))
+
+    if recommendation is not None:
+        return recommendation
+    return f"针对 '{section_title}' 部分的 '{detailed_error.get('message', '')}' 错误，建议复习相关知识点。"
+
+
+# 答卷段落 -> 能力名称
+SECTION_TO_CAPABILITY = {
+    "（3）信道段参数": "信道频率规划",
+    "（4）信道套参数": "信道业务参数",
+    "1.组网参数分析": "组网信息分析",
+    "2.点对点通信参数": "点对点业务参数",
+    "3.虚拟子网参数": "虚拟子网参数",
+}
+
+
+def build_study_route(detailed_errors):
+    """
+    按能力归并错误并生成去重后的学习建议，返回 [(能力名称, [建议, ...]), ...]，
+    能力与建议均按名称排序；没有错误时返回空列表。
+    """
+    errors_by_capability = {}
+    for err in detailed_errors:
+        section_title = err.get('section_title')
+        capability_name = SECTION_TO_CAPABILITY.get(section_title, section_title)
+        errors_by_capability.setdefault(capability_name, []).append(err)
+
+    return [(capability, sorted({get_study_recommendation(err) for err in errors_by_capability[capability]}))
+            for capability in sorted(errors_by_capability)]
+
+
+def format_study_route_html(student_name, study_route):
+    """学习路线的可折叠 HTML 树（<details>/<summary>，无需脚本），可放入 gr.HTML 或 gr.Markdown。"""
+    title = html.escape(f"{student_name} 的能力提升路线")
+    if not study_route:
+        return (f"<h4>{title}</h4>"
+                "<p>恭喜！您的答卷全部正确，表明您在所有评估领域都表现优秀，无需特定学习路线！</p>")
+
+    parts = [f"<h4>{title}</h4>"]
+    for capability, recommendations in study_route:
+        items = "".join(f"<li>{html.escape(rec)}</li>" for rec in recommendations)
+        parts.append(f"<details open><summary><b>{html.escape(str(capability))}</b>"
+                     f"（{len(recommendations)} 条建议）</summary><ul>{items}</ul></details>")
+    return "".join(parts)
@@ -0,0 +1,343 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app_logging import get_logger, fields
+from config import env_number
+
+logger = get_logger("render_service")
+
+# --- 图表渲染服务 ---
+# matplotlib 渲染是 CPU 密集型且持有 GIL，放在请求线程里会让并发提交在绘图处串行化。
+# 这里把 person_status 中的绘图函数投递到常驻进程池执行，子进程启动时预先加载
+# matplotlib 与中文字体，返回 PNG 编码后的字节，由调用方写入临时文件交给 Gradio。
+# 主进程本身不导入 matplotlib：预热在子进程（或未启用进程池时的后台线程）中进行，不拖慢启动。
+
+# 允许在进程池中执行的绘图函数（均定义于 person_status.py，返回 (fig, ax)）
+RENDERABLE_PLOTS = (
+    "plot_attribute_radar",
+    "plot_history_radar",
+    "plot_comparison_radar",
+    "plot_study_route_mindmap",
+)
+
+# 设置为 0 时不启用进程池，直接在当前进程渲染
+_RENDER_WORKERS_ENV = "CLASSMATCH_RENDER_WORKERS"
+_RENDER_TIMEOUT_SECONDS = 60
+
+# --- 准入控制 ---
+# 积压（界面请求投递、尚未完成的渲染任务，含正在执行的）达到 CLASSMATCH_RENDER_BACKLOG_LIMIT 时进入降级模式，
+# admit() 返回 False：调用方应立即返回文字结果，跳过或推迟图片。积压回落到阈值的一半以下才恢复，
+# 避免在阈值附近频繁切换。默认阈值为每个渲染进程（未启用进程池时按 1 个计）4 个任务，设为 0 时不做准入控制。
+# 提交高峰主要体现为判分请求排队，由 scheduler.PriorityScheduler.overloaded 判断，两者任一触发即降级。
+RENDER_BACKLOG_LIMIT_ENV = "CLASSMATCH_RENDER_BACKLOG_LIMIT"
+_BACKLOG_PER_WORKER = 4
+
+# --- 批量任务 ---
+# 整班导出等批量任务用 submit(..., bulk=True) 投递，不计入上面的积压：任务先进入本地队列，
+# 进程池中同时最多只有 CLASSMATCH_RENDER_BULK_WINDOW 个（默认为渲染进程数的一半，至少 1 个），
+# 完成一个再送入下一个。进程池按先进先出执行，这样界面请求的渲染最多排在少数几个批量任务之后，
+# 不会被一次导出的全部思维导图挡住。
+RENDER_BULK_WINDOW_ENV = "CLASSMATCH_RENDER_BULK_WINDOW"
+
+
+def _init_render_worker():
+    # 渲染只需无界面的 Agg 后端；提前导入 person_status 并完成中文字体配置
+    import matplotlib
+    matplotlib.use("Agg")
+    import person_status
+    person_status.ensure_chinese_font()
+
+
+def _warm_render_worker():
+    return os.getpid()
+
+
+@contextmanager
+def _plotted_figure(plot_fn, plot_kwargs):
+    """
+    调用绘图函数并在 with 块结束时（正常结束或 savefig 抛出异常）释放图形。
+    person_status 的绘图函数不经过 pyplot 创建图形，绘图中途失败时图形没有全局引用，随调用栈回收。
+    """
+    import person_status
+
+    fig, _ = plot_fn(**plot_kwargs)
+    try:
+        yield fig
+    finally:
+        person_status.release_figure(fig)
+
+
+def _render_png_bytes(plot_name, plot_kwargs, savefig_kwargs):
+    import person_status
+
+    if plot_name not in RENDERABLE_PLOTS:
+        raise ValueError(f"不支持的绘图任务: {plot_name}")
+
+    # 使用默认保存参数时，优先走预先构建好背景的模板渲染
+    template_renderer = person_status.TEMPLATE_RENDERERS.get(plot_name)
+    if template_renderer is not None and not savefig_kwargs:
+        return template_renderer(**plot_kwargs)
+
+    buffer = io.BytesIO()
+    with _plotted_figure(getattr(person_status, plot_name), plot_kwargs) as fig:
+        fig.savefig(buffer, format="png", **savefig_kwargs)
+    return buffer.getvalue()
+
+
+def _render_warmup_jobs(jobs):
+    for plot_name, savefig_kwargs, plot_kwargs in jobs:
+        _render_png_bytes(plot_name, plot_kwargs, savefig_kwargs)
+    return os.getpid()
+
+
+class RenderService:
+    """
+    常驻渲染进程池。render() 在调用线程中阻塞等待结果（等待期间释放 GIL），
+    进程池不可用时自动退回到当前进程渲染，保证图表总能生成。
+    """
+
+    def __init__(self, max_workers=None):
+        self._max_workers = (env_number(_RENDER_WORKERS_ENV, os.cpu_count() or 1, cast=int)
+                             if max_workers is None else max_workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._backlog_limit = env_number(RENDER_BACKLOG_LIMIT_ENV, _BACKLOG_PER_WORKER * max(1, self._max_workers),
+                                         cast=int)
+        self._backlog = 0
+        self._degraded = False
+        self._backlog_lock = threading.Lock()
+        self._bulk_window = env_number(RENDER_BULK_WINDOW_ENV, max(1, self._max_workers // 2), minimum=1, cast=int)
+        self._bulk_pending = deque()
+        self._bulk_running = 0
+        self._bulk_lock = threading.Lock()
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def backlog(self):
+        """已投递尚未完成的渲染任务数（含正在执行的）。"""
+        return self._backlog
+
+    @property
+    def backlog_limit(self):
+        return self._backlog_limit
+
+    @property
+    def bulk_backlog(self):
+        """尚未完成的批量任务数（含还在本地队列中、未送入进程池的）。"""
+        with self._bulk_lock:
+            return self._bulk_running + len(self._bulk_pending)
+
+    def _change_backlog(self, delta):
+        with self._backlog_lock:
+            self._backlog += delta
+
+    def admit(self):
+        """是否可以立即渲染；降级模式下返回 False（进入与退出降级模式时各记录一次日志）。"""
+        if not self._backlog_limit:
+            return True
+        with self._backlog_lock:
+            backlog = self._backlog
+            was_degraded = self._degraded
+            if was_degraded and backlog <= self._backlog_limit // 2:
+                self._degraded = False
+            elif not was_degraded and backlog >= self._backlog_limit:
+                self._degraded = True
+            degraded = self._degraded
+        if degraded != was_degraded:
+            if degraded:
+                logger.warning("Render backlog reached %d; skipping charts until it drains.", backlog,
+                               extra=fields(backlog=backlog, limit=self._backlog_limit))
+            else:
+                logger.info("Render backlog drained to %d; charts re-enabled.", backlog,
+                            extra=fields(backlog=backlog, limit=self._backlog_limit))
+        return not degraded
+
+    def start(self, wait=True):
+        """
+        创建进程池并让每个子进程完成导入与字体加载，适合在 demo.launch() 之前调用。
+        未启用进程池时改为在后台线程中预加载 matplotlib 与中文字体。
+        wait=False 时不等待预热完成，首个请求可能仍需等待预热结束。
+        """
+        executor = self._get_executor()
+        if executor is None:
+            warm_thread = threading.Thread(target=_init_render_worker, name="render-warmup", daemon=True)
+            warm_thread.start()
+            if wait:
+                warm_thread.join()
+            return
+        warm_futures = [executor.submit(_warm_render_worker) for _ in range(self._max_workers)]
+        if wait:
+            for future in warm_futures:
+                future.result(timeout=_RENDER_TIMEOUT_SECONDS)
+
+    def warm_up(self, jobs):
+        """
+        在渲染进程中依次渲染 jobs（[(plot_name, savefig_kwargs, plot_kwargs)]）并等待完成，提前构建雷达图模板、
+        栅格化中文字形。每个子进程投递一份，空闲的子进程各自领取；未启用进程池时在当前进程中渲染。
+        返回完成预热的进程 pid 列表。可以在后台线程中调用，但进程池须已由 start() 在服务线程启动之前创建。
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return [_render_warmup_jobs(jobs)]
+        futures = [executor.submit(_render_warmup_jobs, jobs) for _ in range(self._max_workers)]
+        return sorted({future.result(timeout=_RENDER_TIMEOUT_SECONDS) for future in futures})
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def worker_pids(self):
+        """当前渲染子进程的 pid（未启用或尚未创建进程池时为空列表）。"""
+        with self._lock:
+            executor = self._executor
+        try:
+            return sorted(getattr(executor, "_processes", None) or {})
+        except RuntimeError:
+            # 进程池的管理线程正在增删子进程，下次采样再读
+            return []
+
+    def recycle(self):
+        """
+        换用新的进程池并立即预热；旧进程池处理完已投递的任务后退出，交还其占用的内存。
+        未启用进程池时什么也不做。
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        executor.shutdown(wait=False)
+        self.start(wait=False)
+
+    def _get_executor(self):
+        if self._max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # POSIX 上使用 fork：子进程不会重新执行主模块，各自在 initializer 中并行完成
+                # matplotlib 导入与字体配置。fork 会一次性创建全部子进程，因此应在 demo.launch()
+                # 启动服务线程之前调用 start()。Windows 上只能使用 spawn。
+                method = "spawn" if sys.platform == "win32" else "fork"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=_init_render_worker,
+                )
+            return self._executor
+
+    def render(self, plot_name, savefig_kwargs=None, **plot_kwargs):
+        """执行 person_status 中名为 plot_name 的绘图函数，返回 PNG 字节。"""
+        savefig_kwargs = savefig_kwargs or {}
+        self._change_backlog(1)
+        try:
+            executor = self._get_executor()
+            if executor is not None:
+                try:
+                    future = executor.submit(_render_png_bytes, plot_name, plot_kwargs, savefig_kwargs)
+                    return future.result(timeout=_RENDER_TIMEOUT_SECONDS)
+                except BrokenProcessPool as e:
+                    logger.warning("Render process pool is broken (%s). Rendering in-process.", e)
+                    self.shutdown()
+            return _render_png_bytes(plot_name, plot_kwargs, savefig_kwargs)
+        finally:
+            self._change_backlog(-1)
+
+    def submit(self, plot_name, savefig_kwargs=None, bulk=False, **plot_kwargs):
+        """
+        投递渲染任务并立即返回 Future（结果为 PNG 字节），批量渲染时可让各子进程并行绘制。
+        bulk=True 时按批量任务的窗口分批送入进程池（见模块说明）。
+        未启用进程池时在当前进程中同步渲染，返回已完成的 Future。
+        """
+        savefig_kwargs = savefig_kwargs or {}
+        executor = self._get_executor()
+        if bulk and executor is not None:
+            future = Future()
+            with self._bulk_lock:
+                self._bulk_pending.append((future, plot_name, plot_kwargs, savefig_kwargs))
+            self._feed_bulk()
+            return future
+        if executor is not None:
+            try:
+                future = executor.submit(_render_png_bytes, plot_name, plot_kwargs, savefig_kwargs)
+            except BrokenProcessPool as e:
+                logger.warning("Render process pool is broken (%s). Rendering in-process.", e)
+                self.shutdown()
+            else:
+                self._change_backlog(1)
+                future.add_done_callback(lambda _: self._change_backlog(-1))
+                return future
+        future = Future()
+        self._change_backlog(1)
+        try:
+            future.set_result(_render_png_bytes(plot_name, plot_kwargs, savefig_kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._change_backlog(-1)
+        return future
+
+    def _feed_bulk(self):
+        """在窗口允许的范围内把排队的批量任务送入进程池。"""
+        while True:
+            with self._bulk_lock:
+                if not self._bulk_pending or self._bulk_running >= self._bulk_window:
+                    return
+                future, plot_name, plot_kwargs, savefig_kwargs = self._bulk_pending.popleft()
+                self._bulk_running += 1
+            pool_future = None
+            if future.set_running_or_notify_cancel():
+                try:
+                    executor = self._get_executor()
+                    if executor is None:
+                        raise BrokenProcessPool("render process pool is not available")
+                    pool_future = executor.submit(_render_png_bytes, plot_name, plot_kwargs, savefig_kwargs)
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        logger.warning("Render process pool is broken (%s).", e)
+                        self.shutdown()
+                    # 调用方（class_export）对失败的任务逐张改用 render() 重试
+                    future.set_exception(e)
+            if pool_future is None:
+                with self._bulk_lock:
+                    self._bulk_running -= 1
+                continue
+            pool_future.add_done_callback(lambda done, outer=future: self._bulk_finished(done, outer))
+
+    def _bulk_finished(self, pool_future, outer):
+        try:
+            outer.set_result(pool_future.result())
+        except BaseException as e:
+            outer.set_exception(e)
+        with self._bulk_lock:
+            self._bulk_running -= 1
+        self._feed_bulk()
+
+    def render_to_file(self, plot_name, savefig_kwargs=None, **plot_kwargs):
+        """渲染并写入临时 PNG 文件，返回文件路径（供 gr.Image(type="filepath") 使用）。"""
+        png_bytes = self.render(plot_name, savefig_kwargs=savefig_kwargs, **plot_kwargs)
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
+            tmpfile.write(png_bytes)
+            return tmpfile.name
+
+
+def trim_local_caches():
+    """清空当前进程内的绘图缓存（只有在本进程渲染过图表时才存在），返回清除的条目数。"""
+    person_status = sys.modules.get("person_status")
+    if person_status is None:
+        return 0
+    return person_status.trim_render_caches()
+
+
+RENDER_SERVICE = RenderService()
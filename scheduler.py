@@ -0,0 +1,157 @@
+import os
+import time
+import functools
+import threading
+
+from app_logging import get_logger, fields
+from config import env_number
+
+logger = get_logger("scheduler")
+
+# --- 事件优先级调度 ---
+# 界面事件与批量提交接口按用途分为三组，优先级从高到低：
+#   grading   学生提交答卷判分（含提交后显示本人雷达图、学习路线图）
+#   quiz      随堂测试
+#   analytics 教师查看学生/总体能力图、看板、导出、管理页等
+# 每组有独立的并发上限（CLASSMATCH_CONCURRENCY_<组名>），同时用作 Gradio 事件的 concurrency_id / concurrency_limit，
+# 各组在 Gradio 队列中分别排队，查看类事件不会占用判分的并发名额。
+# 此外进程内调度器按优先级放行：较高优先级的组有请求正在执行或等待时，较低优先级的请求先等待，
+# 最多推迟 CLASSMATCH_SCHEDULER_MAX_DEFER_SECONDS 秒，之后只受本组并发上限约束，避免长时间饿死。
+# 多进程部署（serve.py）时界面事件不经过 Gradio 队列，并发上限与优先级都由调度器在每个 worker 内执行。
+#
+# 过载判断（overloaded）：某组尚未开始执行的请求数（在调度器中等待的，加上 attach_gradio_queue 之后
+# Gradio 队列中该组排队的）达到 CLASSMATCH_OVERLOAD_QUEUE_<组名>（默认等于该组并发上限，即至少还有
+# 一整轮请求在排队）时进入过载，回落到一半以下才恢复。判分组过载时提交不再渲染图片（见 paper._admit_chart），
+# 缩短每个请求的处理时间，让排队的学生尽快拿到检查结果。
+
+MAX_DEFER_ENV = "CLASSMATCH_SCHEDULER_MAX_DEFER_SECONDS"
+_DEFAULT_MAX_DEFER_SECONDS = 5.0
+
+GRADING = "grading"
+QUIZ = "quiz"
+ANALYTICS = "analytics"
+
+# 组名 -> (优先级，数值越小越优先；默认并发上限)
+_DEFAULT_GROUPS = {
+    GRADING: (0, max(2, 2 * (os.cpu_count() or 1))),
+    QUIZ: (1, 2),
+    ANALYTICS: (2, 2),
+}
+
+
+def _env_limit(group, default, prefix="CLASSMATCH_CONCURRENCY"):
+    return env_number(f"{prefix}_{group.upper()}", default, minimum=1, cast=int)
+
+
+class PriorityScheduler:
+    """按组限制并发并按优先级放行，线程安全。等待时间记入 metrics 的 (事件, "scheduler_wait") 阶段。"""
+
+    def __init__(self, metrics, groups=None, max_defer_seconds=None):
+        groups = _DEFAULT_GROUPS if groups is None else groups
+        self._metrics = metrics
+        self._priorities = {group: priority for group, (priority, _) in groups.items()}
+        self._limits = {group: _env_limit(group, limit) for group, (_, limit) in groups.items()}
+        self._max_defer_seconds = (env_number(MAX_DEFER_ENV, _DEFAULT_MAX_DEFER_SECONDS)
+                                   if max_defer_seconds is None else max_defer_seconds)
+        self._overload_limits = {group: _env_limit(group, limit, prefix="CLASSMATCH_OVERLOAD_QUEUE")
+                                 for group, limit in self._limits.items()}
+        self._condition = threading.Condition()
+        self._running = dict.fromkeys(groups, 0)
+        self._waiting = dict.fromkeys(groups, 0)
+        self._overloaded = dict.fromkeys(groups, False)
+        self._gradio_queue = None
+
+    def limit(self, group):
+        return self._limits[group]
+
+    def attach_gradio_queue(self, blocks):
+        """让 queued()/overloaded() 同时统计 Gradio 队列中按 concurrency_id 排队的事件（启用 Gradio 队列时调用）。"""
+        self._gradio_queue = getattr(blocks, "_queue", None)
+
+    def _gradio_queued(self, group):
+        # Gradio 内部结构，取不到时按 0 计；列表只在事件循环中增删，这里只读长度
+        queues = getattr(self._gradio_queue, "event_queue_per_concurrency_id", None) or {}
+        event_queue = queues.get(group)
+        return len(getattr(event_queue, "queue", ())) if event_queue is not None else 0
+
+    def queued(self, group):
+        """group 组尚未开始执行的请求数（调度器中等待的与 Gradio 队列中排队的）。"""
+        return self._waiting[group] + self._gradio_queued(group)
+
+    def overloaded(self, group):
+        """group 组排队的请求是否过多（带滞回，进入与退出过载时各记录一次日志），见模块说明。"""
+        limit = self._overload_limits[group]
+        queued = self.queued(group)
+        with self._condition:
+            was_overloaded = self._overloaded[group]
+            if was_overloaded and queued <= limit // 2:
+                self._overloaded[group] = False
+            elif not was_overloaded and queued >= limit:
+                self._overloaded[group] = True
+            overloaded = self._overloaded[group]
+        if overloaded != was_overloaded:
+            if overloaded:
+                logger.warning("%d %s requests queued; entering overload mode.", queued, group,
+                               extra=fields(group=group, queued=queued, limit=limit))
+            else:
+                logger.info("%s queue drained to %d; leaving overload mode.", group, queued,
+                            extra=fields(group=group, queued=queued, limit=limit))
+        return overloaded
+
+    def _higher_priority_busy(self, group):
+        priority = self._priorities[group]
+        return any(self._running[other] or self._waiting[other]
+                   for other, other_priority in self._priorities.items() if other_priority < priority)
+
+    def _acquire(self, group):
+        started_at = time.monotonic()
+        defer_until = started_at + self._max_defer_seconds
+        with self._condition:
+            self._waiting[group] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._running[group] < self._limits[group] and (
+                            now >= defer_until or not self._higher_priority_busy(group)):
+                        break
+                    # 推迟期限到达时需要醒来重新判断，即使没有其他请求结束
+                    self._condition.wait(timeout=defer_until - now if now < defer_until else None)
+            finally:
+                self._waiting[group] -= 1
+            self._running[group] += 1
+        return time.monotonic() - started_at
+
+    def _release(self, group):
+        with self._condition:
+            self._running[group] -= 1
+            self._condition.notify_all()
+
+    def scheduled(self, group, event=None):
+        """装饰器：在 group 组内排队执行（保留原函数签名与名称，Gradio 据此识别输入与 API 名称）。"""
+        def decorator(fn):
+            event_name = event or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                self._metrics.observe(event_name, "scheduler_wait", self._acquire(group))
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._release(group)
+            return wrapper
+        return decorator
+
+    def gradio_concurrency(self, group):
+        """Gradio 事件监听的并发参数：同组事件共享 concurrency_id 与并发上限。"""
+        return {"concurrency_id": group, "concurrency_limit": self._limits[group]}
+
+    def format_markdown(self):
+        """管理页的调度概况：按优先级列出各组正在执行与等待的请求数。"""
+        with self._condition:
+            rows = [(group, self._running[group], self.queued(group), self._limits[group],
+                     self._overload_limits[group], "是" if self._overloaded[group] else "否")
+                    for group in sorted(self._priorities, key=self._priorities.get)]
+        lines = [f"优先级从高到低；较低优先级的请求最多推迟 {self._max_defer_seconds:g} 秒。", "",
+                 "| 分组 | 执行中 | 等待中 | 并发上限 | 过载阈值 | 过载 |", "|---|---:|---:|---:|---:|---|"]
+        lines.extend(f"| {' | '.join(map(str, row))} |" for row in rows)
+        return "\n".join(lines)
@@ -0,0 +1,124 @@
+"""
+多进程部署入口：多个 worker 进程共享同一个端口。
+
+    python serve.py --workers 4 --port 7860
+
+父进程先导入 paper.py（gradio 在此时加载完毕）并构建界面，再导入绘图模块 person_status（matplotlib）
+并完成中文字体的查找与配置，然后绑定监听端口并 fork 出各个 worker；worker 直接继承已导入的模块与字体配置，
+无需重复扫描字体，这部分内存也由各 worker 按写时复制共享。各 worker 开始接受连接后，在后台线程中
+完成按进程保存的预热（图表模板与字形缓存，见 paper.warm_up），预热期间该 worker 的 /readyz 返回 503。
+学生数据与随堂测试统计通过 CLASSMATCH_STATE_DB 指定的本地 SQLite 文件在 worker 间共享。
+批量提交接口（POST /api/v1/submissions，见 submission_api.py）在每个 worker 内各自攒批判分；
+/metrics 的耗时统计与内存看门狗（memory_watchdog.py）同样按 worker 分别计算。
+
+注意：各 worker 之间不共享 Gradio 的队列会话，因此多进程模式下界面事件以普通请求/响应方式
+处理（不经过 Gradio 队列），进度条等依赖队列的功能不可用。
+"""
+import os
+import sys
+import signal
+import socket
+import argparse
+import tempfile
+
+from state_store import STATE_DB_ENV
+from app_logging import get_logger
+
+WORKERS_ENV = "CLASSMATCH_WORKERS"
+
+logger = get_logger("serve")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="以多 worker 进程方式启动 classMatch 应用")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker 进程数（默认等于 CPU 核数）")
+    parser.add_argument("--host", default="0.0.0.0", help="监听地址")
+    parser.add_argument("--port", type=int, default=7860, help="监听端口")
+    parser.add_argument("--state-db", default=os.path.join(os.getcwd(), "classmatch_state.db"),
+                        help="worker 间共享状态使用的 SQLite 文件")
+    return parser.parse_args()
+
+
+def _bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock):
+    import uvicorn
+    from paper import start_serving_process
+
+    # 每个 worker 各自预热（图表渲染缓存与字形按进程保存，预热在后台线程中与接受连接同时进行），
+    # 看门狗与检查点线程也不随 fork 继承，由各 worker 自行启动
+    start_serving_process()
+
+    config = uvicorn.Config(app, log_level="warning", lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    args = _parse_args()
+    if not hasattr(os, "fork"):
+        sys.exit("多进程模式依赖 os.fork，当前平台请直接运行 python paper.py。")
+
+    # 以下环境变量须在导入 paper 之前设置
+    os.environ[WORKERS_ENV] = str(args.workers)
+    os.environ[STATE_DB_ENV] = os.path.abspath(args.state_db)
+    # 每个 worker 已是独立进程，默认不再额外创建渲染进程池，避免进程数超过 CPU 核数
+    os.environ.setdefault("CLASSMATCH_RENDER_WORKERS", "0")
+    # 所有 worker 使用同一个 Gradio 缓存目录，任何 worker 都能返回其他 worker 生成的图片
+    gradio_cache_dir = os.environ.setdefault("GRADIO_TEMP_DIR", os.path.join(tempfile.gettempdir(), "gradio"))
+
+    import gradio as gr
+    from fastapi import FastAPI
+    from fastapi.staticfiles import StaticFiles
+    import paper
+    # paper.py 为了缩短单进程启动时间而延迟加载 matplotlib；多进程时在 fork 之前加载，各 worker 不再重复
+    from person_status import ensure_chinese_font
+    ensure_chinese_font()
+
+    app = FastAPI()
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.include_router(paper.SUBMISSION_API_ROUTER)
+    app.include_router(paper.METRICS_ROUTER)
+    app.include_router(paper.READINESS_ROUTER)
+    app = gr.mount_gradio_app(app, paper.demo, path="/", allowed_paths=[gradio_cache_dir])
+
+    sock = _bind_socket(args.host, args.port)
+    logger.info("Starting %d workers on http://%s:%d (state: %s)", args.workers, args.host, args.port,
+                os.environ[STATE_DB_ENV])
+
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def _stop_children(signum, frame):
+        for child_pid in children:
+            try:
+                os.kill(child_pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, _stop_children)
+    signal.signal(signal.SIGTERM, _stop_children)
+
+    for child_pid in children:
+        try:
+            os.waitpid(child_pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,599 @@
+import os
+import json
+import sqlite3
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from class_aggregates import ClassAggregates, DEFAULT_QUANTILES
+from error_trends import ErrorTrends, ErrorTrendSnapshot, error_keys
+
+# --- 并发安全的学生数据 / 随堂测试统计存储 ---
+# Gradio 提高并发后，多个提交会同时读写学生历史与测试计数器。
+# 学生历史按姓名哈希分段加锁（lock striping），不同学生的提交互不阻塞；
+# 测试计数器的一次完整作答在同一把锁内更新，保证计数不丢失。
+
+_DEFAULT_LOCK_STRIPES = 16
+
+# 成绩取值 0-100，单精度足够，且使每位学生的历史只占 容量 × 维度 × 4 字节
+SCORE_DTYPE = np.float32
+
+# 学生历史的只读快照：attributes 为能力维度元组，scores 为 (提交次数 × 能力维度) 数组，按提交先后排列
+HistorySnapshot = namedtuple("HistorySnapshot", ["attributes", "scores"])
+
+_ATTRIBUTE_SCHEMAS = {}
+_ATTRIBUTE_SCHEMAS_LOCK = threading.Lock()
+
+# 多进程部署时设置此环境变量（SQLite 文件路径），各 worker 通过同一个本地库共享学生数据与测试统计
+STATE_DB_ENV = "CLASSMATCH_STATE_DB"
+_SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+
+def intern_attributes(attributes):
+    """返回能力维度列表对应的全局唯一元组，所有学生共享同一份维度名称，也可以直接用 is 比较。"""
+    key = tuple(attributes)
+    schema = _ATTRIBUTE_SCHEMAS.get(key)
+    if schema is None:
+        with _ATTRIBUTE_SCHEMAS_LOCK:
+            schema = _ATTRIBUTE_SCHEMAS.setdefault(key, key)
+    return schema
+
+
+class ScoreHistory:
+    """
+    单个学生的成绩环形缓冲区：容量固定为 capacity 行（提交）× 能力维度列，
+    追加时覆盖最旧的一行，不再切片复制列表。attributes 为全班共享的驻留元组。
+    """
+    __slots__ = ("attributes", "_buffer", "_next", "_count")
+
+    def __init__(self, attributes, capacity):
+        self.attributes = attributes
+        self._buffer = np.zeros((capacity, len(attributes)), dtype=SCORE_DTYPE)
+        self._next = 0
+        self._count = 0
+
+    @classmethod
+    def from_buffer(cls, attributes, buffer, next_index, count):
+        """用检查点中保存的缓冲区直接重建（不复制 buffer）。"""
+        history = cls.__new__(cls)
+        history.attributes = attributes
+        history._buffer = buffer
+        history._next = int(next_index)
+        history._count = int(count)
+        return history
+
+    def append(self, scores):
+        self._buffer[self._next] = scores
+        self._next = (self._next + 1) % len(self._buffer)
+        self._count = min(self._count + 1, len(self._buffer))
+
+    def __len__(self):
+        return self._count
+
+    def latest(self):
+        return self._buffer[(self._next - 1) % len(self._buffer)].copy()
+
+    def to_array(self):
+        """按提交先后顺序返回 (提交次数 × 能力维度) 的连续数组副本。"""
+        if self._count < len(self._buffer):
+            return self._buffer[:self._count].copy()
+        return np.concatenate((self._buffer[self._next:], self._buffer[:self._next]))
+
+
+class StudentStore:
+    """
+    学生提交历史存储。每位学生一个 ScoreHistory 环形缓冲区，
+    读取时返回 HistorySnapshot（驻留的能力维度元组 + 成绩数组副本），写入统一通过 append_submission 完成。
+    """
+
+    def __init__(self, max_history, num_stripes=_DEFAULT_LOCK_STRIPES):
+        self._max_history = max_history
+        self._records = {}
+        # 新学生插入与遍历共用一把索引锁，避免遍历时字典大小变化
+        self._index_lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(num_stripes)]
+        self._aggregates = ClassAggregates()
+        self._check_results = {}
+        self._error_trends = ErrorTrends()
+        # 每次写入加一，检查点据此判断自上次保存以来数据是否有变化。
+        # 写入分散在不同的分段锁下，版本号单独用一把锁保护，避免并发的自增互相覆盖
+        self._version = 0
+        self._version_lock = threading.Lock()
+
+    def _lock_for(self, student_name):
+        return self._stripes[hash(student_name) % len(self._stripes)]
+
+    def _bump_version(self):
+        with self._version_lock:
+            self._version += 1
+
+    def append_submission(self, student_name, attributes, scores):
+        """
+        追加一次提交，只保留最近 max_history 次，返回该学生当前的提交次数。
+        能力维度与已有历史不一致时，旧历史无法与新提交对比，会被新的缓冲区替换。
+        """
+        attributes = intern_attributes(attributes)
+        with self._lock_for(student_name):
+            history = self._records.get(student_name)
+            previous = (history.attributes, history.latest()) if history is not None else None
+            if history is None or history.attributes is not attributes:
+                history = ScoreHistory(attributes, self._max_history)
+                with self._index_lock:
+                    self._records[student_name] = history
+            history.append(scores)
+            self._aggregates.record(attributes, history.latest(), previous)
+            self._bump_version()
+            return len(history)
+
+    def record_check_result(self, student_name, check_result):
+        """保存学生最近一次的检查结果（可 JSON 序列化的 dict），供整班报告导出使用。"""
+        with self._lock_for(student_name):
+            if student_name in self._check_results:
+                self._check_results[student_name] = check_result
+            else:
+                # 新学生的插入与 export_state 的遍历互斥
+                with self._index_lock:
+                    self._check_results[student_name] = check_result
+            self._error_trends.record(student_name, check_result.get("detailed_errors") or [])
+            self._bump_version()
+
+    def latest_check_result(self, student_name):
+        """返回学生最近一次的检查结果，没有时返回 None。"""
+        return self._check_results.get(student_name)
+
+    def record_batch(self, entries):
+        """
+        批量保存 [(学生姓名, 检查结果, 能力维度, 成绩)]，成绩为 None 时只保存检查结果。
+        返回各条目保存后该学生的提交次数（未保存成绩的条目为 None）。
+        """
+        # 先校验全部条目再写入：任一条目无效时整批都不写入，与 SQLite 存储的单个写事务一致，
+        # 调用方（批量提交接口）可以把出错的批次拆开逐份重试而不重复保存
+        prepared = []
+        for student_name, check_result, attributes, scores in entries:
+            if scores is not None:
+                scores = np.asarray(scores, dtype=SCORE_DTYPE)
+                if scores.shape != (len(attributes),):
+                    raise ValueError(f"Scores shape {scores.shape} does not match {len(attributes)} attributes "
+                                     f"for student {student_name!r}.")
+            prepared.append((student_name, check_result, attributes, scores))
+        submission_counts = []
+        for student_name, check_result, attributes, scores in prepared:
+            self.record_check_result(student_name, check_result)
+            submission_counts.append(
+                None if scores is None else self.append_submission(student_name, attributes, scores))
+        return submission_counts
+
+    def error_trend_version(self):
+        """错误趋势的版本号，轮询时版本号未变即可跳过 error_trends()。"""
+        return self._error_trends.version()
+
+    def error_trends(self):
+        """返回 ErrorTrendSnapshot（各学生最近一次检查中的错误分布），详见 error_trends.ErrorTrends。"""
+        return self._error_trends.snapshot()
+
+    def get_history(self, student_name):
+        """返回 HistorySnapshot，学生不存在时返回 None。"""
+        if student_name not in self._records:
+            return None
+        with self._lock_for(student_name):
+            history = self._records[student_name]
+            return HistorySnapshot(history.attributes, history.to_array())
+
+    def latest_scores(self):
+        """返回 [(学生姓名, 能力维度, 最近一次成绩数组)]，按学生首次提交顺序排列。"""
+        latest = []
+        for student_name in self.keys():
+            with self._lock_for(student_name):
+                history = self._records[student_name]
+                latest.append((student_name, history.attributes, history.latest()))
+        return latest
+
+    def class_summary(self, attributes=None, quantiles=DEFAULT_QUANTILES):
+        """全班（各学生最近一次提交）的聚合统计，常数时间，详见 class_aggregates.ClassAggregates。"""
+        return self._aggregates.summary(attributes, quantiles)
+
+    def __contains__(self, student_name):
+        return student_name in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def keys(self):
+        with self._index_lock:
+            return list(self._records.keys())
+
+    def state_version(self):
+        return self._version
+
+    def export_state(self):
+        """
+        导出可 pickle 的完整状态，供 checkpoint 模块保存。同一组能力维度的学生历史堆叠成一个
+        (学生数 × 容量 × 能力维度) 数组，避免为每位学生单独序列化一个小数组。
+        每位学生在自己的分段锁内复制，不会阻塞其他学生的提交。
+        """
+        version = self._version
+        names = []
+        schema_ids = []
+        cursors = []
+        schema_index = {}
+        buffers = []
+        check_results = {}
+        with self._index_lock:
+            student_names = list(self._check_results.keys() | self._records.keys())
+            order = {name: i for i, name in enumerate(self._records)}
+        # 有历史的学生按首次提交顺序在前，只有检查结果的学生在后
+        student_names.sort(key=lambda name: order.get(name, len(order)))
+        for student_name in student_names:
+            with self._lock_for(student_name):
+                check_result = self._check_results.get(student_name)
+                if check_result is not None:
+                    check_results[student_name] = check_result
+                history = self._records.get(student_name)
+                if history is None:
+                    continue
+                schema_id = schema_index.get(history.attributes)
+                if schema_id is None:
+                    schema_id = schema_index[history.attributes] = len(buffers)
+                    buffers.append([])
+                buffers[schema_id].append(history._buffer.copy())
+                cursors.append((history._next, history._count))
+            names.append(student_name)
+            schema_ids.append(schema_id)
+        return {
+            "version": version,
+            "max_history": self._max_history,
+            "names": names,
+            "schemas": list(schema_index),
+            "schema_ids": np.asarray(schema_ids, dtype=np.int32),
+            "cursors": np.asarray(cursors, dtype=np.int32).reshape(-1, 2),
+            "buffers": [np.stack(rows) for rows in buffers],
+            "check_results": check_results,
+        }
+
+    def restore_state(self, state):
+        """
+        用 export_state() 的结果替换当前全部数据，并重建全班聚合与错误趋势。
+        只在进程开始接受请求之前调用。保存时的 max_history 与当前不同时，按提交先后重新写入环形缓冲区。
+        """
+        schemas = [intern_attributes(attributes) for attributes in state["schemas"]]
+        buffers = state["buffers"]
+        rows_used = [0] * len(buffers)
+        records = {}
+        cursors = state["cursors"].tolist()
+        for student_name, schema_id, (next_index, count) in zip(state["names"], state["schema_ids"].tolist(), cursors):
+            buffer = buffers[schema_id][rows_used[schema_id]]
+            rows_used[schema_id] += 1
+            history = ScoreHistory.from_buffer(schemas[schema_id], buffer, next_index, count)
+            if len(buffer) != self._max_history:
+                resized = ScoreHistory(history.attributes, self._max_history)
+                for scores in history.to_array():
+                    resized.append(scores)
+                history = resized
+            records[student_name] = history
+
+        aggregates = ClassAggregates()
+        latest_by_schema = {}
+        for history in records.values():
+            latest_by_schema.setdefault(history.attributes, []).append(history.latest())
+        for attributes, latest in latest_by_schema.items():
+            aggregates.record_many(attributes, np.stack(latest))
+
+        error_trends = ErrorTrends()
+        for student_name, check_result in state["check_results"].items():
+            error_trends.record(student_name, check_result.get("detailed_errors") or [])
+
+        with self._index_lock:
+            self._records = records
+            self._check_results = dict(state["check_results"])
+            self._aggregates = aggregates
+            self._error_trends = error_trends
+        self._bump_version()
+
+
+class QuizStats:
+    """随堂测试每题的作答统计，一次提交中的所有题目在同一把锁内原子更新。"""
+
+    def __init__(self, question_ids):
+        self._lock = threading.Lock()
+        self._stats = {q_id: {"correct_count": 0, "total_attempts": 0} for q_id in question_ids}
+        self._version = 0
+
+    def record_attempt(self, results_by_question):
+        """results_by_question: {q_id: 是否答对}"""
+        with self._lock:
+            for q_id, is_correct in results_by_question.items():
+                self._stats[q_id]["total_attempts"] += 1
+                if is_correct:
+                    self._stats[q_id]["correct_count"] += 1
+            self._version += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {q_id: dict(counts) for q_id, counts in self._stats.items()}
+
+    def __getitem__(self, q_id):
+        with self._lock:
+            return dict(self._stats[q_id])
+
+    def state_version(self):
+        return self._version
+
+    def export_state(self):
+        with self._lock:
+            return {"version": self._version, "stats": {q_id: dict(counts) for q_id, counts in self._stats.items()}}
+
+    def restore_state(self, state):
+        """恢复 export_state() 保存的计数；题库中已不存在的题目被忽略。"""
+        with self._lock:
+            for q_id, counts in state["stats"].items():
+                if q_id in self._stats:
+                    self._stats[q_id] = dict(counts)
+            self._version += 1
+
+
+# --- 多进程共享存储（SQLite） ---
+# 与 StudentStore / QuizStats 接口一致。每个进程、每个线程使用各自的连接，
+# 写入在 BEGIN IMMEDIATE 事务中完成，多个 worker 进程并发提交也不会丢失更新。
+# 表结构的版本记在 PRAGMA user_version 中，打开数据库时在同一个写事务里检查并迁移：
+#   0 → 1：早期版本未记录版本号。把按 JSON 保存整次提交的 submissions(payload) 转换为
+#          能力维度 + float32 成绩的格式，补建检查结果与错误趋势表，并按已保存的检查结果重算错误趋势计数。
+# 数据库版本高于本程序支持的版本时拒绝打开，避免旧程序写坏新格式。
+
+_SCHEMA_VERSION = 1
+
+
+def _create_tables(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS students (name TEXT PRIMARY KEY)")
+    conn.execute("CREATE TABLE IF NOT EXISTS submissions ("
+                 "id INTEGER PRIMARY KEY AUTOINCREMENT, student TEXT NOT NULL, "
+                 "attributes TEXT NOT NULL, scores BLOB NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions (student, id)")
+    conn.execute("CREATE TABLE IF NOT EXISTS check_results (student TEXT PRIMARY KEY, result TEXT NOT NULL)")
+    # 错误趋势计数与检查结果在同一事务中更新；版本号保存在只有一行的表中
+    conn.execute("CREATE TABLE IF NOT EXISTS error_trend_counts ("
+                 "section TEXT NOT NULL, type TEXT NOT NULL, code TEXT NOT NULL, "
+                 "students INTEGER NOT NULL, PRIMARY KEY (section, type, code))")
+    conn.execute("CREATE TABLE IF NOT EXISTS error_trend_version (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                 "version INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO error_trend_version (id, version) VALUES (0, 0)")
+    conn.execute("CREATE TABLE IF NOT EXISTS quiz_stats ("
+                 "q_id TEXT PRIMARY KEY, correct_count INTEGER NOT NULL DEFAULT 0, "
+                 "total_attempts INTEGER NOT NULL DEFAULT 0)")
+
+
+def _migrate_unversioned(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(submissions)")}
+    if "payload" in columns:
+        conn.execute("ALTER TABLE submissions RENAME TO submissions_unversioned")
+        conn.execute("DROP INDEX IF EXISTS idx_submissions_student")
+    _create_tables(conn)
+    if "payload" in columns:
+        rows = conn.execute("SELECT id, student, payload FROM submissions_unversioned ORDER BY id").fetchall()
+        converted = []
+        for row_id, student_name, payload in rows:
+            submission = json.loads(payload)
+            converted.append((row_id, student_name, json.dumps(list(submission["attributes"]), ensure_ascii=False),
+                              np.asarray(submission["scores"], dtype=SCORE_DTYPE).tobytes()))
+        conn.executemany("INSERT INTO submissions (id, student, attributes, scores) VALUES (?, ?, ?, ?)", converted)
+        conn.execute("DROP TABLE submissions_unversioned")
+    # 旧版本可能只保存了检查结果而没有维护错误趋势，按检查结果重新计数
+    counts = Counter()
+    for (result,) in conn.execute("SELECT result FROM check_results"):
+        counts.update(error_keys(json.loads(result).get("detailed_errors") or []))
+    conn.execute("DELETE FROM error_trend_counts")
+    conn.executemany("INSERT INTO error_trend_counts (section, type, code, students) VALUES (?, ?, ?, ?)",
+                     [key + (students,) for key, students in counts.items()])
+    conn.execute("UPDATE error_trend_version SET version = version + 1 WHERE id = 0")
+
+
+def _ensure_schema(conn):
+    """检查表结构版本，必要时迁移；多个 worker 同时启动时由写锁保证只迁移一次。"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > _SCHEMA_VERSION:
+            raise RuntimeError(f"State database schema version {version} is newer than the supported "
+                               f"version {_SCHEMA_VERSION}; upgrade the application or use a new {STATE_DB_ENV}.")
+        if version < 1:
+            _migrate_unversioned(conn)
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class _SqliteConnections:
+    def __init__(self, db_path):
+        self._db_path = db_path
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        # fork 之后不能继续使用父进程的连接
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self._db_path, timeout=_SQLITE_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class SqliteStudentStore:
+    """学生提交历史的 SQLite 实现，供多进程部署使用。成绩以 float32 字节串存储。"""
+
+    def __init__(self, db_path, max_history):
+        self._max_history = max_history
+        self._connections = _SqliteConnections(db_path)
+        _ensure_schema(self._connections.get())
+        # 聚合统计在每个进程内维护，查询前按自增 id 增量追上其它 worker 写入的提交
+        self._aggregates = ClassAggregates()
+        self._aggregates_lock = threading.Lock()
+        self._aggregated_up_to_id = 0
+        self._aggregated_latest = {}
+
+    def _write_transaction(self, write):
+        conn = self._connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = write(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _append_submission(self, conn, student_name, attributes, scores):
+        attributes_json = json.dumps(list(attributes), ensure_ascii=False)
+        scores_blob = np.asarray(scores, dtype=SCORE_DTYPE).tobytes()
+        conn.execute("INSERT OR IGNORE INTO students (name) VALUES (?)", (student_name,))
+        # 与进程内存储一致：能力维度变化时丢弃无法对比的旧历史
+        conn.execute("DELETE FROM submissions WHERE student = ? AND attributes != ?",
+                     (student_name, attributes_json))
+        conn.execute("INSERT INTO submissions (student, attributes, scores) VALUES (?, ?, ?)",
+                     (student_name, attributes_json, scores_blob))
+        conn.execute("DELETE FROM submissions WHERE student = ? AND id NOT IN "
+                     "(SELECT id FROM submissions WHERE student = ? ORDER BY id DESC LIMIT ?)",
+                     (student_name, student_name, self._max_history))
+        return conn.execute("SELECT COUNT(*) FROM submissions WHERE student = ?", (student_name,)).fetchone()[0]
+
+    def _record_check_result(self, conn, student_name, check_result):
+        keys = error_keys(check_result.get("detailed_errors") or [])
+        row = conn.execute("SELECT result FROM check_results WHERE student = ?", (student_name,)).fetchone()
+        previous = error_keys(json.loads(row[0]).get("detailed_errors") or []) if row else None
+        conn.execute("INSERT OR REPLACE INTO check_results (student, result) VALUES (?, ?)",
+                     (student_name, json.dumps(check_result, ensure_ascii=False)))
+        if previous != keys:
+            conn.executemany("UPDATE error_trend_counts SET students = students - 1 "
+                             "WHERE section = ? AND type = ? AND code = ?", list(previous or ()))
+            conn.executemany("INSERT INTO error_trend_counts (section, type, code, students) VALUES (?, ?, ?, 1) "
+                             "ON CONFLICT (section, type, code) DO UPDATE SET students = students + 1",
+                             list(keys))
+            conn.execute("DELETE FROM error_trend_counts WHERE students <= 0")
+            conn.execute("UPDATE error_trend_version SET version = version + 1 WHERE id = 0")
+
+    def append_submission(self, student_name, attributes, scores):
+        return self._write_transaction(
+            lambda conn: self._append_submission(conn, student_name, attributes, scores))
+
+    def record_check_result(self, student_name, check_result):
+        self._write_transaction(lambda conn: self._record_check_result(conn, student_name, check_result))
+
+    def record_batch(self, entries):
+        """整批条目在同一个写事务中保存，每批只需获取一次数据库写锁。"""
+        def _write(conn):
+            submission_counts = []
+            for student_name, check_result, attributes, scores in entries:
+                self._record_check_result(conn, student_name, check_result)
+                submission_counts.append(
+                    None if scores is None else self._append_submission(conn, student_name, attributes, scores))
+            return submission_counts
+        return self._write_transaction(_write)
+
+    def latest_check_result(self, student_name):
+        row = self._connections.get().execute(
+            "SELECT result FROM check_results WHERE student = ?", (student_name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def error_trend_version(self):
+        return self._connections.get().execute("SELECT version FROM error_trend_version WHERE id = 0").fetchone()[0]
+
+    def error_trends(self):
+        conn = self._connections.get()
+        # 在同一个读事务中读取版本号与计数，保证两者一致
+        conn.execute("BEGIN")
+        try:
+            version = conn.execute("SELECT version FROM error_trend_version WHERE id = 0").fetchone()[0]
+            student_count = conn.execute("SELECT COUNT(*) FROM check_results").fetchone()[0]
+            counts = {(section, error_type, code): students for section, error_type, code, students in
+                      conn.execute("SELECT section, type, code, students FROM error_trend_counts")}
+        finally:
+            conn.execute("COMMIT")
+        return ErrorTrendSnapshot(version, student_count, counts)
+
+    def get_history(self, student_name):
+        rows = self._connections.get().execute(
+            "SELECT attributes, scores FROM submissions WHERE student = ? ORDER BY id", (student_name,)).fetchall()
+        if not rows:
+            return None
+        attributes = intern_attributes(json.loads(rows[-1][0]))
+        scores = np.frombuffer(b"".join(blob for _, blob in rows), dtype=SCORE_DTYPE)
+        return HistorySnapshot(attributes, scores.reshape(len(rows), len(attributes)).copy())
+
+    def latest_scores(self):
+        rows = self._connections.get().execute(
+            "SELECT s.student, s.attributes, s.scores FROM submissions s "
+            "JOIN (SELECT student, MAX(id) AS id FROM submissions GROUP BY student) m ON s.id = m.id "
+            "JOIN students st ON st.name = s.student ORDER BY st.rowid").fetchall()
+        return [(student_name, intern_attributes(json.loads(attributes_json)),
+                 np.frombuffer(blob, dtype=SCORE_DTYPE).copy())
+                for student_name, attributes_json, blob in rows]
+
+    def class_summary(self, attributes=None, quantiles=DEFAULT_QUANTILES):
+        with self._aggregates_lock:
+            # 被截断删除的旧提交不影响结果：统计只关心每位学生最近一次提交
+            rows = self._connections.get().execute(
+                "SELECT id, student, attributes, scores FROM submissions WHERE id > ? ORDER BY id",
+                (self._aggregated_up_to_id,)).fetchall()
+            for row_id, student_name, attributes_json, blob in rows:
+                latest = (intern_attributes(json.loads(attributes_json)), np.frombuffer(blob, dtype=SCORE_DTYPE))
+                self._aggregates.record(latest[0], latest[1], self._aggregated_latest.get(student_name))
+                self._aggregated_latest[student_name] = latest
+                self._aggregated_up_to_id = row_id
+        return self._aggregates.summary(attributes, quantiles)
+
+    def __contains__(self, student_name):
+        return self._connections.get().execute(
+            "SELECT 1 FROM students WHERE name = ?", (student_name,)).fetchone() is not None
+
+    def __len__(self):
+        return self._connections.get().execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def keys(self):
+        return [name for (name,) in self._connections.get().execute("SELECT name FROM students ORDER BY rowid")]
+
+
+class SqliteQuizStats:
+    """随堂测试统计的 SQLite 实现，计数在数据库内自增。"""
+
+    def __init__(self, db_path, question_ids):
+        self._connections = _SqliteConnections(db_path)
+        conn = self._connections.get()
+        _ensure_schema(conn)
+        self._question_ids = list(question_ids)
+        conn.executemany("INSERT OR IGNORE INTO quiz_stats (q_id) VALUES (?)",
+                         [(q_id,) for q_id in self._question_ids])
+
+    def record_attempt(self, results_by_question):
+        conn = self._connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE quiz_stats SET total_attempts = total_attempts + 1, "
+                             "correct_count = correct_count + ? WHERE q_id = ?",
+                             [(1 if is_correct else 0, q_id) for q_id, is_correct in results_by_question.items()])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def snapshot(self):
+        rows = self._connections.get().execute(
+            "SELECT q_id, correct_count, total_attempts FROM quiz_stats").fetchall()
+        stats = {q_id: {"correct_count": correct, "total_attempts": total} for q_id, correct, total in rows}
+        return {q_id: stats[q_id] for q_id in self._question_ids}
+
+    def __getitem__(self, q_id):
+        return self.snapshot()[q_id]
+
+
+def create_state_stores(max_history, question_ids):
+    """
+    根据部署方式创建 (学生存储, 测试统计)：设置了 CLASSMATCH_STATE_DB 时使用多进程共享的
+    SQLite 存储，否则使用进程内存储。
+    """
+    db_path = os.environ.get(STATE_DB_ENV)
+    if db_path:
+        return SqliteStudentStore(db_path, max_history), SqliteQuizStats(db_path, question_ids)
+    return StudentStore(max_history), QuizStats(question_ids)
@@ -0,0 +1,173 @@
+"""
+答卷批量提交接口（JSON），供 LMS 对接与压测使用，无需经过浏览器界面。
+
+    POST /api/v1/submissions
+    {
+        "submissions": [
+            {
+                "student_name": "张三",
+                "subnet_id": "1", "network_name": "...",
+                "station_config": [[...], ...],      # 可省略，省略时使用界面的空白模板（不计分）
+                "channel_segment": [["卫星名称", "12.3", "12.5", "14.05", "14.25"]],
+                "channel_type": "uu",
+                "channel_suite": [["TDM", "9.6", "100", "64.05", "62.3"], ["ALOHA", ...]],
+                "network_analysis": [[...], ...],
+                "local_cc_address": "...", "remote_xx_address": "...",
+                "p2p": [[...], [...]],
+                "virtual_subnet": [[...]],
+                "virtual_subnet_rate": 64,
+                "peer_scores": [80, 70]            # 组内评价，可省略
+            }
+        ],
+        "include_charts": false,                   # 为 true 时每条结果附带 SVG 雷达图
+        "store": true                              # 为 false 时只判分，不写入学生历史
+    }
+
+返回 {"results": [...], "seconds": 处理耗时}，results 与 submissions 一一对应，每条包含
+student_name、check_message、analysis_report、error_sections_with_counts、detailed_errors、
+radar（attributes / scores）、total_submissions，以及请求图表时的 radar_svg；单条判分失败时只有
+student_name 与 error。表格字段与界面中对应表格一致：按行排列的单元格列表（含预填的名称列）。
+
+并发到达的请求由 MicroBatcher 攒成批次（最多 _MAX_BATCH_SIZE 份，最多等待 _MAX_BATCH_WAIT_SECONDS 秒）
+交给判分函数，雷达分数整批向量化计算，学生历史与检查结果每批只写一次存储。
+"""
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from app_logging import get_logger
+
+logger = get_logger("submission_api")
+
+SUBMISSIONS_PATH = "/api/v1/submissions"
+
+_MAX_BATCH_SIZE = 64
+_MAX_BATCH_WAIT_SECONDS = 0.005
+_MAX_SUBMISSIONS_PER_REQUEST = 1000
+_REQUEST_TIMEOUT_SECONDS = 120
+
+
+class SubmissionIn(BaseModel):
+    student_name: str = Field(..., min_length=1, description="学生姓名")
+    subnet_id: str = Field("", description="子网编号")
+    network_name: str = Field("", description="网络名称")
+    station_config: Optional[List[List[Any]]] = Field(None, description="Xxx站配置参数（不计分），省略时使用空白模板")
+    channel_segment: Optional[List[List[Any]]] = Field(None, description="信道段参数")
+    channel_type: Optional[str] = Field(None, description="信道类型（uu / aa）")
+    channel_suite: Optional[List[List[Any]]] = Field(None, description="控制信道（信道套）参数")
+    network_analysis: Optional[List[List[Any]]] = Field(None, description="通信终端（组网）参数分析")
+    local_cc_address: str = Field("", description="本端CC地址")
+    remote_xx_address: str = Field("", description="对端XX地址")
+    p2p: Optional[List[List[Any]]] = Field(None, description="点对点通信参数")
+    virtual_subnet: Optional[List[List[Any]]] = Field(None, description="虚拟子网参数")
+    virtual_subnet_rate: Optional[Any] = Field(None, description="虚拟子网速率")
+    peer_scores: List[Optional[float]] = Field(default_factory=list, description="组内评价分数（0-100）")
+
+
+class SubmissionBatchIn(BaseModel):
+    submissions: List[SubmissionIn] = Field(..., min_length=1, max_length=_MAX_SUBMISSIONS_PER_REQUEST)
+    include_charts: bool = Field(False, description="是否在结果中附带 SVG 雷达图")
+    store: bool = Field(True, description="是否写入学生历史（与界面提交相同）")
+
+
+class MicroBatcher:
+    """
+    把并发到达的单个任务攒成批次交给 batch_fn(items) -> results 处理（results 与 items 一一对应）。
+    后台线程在首次提交时启动；fork 出的子进程中会重新启动。
+    batch_fn 抛出异常时整批拆开逐份重试，只让出错的任务失败，因此 batch_fn 出错时不能已写入部分结果
+    （判分函数在最后一步整批写入存储，存储本身整批写入或整批不写）。
+    调用方等待超时后取消尚未开始处理的任务，这些任务不再判分与保存。
+    """
+
+    def __init__(self, batch_fn, max_batch_size=_MAX_BATCH_SIZE, max_wait_seconds=_MAX_BATCH_WAIT_SECONDS):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._max_wait_seconds = max_wait_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, args=(self._queue,), name="submission-batcher",
+                                 daemon=True).start()
+                self._worker_pid = os.getpid()
+            return self._queue
+
+    def submit_many(self, items, timeout=None):
+        """
+        提交一组任务并阻塞等待全部结果，出错的任务在对应位置返回异常对象；
+        timeout 秒内未全部完成时取消尚未开始的任务并抛出 TimeoutError。
+        """
+        pending = self._ensure_worker()
+        futures = []
+        for item in items:
+            future = Future()
+            pending.put((item, future))
+            futures.append(future)
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            cancelled = sum(future.cancel() for future in not_done)
+            logger.warning("Timed out waiting for %d of %d submissions; cancelled %d not yet started.",
+                           len(not_done), len(futures), cancelled)
+            raise FutureTimeoutError()
+        return [future.exception() or future.result() for future in futures]
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self._max_wait_seconds
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+                except queue.Empty:
+                    break
+            # 跳过调用方已超时取消的任务；其余标记为执行中，之后不能再被取消
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch):
+        try:
+            results = self._batch_fn([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error("Error grading a submission: %s", e)
+                batch[0][1].set_exception(e)
+                return
+            logger.error("Error grading a batch of %d submissions: %s; retrying them one by one.", len(batch), e)
+            for entry in batch:
+                self._process([entry])
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def create_submission_router(batcher):
+    """创建批量提交接口的路由；batcher 的判分函数接收 SubmissionIn 字段组成的 dict（另含 include_charts / store）。"""
+    router = APIRouter()
+
+    @router.post(SUBMISSIONS_PATH)
+    def submit_submissions(request: SubmissionBatchIn):
+        started_at = time.perf_counter()
+        items = [dict(submission.model_dump(), include_charts=request.include_charts, store=request.store)
+                 for submission in request.submissions]
+        try:
+            results = batcher.submit_many(items, timeout=_REQUEST_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            raise HTTPException(status_code=504, detail="判分超时，尚未开始判分的答卷已取消（不会保存），"
+                                                        "请减少单次提交的答卷数量后重试。")
+        results = [{"student_name": item["student_name"], "error": f"判分失败: {result}"}
+                   if isinstance(result, Exception) else result for item, result in zip(items, results)]
+        return {"results": results, "seconds": time.perf_counter() - started_at}
+
+    return router
@@ -0,0 +1,232 @@
+import html
+
+import numpy as np
+
+# --- 不依赖 matplotlib 的 SVG 雷达图 ---
+# 雷达图只是若干多边形：顶点坐标由 NumPy 一次算出，直接拼接成 SVG 字符串，
+# 可放入 gr.HTML 显示，鼠标悬停在顶点上时显示学生、能力维度与分数。
+# 各函数的参数与 person_status 中同名的 plot_* 函数一致（figsize 按每英寸 100 像素换算为画布尺寸）。
+
+_PX_PER_INCH = 100
+_FONT_FAMILY = "SimHei, 'Microsoft YaHei', 'WenQuanYi Zen Hei', 'Noto Sans CJK SC', sans-serif"
+
+# matplotlib tab10 配色，与 plot_history_radar / plot_comparison_radar 的取色方式一致
+_TAB10_COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+                 "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")
+
+_STYLE = (
+    "<style>"
+    ".cm-radar .cm-series:hover .cm-area{fill-opacity:.6}"
+    ".cm-radar .cm-series:hover .cm-outline{stroke-width:3.5}"
+    ".cm-radar .cm-dot{cursor:pointer}"
+    ".cm-radar .cm-dot:hover{r:7}"
+    "</style>"
+)
+
+
+def _tab10(fraction):
+    # 与 ListedColormap 相同：[0, 1] 区间等分为 10 段
+    return _TAB10_COLORS[min(int(fraction * len(_TAB10_COLORS)), len(_TAB10_COLORS) - 1)]
+
+
+def _series_colors(count):
+    if count > 1:
+        return [_tab10(i / (count - 1)) for i in range(count)]
+    return [_tab10(0.5)]
+
+
+def _esc(text):
+    return html.escape(str(text), quote=True)
+
+
+def _fmt(value):
+    return f"{float(value):.1f}".rstrip("0").rstrip(".")
+
+
+class _RadarCanvas:
+    """一张雷达图的几何信息与 SVG 片段缓冲区。"""
+
+    def __init__(self, attributes, max_value, figsize):
+        self.attributes = list(attributes)
+        self.max_value = float(max_value)
+        self.width = int(figsize[0] * _PX_PER_INCH)
+        self.height = int(figsize[1] * _PX_PER_INCH)
+        # 与 matplotlib 版本的布局相近：图例在右侧，标题在上方
+        self.radius = 0.32 * min(self.width, self.height)
+        self.cx = 0.42 * self.width
+        self.cy = 0.55 * self.height
+        angles = np.linspace(0, 2 * np.pi, len(self.attributes), endpoint=False)
+        self.cos = np.cos(angles)
+        self.sin = np.sin(angles)
+        self.parts = []
+        self.legend = []
+
+    def points(self, values):
+        """按能力维度排列的分数 -> 顶点坐标 (x, y) 数组；角度 0 指向右侧，逆时针排列。"""
+        r = np.clip(np.asarray(values, dtype=float), 0, self.max_value) / self.max_value * self.radius
+        return self.cx + r * self.cos, self.cy - r * self.sin
+
+    @staticmethod
+    def path_data(xs, ys):
+        return "M" + " L".join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys)) + " Z"
+
+    def draw_axes(self, y_ticks):
+        parts = self.parts
+        for tick in y_ticks:
+            if tick <= 0:
+                continue
+            r = tick / self.max_value * self.radius
+            parts.append(f'<circle cx="{self.cx:.1f}" cy="{self.cy:.1f}" r="{r:.1f}" fill="none" '
+                         f'stroke="#b0b0b0" stroke-opacity="0.7" stroke-dasharray="4 3"/>')
+            parts.append(f'<text x="{self.cx + r + 3:.1f}" y="{self.cy - 4:.1f}" font-size="14" '
+                         f'fill="#333">{_fmt(tick)}</text>')
+        parts.append(f'<circle cx="{self.cx:.1f}" cy="{self.cy:.1f}" r="{self.radius:.1f}" fill="none" '
+                     f'stroke="#000" stroke-width="1"/>')
+
+        end_x = self.cx + self.radius * self.cos
+        end_y = self.cy - self.radius * self.sin
+        label_x = self.cx + (self.radius + 14) * self.cos
+        label_y = self.cy - (self.radius + 14) * self.sin
+        for i, attribute in enumerate(self.attributes):
+            parts.append(f'<line x1="{self.cx:.1f}" y1="{self.cy:.1f}" x2="{end_x[i]:.1f}" y2="{end_y[i]:.1f}" '
+                         f'stroke="#b0b0b0" stroke-opacity="0.7" stroke-dasharray="4 3"/>')
+            anchor = "start" if self.cos[i] > 0.1 else ("end" if self.cos[i] < -0.1 else "middle")
+            baseline = "auto" if self.sin[i] > 0.1 else ("hanging" if self.sin[i] < -0.1 else "middle")
+            parts.append(f'<text x="{label_x[i]:.1f}" y="{label_y[i]:.1f}" font-size="15" fill="#333" '
+                         f'text-anchor="{anchor}" dominant-baseline="{baseline}">{_esc(attribute)}</text>')
+
+    def draw_series(self, name, values, color, fill_opacity, dashed=False, line_width=2):
+        values = np.asarray(values, dtype=float)
+        xs, ys = self.points(values)
+        dash = ' stroke-dasharray="8 5"' if dashed else ""
+        fill = (f'<path class="cm-area" d="{self.path_data(xs, ys)}" fill="{color}" '
+                f'fill-opacity="{fill_opacity}" stroke="none"/>') if fill_opacity else ""
+        dots = "".join(
+            f'<circle class="cm-dot" cx="{x:.1f}" cy="{y:.1f}" r="4" fill="{color}">'
+            f'<title>{_esc(name)}\n{_esc(attribute)}: {_fmt(value)}</title></circle>'
+            for x, y, attribute, value in zip(xs, ys, self.attributes, values)
+        )
+        self.parts.append(
+            f'<g class="cm-series"><title>{_esc(name)}</title>{fill}'
+            f'<path class="cm-outline" d="{self.path_data(xs, ys)}" fill="none" stroke="{color}" '
+            f'stroke-width="{line_width}"{dash}/>{dots}</g>'
+        )
+        self.legend.append((name, color, "line_dashed" if dashed else "line"))
+
+    def to_svg(self, title):
+        legend_x = 0.80 * self.width
+        legend = []
+        for i, (name, color, kind) in enumerate(self.legend):
+            y = 0.12 * self.height + i * 26
+            if kind == "patch":
+                marker = f'<rect x="{legend_x:.1f}" y="{y - 7:.1f}" width="28" height="14" fill="{color}" fill-opacity="0.35"/>'
+            else:
+                dash = ' stroke-dasharray="8 5"' if kind == "line_dashed" else ""
+                marker = (f'<line x1="{legend_x:.1f}" y1="{y:.1f}" x2="{legend_x + 28:.1f}" y2="{y:.1f}" '
+                          f'stroke="{color}" stroke-width="2.5"{dash}/>')
+            legend.append(f'{marker}<text x="{legend_x + 36:.1f}" y="{y:.1f}" font-size="15" fill="#333" '
+                          f'dominant-baseline="middle">{_esc(name)}</text>')
+
+        return (
+            f'<svg class="cm-radar" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {self.width} {self.height}" '
+            f'width="100%" style="max-width:{self.width}px" role="img" aria-label="{_esc(title)}" '
+            f'font-family="{_esc(_FONT_FAMILY)}">{_STYLE}'
+            f'<rect width="100%" height="100%" fill="#fff"/>'
+            f'<text x="{self.cx:.1f}" y="{0.07 * self.height:.1f}" font-size="22" fill="#000" '
+            f'text-anchor="middle">{_esc(title)}</text>'
+            + "".join(self.parts) + "".join(legend) + "</svg>"
+        )
+
+
+def _five_ticks(max_value):
+    step = max_value / 5
+    return np.arange(0, max_value + step, step)
+
+
+def attribute_radar_svg(character_name, attributes, values,
+                        max_value=100, color='skyblue', title=None, figsize=(8, 8)):
+    num_attributes = len(attributes)
+    if num_attributes != len(values):
+        raise ValueError(f"Attributes list length ({num_attributes}) must match values list length ({len(values)}).")
+    if num_attributes < 3:
+        raise ValueError("At least 3 attributes are needed to draw a polygon radar chart.")
+
+    canvas = _RadarCanvas(attributes, max_value, figsize)
+    canvas.draw_axes(_five_ticks(max_value))
+    canvas.draw_series(character_name, values, color, 0.4)
+    return canvas.to_svg(f'{character_name} 能力雷达图' if title is None else title)
+
+
+def history_radar_svg(student_name, attributes, score_history, max_value=100, figsize=(9, 9)):
+    """score_history: (提交次数 × 能力维度) 的成绩数组，按提交先后排列。"""
+    score_history = np.asarray(score_history)
+    if score_history.ndim != 2 or len(score_history) == 0:
+        raise ValueError("没有提交记录可用于绘制成长雷达图。")
+    if len(attributes) < 3:
+        raise ValueError("至少需要3个能力维度才能绘制雷达图。")
+    if score_history.shape[1] != len(attributes):
+        raise ValueError(f"成绩列数 ({score_history.shape[1]}) 与能力维度数 ({len(attributes)}) 不一致。")
+
+    canvas = _RadarCanvas(attributes, max_value, figsize)
+    canvas.draw_axes(np.arange(0, max_value + 10, 10))
+    for i, (scores, color) in enumerate(zip(score_history, _series_colors(len(score_history)))):
+        canvas.draw_series(f'第{i + 1}次提交', scores, color, 0.3)
+    return canvas.to_svg(f'{student_name} 最近{len(score_history)}次能力变化图')
+
+
+def comparison_radar_svg(list_of_name_and_scores, attributes, max_value=100, figsize=(9, 9)):
+    if not list_of_name_and_scores or len(list_of_name_and_scores) < 2:
+        raise ValueError("至少需要两位学生的数据才能绘制总体能力对比图。")
+    if not attributes or len(attributes) < 3:
+        raise ValueError("至少需要3个能力维度才能绘制雷达图。")
+
+    canvas = _RadarCanvas(attributes, max_value, figsize)
+    canvas.draw_axes(_five_ticks(max_value))
+    colors = _series_colors(len(list_of_name_and_scores))
+    for (student_name, scores), color in zip(list_of_name_and_scores, colors):
+        canvas.draw_series(student_name, scores, color, 0.3)
+    return canvas.to_svg("总体能力对比")
+
+
+def cohort_radar_svg(attributes, bands, student_count, highlight=None, max_value=100, figsize=(9, 9)):
+    """
+    班级人数较多时代替逐个学生绘制多边形：用最小-最大、四分位两条环带加中位数折线概括全班，
+    绘制开销与学生人数无关；悬停在中位数顶点上显示该维度的分位统计。
+    bands: 含 minimum、q1、median、q3、maximum 各键的字典，值为按能力维度排列的数组；
+    highlight: 可选的 (学生姓名, 成绩)，在分位带上叠加该学生的折线。
+    """
+    band_keys = ("minimum", "q1", "median", "q3", "maximum")
+    if not attributes or len(attributes) < 3:
+        raise ValueError("至少需要3个能力维度才能绘制雷达图。")
+    bands = {key: np.asarray(bands[key], dtype=float) for key in band_keys}
+    if any(len(values) != len(attributes) for values in bands.values()):
+        raise ValueError("分位带数据长度必须与能力维度数一致。")
+
+    canvas = _RadarCanvas(attributes, max_value, figsize)
+    canvas.draw_axes(_five_ticks(max_value))
+
+    # 外圈与内圈两条闭合路径配合 evenodd 填充规则，填充区域即两者之间的环带
+    for lower, upper, color, label in (("minimum", "maximum", "#90CAF9", "最低-最高"),
+                                        ("q1", "q3", "#1E88E5", "四分位区间")):
+        outer = canvas.path_data(*canvas.points(bands[upper]))
+        inner = canvas.path_data(*canvas.points(bands[lower]))
+        canvas.parts.append(f'<path d="{outer} {inner}" fill="{color}" fill-opacity="0.35" fill-rule="evenodd"/>')
+        canvas.legend.append((label, color, "patch"))
+
+    median_x, median_y = canvas.points(bands["median"])
+    dots = "".join(
+        f'<circle class="cm-dot" cx="{median_x[i]:.1f}" cy="{median_y[i]:.1f}" r="4" fill="#0D47A1">'
+        f'<title>{_esc(attribute)}\n中位数: {_fmt(bands["median"][i])}\n'
+        f'四分位区间: {_fmt(bands["q1"][i])} - {_fmt(bands["q3"][i])}\n'
+        f'最低-最高: {_fmt(bands["minimum"][i])} - {_fmt(bands["maximum"][i])}</title></circle>'
+        for i, attribute in enumerate(canvas.attributes)
+    )
+    canvas.parts.append(f'<g class="cm-series"><path class="cm-outline" d="{canvas.path_data(median_x, median_y)}" '
+                        f'fill="none" stroke="#0D47A1" stroke-width="2"/>{dots}</g>')
+    canvas.legend.insert(0, ("中位数", "#0D47A1", "line"))
+
+    if highlight is not None:
+        highlight_name, highlight_scores = highlight
+        canvas.draw_series(highlight_name, highlight_scores, "crimson", 0, dashed=True, line_width=2.5)
+
+    return canvas.to_svg(f"总体能力分布（{student_count} 人）")